@@ -19,7 +19,7 @@ if EXIST %script_dir%coff (
 )
 mkdir %script_dir%coff
 
-copy /y %script_dir%\src\coff\__init__.py %script_dir%coff\__init__.py
+copy /y %script_dir%\src\coff\*.py %script_dir%coff\
 copy /Y %script_dir%README.md %script_dir%coff\README
 
 echo on
\ No newline at end of file
@@ -1,43 +1,63 @@
 #! /usr/bin/env python
 
+import array
+import bisect
+import hashlib
 import logging
+import mmap
 import os
 import struct
 import sys
+import time
+import weakref
 import datetime
 
+def _get_logger(cmdname='coff'):
+    logger = logging.getLogger(cmdname)
+    if len(logger.handlers) == 0:
+        loglvl = logging.WARN
+        lvlname = '%s_LOGLEVEL'%(cmdname)
+        lvlname = lvlname.upper()
+        if lvlname in os.environ.keys():
+            v = os.environ[lvlname]
+            vint = 0
+            try:
+                vint = int(v)
+            except:
+                vint = 0
+            if vint >= 4:
+                loglvl = logging.DEBUG
+            elif vint >= 3:
+                loglvl = logging.INFO
+        handler = logging.StreamHandler()
+        fmt = "%(levelname)-8s %(message)s"
+        fmtname = '%s_LOGFMT'%(cmdname)
+        fmtname = fmtname.upper()
+        if fmtname in os.environ.keys():
+            v = os.environ[fmtname]
+            if v is not None and len(v) > 0:
+                fmt = v
+        formatter = logging.Formatter(fmt)
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+        logger.setLevel(loglvl)
+        # we do not want any more output debug
+        logger.propagate = False
+    return logger
+
+def _get_profile(cmdname='coff'):
+    # COFF_PROFILE=1 writes the stats of every Coff to stderr when it is closed , collected or at exit ,
+    # 2 also the total of the process at exit
+    v = os.environ.get('%s_PROFILE'%(cmdname.upper()),'')
+    try:
+        return int(v)
+    except:
+        return 0
+
 class _LoggerObject(object):
     def __init__(self,cmdname='coff'):
-        self.__logger = logging.getLogger(cmdname)
-        if len(self.__logger.handlers) == 0:
-            loglvl = logging.WARN
-            lvlname = '%s_LOGLEVEL'%(cmdname)
-            lvlname = lvlname.upper()
-            if lvlname in os.environ.keys():
-                v = os.environ[lvlname]
-                vint = 0
-                try:
-                    vint = int(v)
-                except:
-                    vint = 0
-                if vint >= 4:
-                    loglvl = logging.DEBUG
-                elif vint >= 3:
-                    loglvl = logging.INFO
-            handler = logging.StreamHandler()
-            fmt = "%(levelname)-8s %(message)s"
-            fmtname = '%s_LOGFMT'%(cmdname)
-            fmtname = fmtname.upper()
-            if fmtname in os.environ.keys():
-                v = os.environ[fmtname]
-                if v is not None and len(v) > 0:
-                    fmt = v
-            formatter = logging.Formatter(fmt)
-            handler.setFormatter(formatter)
-            self.__logger.addHandler(handler)
-            self.__logger.setLevel(loglvl)
-            # we do not want any more output debug
-            self.__logger.propagate = False
+        self.__logger = _get_logger(cmdname)
+        return
 
     def format_string(self,arr):
         s = ''
@@ -108,6 +128,9 @@ class _LoggerObject(object):
         self.__dict__[k] = v
         return
 
+    def is_enabled(self,level):
+        return self.__logger.isEnabledFor(level)
+
     def __eq__(self,other):
         for v in self.__class__.keywords:
             sv = self.__getattr__(v)
@@ -117,6 +140,44 @@ class _LoggerObject(object):
         return True
 
 
+def coff_map_file(infile):
+    fin = open(infile,'rb')
+    try:
+        if os.fstat(fin.fileno()).st_size == 0:
+            raise Exception('[%s] empty file can not map'%(infile))
+        mm = mmap.mmap(fin.fileno(),0,access=mmap.ACCESS_READ)
+    finally:
+        fin.close()
+    fin = None
+    return mm
+
+
+class _RecordObject(object):
+    # records have a lot of instances , so no __dict__ and no logger for each of them
+    __slots__ = ()
+    keywords = []
+
+    def __getattr__(self,k):
+        # the fields not set read as None , just as _LoggerObject did
+        if k.startswith('__'):
+            raise AttributeError(k)
+        return None
+
+    def __eq__(self,other):
+        if not isinstance(other,self.__class__):
+            return False
+        for k in self.__class__.keywords:
+            if getattr(self,k) != getattr(other,k):
+                return False
+        return True
+
+    def __ne__(self,other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return str(self)
+
+
 IMAGE_FILE_RELOCS_STRIPPED=1
 IMAGE_FILE_EXECUTABLE_IMAGE=2
 IMAGE_FILE_LINE_NUMS_STRIPPED=4
@@ -141,65 +202,96 @@ def coff_add_name(s,items):
     rets += items
     return rets
 
-class CoffHeader(_LoggerObject):
+# flags strings kept by coff_format_flags , objects repeat a few values many times
+COFF_FORMAT_CACHE_SIZE = 4096
+
+def coff_format_flags(table,flags,cache):
+    # table is [(mask,value,name)] in the order of the names , name is written when flags & mask == value
+    rets = cache.get(flags,None)
+    if rets is None:
+        rets = ';'.join([name for mask, value, name in table if (flags & mask) == value])
+        if len(cache) < COFF_FORMAT_CACHE_SIZE:
+            cache[flags] = rets
+    return rets
+
+COFF_MACHINE_NAMES = {0x8664 : 'amd64', 0x14c : 'i386', 0xaa64 : 'arm64'}
+
+COFF_FILE_FLAG_NAMES = [(flag,flag,name) for flag, name in [
+    (IMAGE_FILE_RELOCS_STRIPPED,'relocs_stripped'),
+    (IMAGE_FILE_EXECUTABLE_IMAGE,'executable'),
+    (IMAGE_FILE_LINE_NUMS_STRIPPED,'LINE_NUMS_STRIPPED'),
+    (IMAGE_FILE_LOCAL_SYMS_STRIPPED,'LOCAL_SYMS_STRIPPED'),
+    (IMAGE_FILE_AGGRESSIVE_WS_TRIM,'AGGRESSIVE_WS_TRIM'),
+    (IMAGE_FILE_LARGE_ADDRESS_AWARE,'LARGE_ADDRESS_WARE'),
+    (IMAGE_FILE_BYTES_REVERSED_LO,'BYTES_RESERVED_LO'),
+    (IMAGE_FILE_32BIT_MACHINE,'32BIT_MACHINE'),
+    (IMAGE_FILE_DEBUG_STRIPPED,'DEBUG_STRIPPED'),
+    (IMAGE_FILE_REMOVABLE_RUN_FROM_SWAP,'REMOVABLE_RUN_FROM_SWAP'),
+    (IMAGE_FILE_NET_RUN_FROM_SWAP,'NET_RUN_FROM_SWAP'),
+    (IMAGE_FILE_SYSTEM,'SYSTEM'),
+    (IMAGE_FILE_DLL,'DLL'),
+    (IMAGE_FILE_UP_SYSTEM_ONLY,'UP_SYSTEM_ONLY'),
+    (IMAGE_FILE_BYTES_REVERSED_HI,'BYTES_RESERVED_HI')]]
+_COFF_FILE_FLAG_STRS = dict()
+
+def coff_find_nul(data,off,end):
+    if hasattr(data,'find'):
+        idx = data.find(b'\0',off,end)
+        if idx < 0:
+            return end
+        return idx
+    # memoryview has no find , search growing chunks so long names cost one pass
+    step = 64
+    while off < end:
+        chunk = bytes(data[off:min(off + step,end)])
+        idx = chunk.find(b'\0')
+        if idx >= 0:
+            return off + idx
+        off += len(chunk)
+        step *= 2
+    return end
+
+def coff_array(typecode,data):
+    arr = array.array(typecode)
+    arr.frombytes(data)
+    return arr
+
+def coff_short_name(name):
+    # names kept in the 8 bytes field stop at the first nul or space
+    name = bytes(name)
+    idx = name.find(b'\0')
+    if idx >= 0:
+        name = name[:idx]
+    idx = name.find(b' ')
+    if idx >= 0:
+        name = name[:idx]
+    return name.decode('utf8')
+
+class CoffHeader(_RecordObject):
     keywords = ['id','numsects','timestamp','symtab','symnums','optsize','flags']
+    __slots__ = keywords
     headersize = 20
+    # symbol records of this kind of object
+    symsize = 18
+    symfmt = '<8slhHBB'
     def __init__(self,data):
-        super(CoffHeader,self).__init__()
         if len(data) < 2:
             raise Exception('len[%d] < 2'%(len(data)))
-        self.__id = struct.unpack('<H',data[:2])[0]
-        self.__size = 20
-
-        if len(data) < self.__size:
-            raise Exception('len[%d] < %d'%(len(data),self.__size))
-        self.__id,self.__numsects, self.__timestamp, self.__symtab, \
-            self.__symnums, self.__optsize,self.__flags = \
-                struct.unpack('<HHiiiHH',data[:self.__size])
+        size = self.__class__.headersize
+        if len(data) < size:
+            raise Exception('len[%d] < %d'%(len(data),size))
+        self.id,self.numsects, self.timestamp, self.symtab, \
+            self.symnums, self.optsize,self.flags = \
+                struct.unpack('<HHiiiHH',data[:size])
         return
 
     def format_id(self,tid):
-        rets = ''
-        if tid == 0x8664:
-            rets = 'amd64'
-        elif tid == 0x14c:
-            rets = 'i386'
-        return rets
+        return COFF_MACHINE_NAMES.get(tid,'')
 
 
     def format_flag(self,flag):
-        rets = ''
-        if flag & IMAGE_FILE_RELOCS_STRIPPED:
-            rets = coff_add_name(rets,'relocs_stripped')
-        elif flag & IMAGE_FILE_EXECUTABLE_IMAGE:
-            rets = coff_add_name(rets,'executable')
-        elif flag & IMAGE_FILE_LINE_NUMS_STRIPPED:
-            rets = coff_add_name(rets,'LINE_NUMS_STRIPPED')
-        elif flag & IMAGE_FILE_LOCAL_SYMS_STRIPPED:
-            rets = coff_add_name(rets,'LOCAL_SYMS_STRIPPED')
-        elif flag & IMAGE_FILE_AGGRESSIVE_WS_TRIM:
-            rets = coff_add_name(rets,'AGGRESSIVE_WS_TRIM')
-        elif flag & IMAGE_FILE_LARGE_ADDRESS_AWARE:
-            rets = coff_add_name(rets,'LARGE_ADDRESS_WARE')
-        elif flag & IMAGE_FILE_BYTES_REVERSED_LO:
-            rets = coff_add_name(rets,'BYTES_RESERVED_LO')
-        elif flag & IMAGE_FILE_32BIT_MACHINE:
-            rets = coff_add_name(rets,'32BIT_MACHINE')
-        elif flag & IMAGE_FILE_DEBUG_STRIPPED:
-            rets = coff_add_name(rets,'DEBUG_STRIPPED')
-        elif flag & IMAGE_FILE_REMOVABLE_RUN_FROM_SWAP:
-            rets = coff_add_name(rets,'REMOVABLE_RUN_FROM_SWAP')
-        elif flag & IMAGE_FILE_NET_RUN_FROM_SWAP:
-            rets = coff_add_name(rets,'NET_RUN_FROM_SWAP')
-        elif flag & IMAGE_FILE_SYSTEM:
-            rets = coff_add_name(rets,'SYSTEM')
-        elif flag & IMAGE_FILE_DLL:
-            rets = coff_add_name(rets,'DLL')
-        elif flag & IMAGE_FILE_UP_SYSTEM_ONLY:
-            rets = coff_add_name(rets,'UP_SYSTEM_ONLY')
-        elif flag & IMAGE_FILE_BYTES_REVERSED_HI:
-            rets = coff_add_name(rets,'BYTES_RESERVED_HI')
-        return rets
+        # every flag set , not only the first one
+        return coff_format_flags(COFF_FILE_FLAG_NAMES,flag,_COFF_FILE_FLAG_STRS)
 
     def foramt_time(self,timestamp):
         tm = datetime.datetime.fromtimestamp(timestamp)
@@ -207,25 +299,62 @@ class CoffHeader(_LoggerObject):
 
 
     def get_size(self):
-        return self.__size
+        return self.__class__.headersize
 
     def __str__(self):
         return 'CoffHeader(id[0x%x(%s)];numsects[0x%x];timestamp[0x%x(%s)];symtab[0x%x];symnums[0x%x];optsize[0x%x];flags[0x%x(%s)];)'%(\
                 self.id,self.format_id(self.id),self.numsects,self.timestamp,self.foramt_time(self.timestamp),self.symtab,self.symnums,self.optsize,self.flags, self.format_flag(self.flags))
 
-    def __repr__(self):
-        return str(self)
+# class id of ANON_OBJECT_HEADER_BIGOBJ , {D1BAA1C7-BAEE-4ba9-AF20-FAF66AA4DCB8}
+IMAGE_BIGOBJ_CLASSID = b'\xc7\xa1\xba\xd1\xee\xba\xa9\x4b\xaf\x20\xfa\xf6\x6a\xa4\xdc\xb8'
+
+class CoffBigHeader(CoffHeader):
+    # header of the objects made by cl /bigobj , 32 bits section count and section numbers ,
+    # 20 bytes symbol records and no optional header
+    __slots__ = ['version','classid','sizedata','metasize','metaoff']
+    headersize = 56
+    symsize = 20
+    symfmt = '<8sllHBB'
+    def __init__(self,data):
+        size = self.__class__.headersize
+        if len(data) < size:
+            raise Exception('len[%d] < %d'%(len(data),size))
+        sig1, sig2, self.version, self.id, self.timestamp, self.classid, self.sizedata, \
+            self.flags, self.metasize, self.metaoff, self.numsects, self.symtab, self.symnums = \
+                struct.unpack('<HHHHl16sLLLLLLL',data[:size])
+        self.classid = bytes(self.classid)
+        self.optsize = 0
+        return
+
+    @classmethod
+    def is_bigobj(cls,data):
+        if len(data) < cls.headersize:
+            return False
+        sig1, sig2, version = struct.unpack('<HHH',data[:6])
+        if sig1 != 0 or sig2 != 0xffff or version < 2:
+            return False
+        return bytes(data[12:28]) == IMAGE_BIGOBJ_CLASSID
+
+    def __str__(self):
+        return 'CoffBigHeader(id[0x%x(%s)];version[%d];numsects[0x%x];timestamp[0x%x(%s)];symtab[0x%x];symnums[0x%x];flags[0x%x(%s)];)'%(\
+                self.id,self.format_id(self.id),self.version,self.numsects,self.timestamp,self.foramt_time(self.timestamp),self.symtab,self.symnums,self.flags, self.format_flag(self.flags))
+
+def coff_header(data):
+    # CoffBigHeader for a /bigobj object , CoffHeader for the others
+    if CoffBigHeader.is_bigobj(data):
+        return CoffBigHeader(data)
+    return CoffHeader(data)
 
 
-class CoffOptHeader(_LoggerObject):
+class CoffOptHeader(_RecordObject):
     keywords = ['magic','version','szexe','szdata','szbss','entry','startex','startdata']
+    __slots__ = keywords
     headersize = 28
     def __init__(self,data):
-        super(CoffOptHeader,self).__init__()
         if len(data) < self.__class__.headersize:
             raise Exception('len[%d] < [%d]'%(len(data), self.__class__.headersize))
-        self.__magic, self.__version, self.__szexe, self.__szdata,self.__szbss ,\
-        self.__entry, self.__startex, self.__startdata = struct.unpack('<hhllllll',data[:self.__class__.headersize])
+        self.magic, self.version, self.szexe, self.szdata,self.szbss ,\
+        self.entry, self.startex, self.startdata = struct.unpack('<hhllllll',data[:self.__class__.headersize])
         return
 
     def get_size(self):
@@ -235,9 +364,6 @@ class CoffOptHeader(_LoggerObject):
         return 'CoffOptHeader(magic[0x%x];version[0x%x];sizeex[0x%x];sizedata[0x%x];sizebss[0x%x];entry[0x%x];startex[0x%x];startdata[0x%x])'%(\
                 self.magic,self.version,self.szexe,self.szdata,self.szbss,self.entry,self.startex, self.startdata)
 
-    def __repr__(self):
-        return str(self)
-
 
 IMAGE_SCN_TYPE_NO_PAD=0x8
 IMAGE_SCN_CNT_CODE=0X20
@@ -255,7 +381,7 @@ IMAGE_SCN_ALIGN_8BYTES=0x400000
 IMAGE_SCN_ALIGN_16BYTES=0x500000
 IMAGE_SCN_ALIGN_32BYTES=0x600000
 IMAGE_SCN_ALIGN_64BYTES=0x700000
-IMAGE_SCN_ALIGN_128BYTES=0x80000
+IMAGE_SCN_ALIGN_128BYTES=0x800000
 IMAGE_SCN_ALIGN_256BYTES=0x900000
 IMAGE_SCN_ALIGN_512BYTES=0xa00000
 IMAGE_SCN_ALIGN_1024BYTES=0xb00000
@@ -272,111 +398,69 @@ IMAGE_SCN_MEM_EXECUTE=0x20000000
 IMAGE_SCN_MEM_READ=0x40000000
 IMAGE_SCN_MEM_WRITE=0x80000000
 
-
-class CoffSectionHeader(_LoggerObject):
+COFF_SCN_FLAG_NAMES = [(flag,flag,name) for flag, name in [
+    (IMAGE_SCN_TYPE_NO_PAD,'NO_PAD'),
+    (IMAGE_SCN_CNT_CODE,'CODE'),
+    (IMAGE_SCN_CNT_INITIALIZED_DATA,'DATA'),
+    (IMAGE_SCN_CNT_UNINITIALIZED_DATA,'BSS'),
+    (IMAGE_SCN_LNK_OTHER,'OTHER'),
+    (IMAGE_SCN_LNK_INFO,'INFO'),
+    (IMAGE_SCN_LNK_REMOVE,'REMOVE'),
+    (IMAGE_SCN_LNK_COMDAT,'COMDAT'),
+    (IMAGE_SCN_GPREL,'GPREL')]] + \
+    [(IMAGE_SCN_ALIGN_MASK,align,name) for align, name in [
+    (IMAGE_SCN_ALIGN_1BYTES,'1 byte align'),
+    (IMAGE_SCN_ALIGN_2BYTES,'2 bytes align'),
+    (IMAGE_SCN_ALIGN_4BYTES,'4 bytes align'),
+    (IMAGE_SCN_ALIGN_8BYTES,'8 bytes align'),
+    (IMAGE_SCN_ALIGN_16BYTES,'16 bytes align'),
+    (IMAGE_SCN_ALIGN_32BYTES,'32 bytes align'),
+    (IMAGE_SCN_ALIGN_64BYTES,'64 bytes align'),
+    (IMAGE_SCN_ALIGN_128BYTES,'128 bytes align'),
+    (IMAGE_SCN_ALIGN_256BYTES,'256 bytes align'),
+    (IMAGE_SCN_ALIGN_512BYTES,'512 bytes align'),
+    (IMAGE_SCN_ALIGN_1024BYTES,'1024 bytes align'),
+    (IMAGE_SCN_ALIGN_2048BYTES,'2048 bytes align'),
+    (IMAGE_SCN_ALIGN_4096BYTES,'4096 bytes align'),
+    (IMAGE_SCN_ALIGN_8192BYTES,'8192 bytes align')]] + \
+    [(flag,flag,name) for flag, name in [
+    (IMAGE_SCN_LNK_NRELOC_OVFL,'OVFL'),
+    (IMAGE_SCN_MEM_DISCARDABLE,'DISCARDABLE'),
+    (IMAGE_SCN_MEM_NOT_CACHED,'NOT_CACHED'),
+    (IMAGE_SCN_MEM_NOT_PAGED,'NOT_PAGED'),
+    (IMAGE_SCN_MEM_SHARED,'MEM_SHARED'),
+    (IMAGE_SCN_MEM_EXECUTE,'EXECUTE'),
+    (IMAGE_SCN_MEM_READ,'READ'),
+    (IMAGE_SCN_MEM_WRITE,'WRITE')]]
+_COFF_SCN_FLAG_STRS = dict()
+
+
+class CoffSectionHeader(_RecordObject):
     keywords=['name','paddr','vaddr','size','offdata','offrel','numrels','numlnno','lineentries','flags']
+    __slots__ = keywords
     headersize = 40
+    recfmt = '<8sllllllHHl'
     def __init__(self,data):
-        super(CoffSectionHeader,self).__init__()
         if len(data) < self.__class__.headersize:
             raise Exception('len[%d] < [%d]'%(len(data), self.__class__.headersize))
-        self.__paddr, self.__vaddr, self.__size,self.__offdata ,\
-        self.__offrel, self.__lineentries, self.__numrels, self.__numlnno ,self.__flags =\
+        self.paddr, self.vaddr, self.size,self.offdata ,\
+        self.offrel, self.lineentries, self.numrels, self.numlnno ,self.flags =\
              struct.unpack('<llllllHHl',data[8:self.__class__.headersize])
-        name = data[:8]
-        if sys.version[0] == '3':
-            nname = b''
-        else:
-            nname = ''
-        for b in name:
-            if sys.version[0] == '3':
-                if b == 0 or b == 0x20:
-                    break
-            else:
-                if ord(b) == 0 or ord(b) == 0x20:
-                    break
-            if sys.version[0] == '3':
-                #logging.info('b [0x%x]'%(b))
-                nname += b.to_bytes(1,'little')
-            else:
-                nname += b
-        if sys.version[0] == '3':
-            self.__name = nname.decode('utf8')
-        else:
-            self.__name = str(nname)
+        self.name = coff_short_name(data[:8])
         return
 
+    @classmethod
+    def from_fields(cls,fields):
+        # fields is one tuple of recfmt , as given by struct.iter_unpack over the section table
+        self = cls.__new__(cls)
+        self.paddr, self.vaddr, self.size,self.offdata ,\
+        self.offrel, self.lineentries, self.numrels, self.numlnno ,self.flags = fields[1:]
+        self.name = coff_short_name(fields[0])
+        return self
+
 
     def format_flags(self,flags):
-        rets = ''
-        if flags & IMAGE_SCN_TYPE_NO_PAD:
-            rets = coff_add_name(rets,'NO_PAD')
-        if flags & IMAGE_SCN_CNT_CODE:
-            rets = coff_add_name(rets,'CODE')
-        if flags & IMAGE_SCN_CNT_INITIALIZED_DATA:
-            rets = coff_add_name(rets,'DATA')            
-        if flags & IMAGE_SCN_CNT_UNINITIALIZED_DATA:
-            rets = coff_add_name(rets,'BSS')
-        if flags & IMAGE_SCN_LNK_OTHER:
-            rets = coff_add_name(rets,'OTHER')
-        if flags & IMAGE_SCN_LNK_INFO:
-            rets = coff_add_name(rets,'INFO')
-        if flags & IMAGE_SCN_LNK_REMOVE:
-            rets = coff_add_name(rets,'REMOVE')
-        if flags & IMAGE_SCN_LNK_COMDAT:
-            rets = coff_add_name(rets,'COMDAT')
-        if flags & IMAGE_SCN_GPREL:
-            rets = coff_add_name(rets,'GPREL')
-        alignmask = flags & IMAGE_SCN_ALIGN_MASK
-        if alignmask == IMAGE_SCN_ALIGN_1BYTES:
-            rets = coff_add_name(rets,'1 byte align')
-        elif alignmask == IMAGE_SCN_ALIGN_2BYTES:
-            rets = coff_add_name(rets,'2 bytes align')
-        elif alignmask == IMAGE_SCN_ALIGN_4BYTES:
-            rets = coff_add_name(rets,'4 bytes align')
-        elif alignmask == IMAGE_SCN_ALIGN_8BYTES:
-            rets = coff_add_name(rets,'8 bytes align')
-        elif alignmask == IMAGE_SCN_ALIGN_16BYTES:
-            rets = coff_add_name(rets,'16 bytes align')
-        elif alignmask == IMAGE_SCN_ALIGN_32BYTES:
-            rets = coff_add_name(rets,'32 bytes align')
-        elif alignmask == IMAGE_SCN_ALIGN_64BYTES:
-            rets = coff_add_name(rets,'64 bytes align')
-        elif alignmask == IMAGE_SCN_ALIGN_128BYTES:
-            rets = coff_add_name(rets,'128 bytes align')
-        elif alignmask == IMAGE_SCN_ALIGN_256BYTES:
-            rets = coff_add_name(rets,'256 bytes align')
-        elif alignmask == IMAGE_SCN_ALIGN_512BYTES:
-            rets = coff_add_name(rets,'512 bytes align')
-        elif alignmask == IMAGE_SCN_ALIGN_1024BYTES:
-            rets = coff_add_name(rets,'1024 bytes align')
-        elif alignmask == IMAGE_SCN_ALIGN_2048BYTES:
-            rets = coff_add_name(rets,'2048 bytes align')
-        elif alignmask == IMAGE_SCN_ALIGN_4096BYTES:
-            rets = coff_add_name(rets,'4096 bytes align')
-        elif alignmask == IMAGE_SCN_ALIGN_8192BYTES:
-            rets = coff_add_name(rets,'8192 bytes align')
-
-        if flags & IMAGE_SCN_LNK_NRELOC_OVFL:
-            rets = coff_add_name(rets,'OVFL')
-        if flags & IMAGE_SCN_MEM_DISCARDABLE:
-            rets = coff_add_name(rets,'DISCARDABLE')
-
-        if flags & IMAGE_SCN_MEM_NOT_CACHED:
-            rets = coff_add_name(rets,'NOT_CACHED')
-
-        if flags & IMAGE_SCN_MEM_NOT_PAGED:
-            rets = coff_add_name(rets,'NOT_PAGED')
-        if flags & IMAGE_SCN_MEM_SHARED:
-            rets = coff_add_name(rets,'MEM_SHARED')
-
-        if flags & IMAGE_SCN_MEM_EXECUTE:
-            rets = coff_add_name(rets,'EXECUTE')
-        if flags & IMAGE_SCN_MEM_READ:
-            rets = coff_add_name(rets,'READ')
-        if flags & IMAGE_SCN_MEM_WRITE:
-            rets = coff_add_name(rets,'WRITE')
-        return rets
+        return coff_format_flags(COFF_SCN_FLAG_NAMES,flags,_COFF_SCN_FLAG_STRS)
 
     def get_size(self):
         return self.__class__.headersize
@@ -385,9 +469,6 @@ class CoffSectionHeader(_LoggerObject):
         return 'CoffSectionHeader(name[%s];paddr[0x%x];vaddr[0x%x];size[0x%x];offdata[0x%x];offrel[0x%x];numrels[0x%x];lineentries[0x%x];numlnno[0x%x];flags[0x%x(%s)])'%(\
                 self.name,self.paddr,self.vaddr,self.size,self.offdata,self.offrel,self.numrels , self.lineentries, self.numlnno,self.flags, self.format_flags(self.flags))
 
-    def __repr__(self):
-        return str(self)
-
 IMAGE_SYM_CLASS_END_OF_FUNCTION=0xff
 IMAGE_SYM_CLASS_NULL=0x0
 IMAGE_SYM_CLASS_AUTOMATIC=0x1
@@ -416,150 +497,329 @@ IMAGE_SYM_CLASS_SECTION=0x68
 IMAGE_SYM_CLASS_WEAK_EXTERNAL=0x69
 IMAGE_SYM_CLASS_CLR_TOKEN=0x6b
 
-class CoffSymtable(_LoggerObject):
+COFF_SYM_CLASS_NAMES = {
+    IMAGE_SYM_CLASS_END_OF_FUNCTION : 'END_OF_FUNCTION',
+    IMAGE_SYM_CLASS_NULL : 'NULL',
+    IMAGE_SYM_CLASS_AUTOMATIC : 'ATOMIC',
+    IMAGE_SYM_CLASS_EXTERNAL : 'EXTERNAL',
+    IMAGE_SYM_CLASS_STATIC : 'STATIC',
+    IMAGE_SYM_CLASS_REGISTER : 'REGISTER',
+    IMAGE_SYM_CLASS_EXTERNAL_DEF : 'EXTERNAL_DEF',
+    IMAGE_SYM_CLASS_LABEL : 'LABEL',
+    IMAGE_SYM_CLASS_UNDEFINED_LABEL : 'UNDEFINED_LABEL',
+    IMAGE_SYM_CLASS_MEMBER_OF_STRUCT : 'MEMBER_OF_STRUCT',
+    IMAGE_SYM_CLASS_ARGUMENT : 'ARGUMENT',
+    IMAGE_SYM_CLASS_STRUCT_TAG : 'STRUCT_TAG',
+    IMAGE_SYM_CLASS_MEMBER_OF_UNION : 'MEMBER_OF_UNION',
+    IMAGE_SYM_CLASS_UNION_TAG : 'UNION_TAG',
+    IMAGE_SYM_CLASS_TYPE_DEFINITION : 'TYPE_DEFINITION',
+    IMAGE_SYM_CLASS_UNDEFINED_STATIC : 'UNDEFINED_STATIC',
+    IMAGE_SYM_CLASS_ENUM_TAG : 'ENUM_TAG',
+    IMAGE_SYM_CLASS_MEMBER_OF_ENUM : 'MEMBER_OF_ENUM',
+    IMAGE_SYM_CLASS_REGISTER_PARAM : 'REGISTER_PARAM',
+    IMAGE_SYM_CLASS_BIT_FIELD : 'BIT_FIELD',
+    IMAGE_SYM_CLASS_BLOCK : 'BLOCK',
+    IMAGE_SYM_CLASS_FUNCTION : 'FUNCTION',
+    IMAGE_SYM_CLASS_END_OF_STRUCT : 'END_OF_STRUCT',
+    IMAGE_SYM_CLASS_FILE : 'FILE',
+    IMAGE_SYM_CLASS_SECTION : 'SECTION',
+    IMAGE_SYM_CLASS_WEAK_EXTERNAL : 'WEAK_EXTERNAL',
+    IMAGE_SYM_CLASS_CLR_TOKEN : 'CLR_TOKEN',
+}
+
+def coff_string_name(data,nameoff,strend):
+    if nameoff < 0 or nameoff >= strend:
+        return ''
+    end = coff_find_nul(data,nameoff,strend)
+    return bytes(data[nameoff:end]).decode('utf8')
+
+def coff_get_name(data,symoff,stroff,strend):
+    name = bytes(data[symoff:(symoff + 8)])
+    if name[0] != 0:
+        return coff_short_name(name)
+    # this means we get from the stroff
+    nameoff = struct.unpack('<l',name[4:8])[0]
+    return coff_string_name(data,(nameoff + stroff),strend)
+
+class StringTable(object):
+    # names decoded once and kept by offset , the same string is shared by all the names
+    # hits and misses count the lookups of get_string , decoded is the bytes decoded by the misses ,
+    # which are timed in seconds when timed is set
+    def __init__(self,data,stroff,strsize):
+        self.data = data
+        self.stroff = stroff
+        self.strsize = strsize
+        self.strend = stroff + strsize
+        self.__names = dict()
+        self.__shortnames = dict()
+        self.__strings = dict()
+        self.hits = 0
+        self.misses = 0
+        self.decoded = 0
+        self.seconds = 0.0
+        self.timed = False
+        return
+
+    def __len__(self):
+        return self.strsize
+
+    def get_bytes(self):
+        return bytes(self.data[self.stroff:self.strend])
+
+    def __share(self,raw):
+        name = self.__strings.get(raw,None)
+        if name is None:
+            name = raw.decode('utf8')
+            self.__strings[raw] = name
+        return name
+
+    def get_string(self,off):
+        name = self.__names.get(off,None)
+        if name is None:
+            if self.timed:
+                stime = time.perf_counter()
+            self.misses += 1
+            nameoff = self.stroff + off
+            if nameoff < 0 or nameoff >= self.strend:
+                name = ''
+            else:
+                end = coff_find_nul(self.data,nameoff,self.strend)
+                name = self.__share(bytes(self.data[nameoff:end]))
+                self.decoded += end - nameoff
+            self.__names[off] = name
+            if self.timed:
+                self.seconds += time.perf_counter() - stime
+        else:
+            self.hits += 1
+        return name
+
+    def get_name(self,name):
+        # name is the 8 bytes name field of symbol record
+        name = bytes(name)
+        if name[0] == 0:
+            return self.get_string(struct.unpack('<l',name[4:8])[0])
+        sname = self.__shortnames.get(name,None)
+        if sname is None:
+            sname = coff_short_name(name)
+            sname = self.__strings.setdefault(sname.encode('utf8'),sname)
+            self.__shortnames[name] = sname
+        return sname
+
+
+class CoffSymtable(_RecordObject):
     keywords = ['name','value','sectnum','type','storagecls','numaux']
+    __slots__ = keywords + ['size','recsize']
     headersize = 18
+    # name , value , sectnum , type , storagecls , name of storagecls , numaux , size
+    strfmt = '[%s] value[0x%x]sectnum[%d]type[0x%x]storagecls[0x%x(%s)]numaux[%d]size[0x%x]'
     def __init__(self,data,symoff,stroff,strend):
-        super(CoffSymtable,self).__init__()
-        name = data[symoff:(symoff + 8)]
-        self.__value, self.__sectnum,self.__type, self.__storagecls,self.__numaux = \
+        self.value, self.sectnum,self.type, self.storagecls,self.numaux = \
             struct.unpack('<lhHBB', data[(symoff+8):(symoff + self.__class__.headersize)])
-        self.__size = self.__class__.headersize
-        ni = 0
-        for b in name:
-            if sys.version[0] == '3':
-                if b == 0:
-                    break
-            else:
-                if ord(b) == 0:
-                    break
-            ni += 1
-        if ni > 0:
-            if sys.version[0] == '3':
-                nname = b''
-            else:
-                nname = ''
-            for b in name:
-                if sys.version[0] == '3':
-                    if b == 0 or b == 0x20:
-                        break
-                else:
-                    if ord(b) == 0 or ord(b) == 0x20:
-                        break
-                if sys.version[0] == '3':
-                    #logging.info('b [0x%x]'%(b))
-                    nname += b.to_bytes(1,'little')
-                else:
-                    nname += b
-            if sys.version[0] == '3':
-                self.__name = nname.decode('utf8')
-            else:
-                self.__name = str(nname)
-        else:
-            # this means we get from the stroff
-            nameoff = struct.unpack('<l',data[(symoff + 4):(symoff + 8)])[0]
-            nameoff += stroff
-            if sys.version[0] == '3':
-                nname = b''
-            else:
-                nname = ''
-            while nameoff < strend:
-                b = data[nameoff]
-                if sys.version[0] == '3':
-                    if b == 0x0:
-                        break
-                else:
-                    if ord(b) == 0:
-                        break
-                if sys.version[0] == '3':
-                    #logging.info('b [0x%x]'%(b))
-                    nname += b.to_bytes(1,'little')
-                else:
-                    nname += b
-                nameoff += 1
-            if sys.version[0] == '3':
-                self.__name = nname.decode('utf8')
-            else:
-                self.__name = str(nname)
-        if self.__numaux > 0 :
-            self.__size += self.__numaux * self.__class__.headersize
+        self.name = coff_get_name(data,symoff,stroff,strend)
         self.size = 0
+        self.recsize = self.__class__.headersize
         return
 
+    @classmethod
+    def from_table(cls,table,idx):
+        # view of one record already decoded in the columns of SymbolTable
+        self = cls.__new__(cls)
+        self.value = table.values[idx]
+        self.sectnum = table.sectnums[idx]
+        self.type = table.types[idx]
+        self.storagecls = table.storageclses[idx]
+        self.numaux = table.numauxs[idx]
+        self.name = table.get_name(idx)
+        self.size = table.sizes[idx]
+        self.recsize = table.recsize
+        return self
+
     def format_storagecls(self,storagecls):
-        rets= ''
-        if storagecls == IMAGE_SYM_CLASS_END_OF_FUNCTION:
-            rets = 'END_OF_FUNCTION'
-        elif storagecls == IMAGE_SYM_CLASS_NULL:
-            rets = 'NULL'
-        elif storagecls == IMAGE_SYM_CLASS_AUTOMATIC:
-            rets = 'ATOMIC'
-        elif storagecls == IMAGE_SYM_CLASS_EXTERNAL:
-            rets = 'EXTERNAL'
-        elif storagecls == IMAGE_SYM_CLASS_STATIC:
-            rets = 'STATIC'
-        elif storagecls == IMAGE_SYM_CLASS_REGISTER:
-            rets = 'REGISTER'
-        elif storagecls == IMAGE_SYM_CLASS_EXTERNAL_DEF:
-            rets = 'EXTERNAL_DEF'
-        elif storagecls == IMAGE_SYM_CLASS_LABEL:
-            rets = 'LABEL'
-        elif storagecls == IMAGE_SYM_CLASS_UNDEFINED_LABEL:
-            rets = 'UNDEFINED_LABEL'
-        elif storagecls == IMAGE_SYM_CLASS_MEMBER_OF_STRUCT:
-            rets = 'MEMBER_OF_STRUCT'
-        elif storagecls == IMAGE_SYM_CLASS_ARGUMENT:
-            rets = 'ARGUMENT'
-        elif storagecls == IMAGE_SYM_CLASS_STRUCT_TAG:
-            rets = 'STRUCT_TAG'
-        elif storagecls == IMAGE_SYM_CLASS_MEMBER_OF_UNION:
-            rets = 'MEMBER_OF_UNION'
-        elif storagecls == IMAGE_SYM_CLASS_UNION_TAG:
-            rets = 'UNION_TAG'
-        elif storagecls == IMAGE_SYM_CLASS_TYPE_DEFINITION:
-            rets = 'TYPE_DEFINITION'
-        elif storagecls == IMAGE_SYM_CLASS_UNDEFINED_STATIC:
-            rets = 'UNDEFINED_STATIC'
-        elif storagecls == IMAGE_SYM_CLASS_ENUM_TAG:
-            rets = 'ENUM_TAG'
-        elif storagecls == IMAGE_SYM_CLASS_MEMBER_OF_ENUM:
-            rets = 'MEMBER_OF_ENUM'
-        elif storagecls == IMAGE_SYM_CLASS_REGISTER_PARAM:
-            rets = 'REGISTER_PARAM'
-        elif storagecls == IMAGE_SYM_CLASS_BIT_FIELD:
-            rets = 'BIT_FIELD'
-        elif storagecls == IMAGE_SYM_CLASS_BLOCK:
-            rets = 'BLOCK'
-        elif storagecls == IMAGE_SYM_CLASS_FUNCTION:
-            rets = 'FUNCTION'
-        elif storagecls == IMAGE_SYM_CLASS_END_OF_STRUCT:
-            rets = 'END_OF_STRUCT'
-        elif storagecls == IMAGE_SYM_CLASS_FILE:
-            rets = 'FILE'
-        elif storagecls == IMAGE_SYM_CLASS_SECTION:
-            rets = 'SECTION'
-        elif storagecls == IMAGE_SYM_CLASS_WEAK_EXTERNAL:
-            rets = 'WEAK_EXTERNAL'
-        elif storagecls == IMAGE_SYM_CLASS_CLR_TOKEN:
-            rets = 'CLR_TOKEN'
-        return rets
+        return COFF_SYM_CLASS_NAMES.get(storagecls,'')
 
 
     def __str__(self):
-        rets = '[%s] '%(self.name)
-        rets += 'value[0x%x]'%(self.value)
-        rets += 'sectnum[%d]'%(self.sectnum)
-        rets += 'type[0x%x]'%(self.type)
-        rets += 'storagecls[0x%x(%s)]'%(self.storagecls, self.format_storagecls(self.storagecls))
-        rets += 'numaux[%d]'%(self.numaux)
-        rets += 'size[0x%x]'%(self.size)
+        return self.__class__.strfmt%(\
+                self.name,self.value,self.sectnum,self.type,self.storagecls,self.format_storagecls(self.storagecls),self.numaux,self.size)
+
+    def get_size(self):
+        return (self.numaux + 1) * self.recsize
+
+
+class SymbolTable(object):
+    # every record of the symbol table (aux records included) decoded in one pass
+    # into parallel columns , CoffSymtable objects are only made when asked by get_symbol
+    # recfmt is the symfmt of the header , 18 bytes records or 20 bytes ones for /bigobj
+    recfmt = CoffHeader.symfmt
+    columns = [('values','i'),('sectnums','i'),('types','H'),('storageclses','B'),('numauxs','B'),('nameoffs','i'),('sizes','q')]
+    def __init__(self,data,symoff,symnums,strtab,recfmt=None):
+        if recfmt is None:
+            recfmt = self.__class__.recfmt
+        recsize = struct.calcsize(recfmt)
+        if (symoff + symnums * recsize) > len(data):
+            raise Exception('symtable [0x%x] + [%d] * [%d] > [0x%x]'%(symoff,symnums,recsize,len(data)))
+        self.symnums = symnums
+        self.strtab = strtab
+        self.recfmt = recfmt
+        self.recsize = recsize
+        region = memoryview(data)[symoff:(symoff + symnums * recsize)]
+        if symnums > 0:
+            names, values, sectnums, types, storageclses, numauxs = zip(*struct.iter_unpack(recfmt,region))
+        else:
+            names, values, sectnums, types, storageclses, numauxs = (), (), (), (), (), ()
+        # the 8 bytes name fields , kept so short names do not need the file data
+        self.rawnames = b''.join(names)
+        self.values = array.array('i',values)
+        self.sectnums = array.array('i',sectnums)
+        self.types = array.array('H',types)
+        self.storageclses = array.array('B',storageclses)
+        self.numauxs = array.array('B',numauxs)
+        # offset in the string table for long names , -1 for the names inside the record
+        self.nameoffs = array.array('i',[struct.unpack('<l',n[4:])[0] if n[0] == 0 else -1 for n in names])
+        self.sizes = array.array('q',bytes(8 * symnums))
+        # one slot for every raw index , aux records included , so relocations index it directly
+        self.__symbols = [None] * symnums
+        return
+
+    @classmethod
+    def from_columns(cls,strtab,rawnames,columns,recfmt=None):
+        # columns is name to array as listed in SymbolTable.columns
+        self = cls.__new__(cls)
+        if recfmt is None:
+            recfmt = cls.recfmt
+        self.strtab = strtab
+        self.recfmt = recfmt
+        self.recsize = struct.calcsize(recfmt)
+        self.rawnames = rawnames
+        for name, typecode in cls.columns:
+            setattr(self,name,columns[name])
+        self.symnums = len(self.values)
+        self.__symbols = [None] * self.symnums
+        return self
+
+    def __len__(self):
+        return self.symnums
+
+    def get_name(self,idx):
+        nameoff = self.nameoffs[idx]
+        if nameoff >= 0:
+            return self.strtab.get_string(nameoff)
+        return self.strtab.get_name(self.rawnames[(idx * 8):(idx * 8 + 8)])
+
+    def get_symbol(self,idx):
+        sym = self.__symbols[idx]
+        if sym is None:
+            sym = CoffSymtable.from_table(self,idx)
+            self.__symbols[idx] = sym
+        return sym
+
+    def format_symbols(self,idxs):
+        # [(name,str(get_symbol(idx)))] made from the columns , no CoffSymtable for the dump of many symbols
+        strfmt = CoffSymtable.strfmt
+        get_string = self.strtab.get_string
+        get_short = self.strtab.get_name
+        rawnames = self.rawnames
+        nameoffs = self.nameoffs
+        values = self.values
+        sectnums = self.sectnums
+        types = self.types
+        storageclses = self.storageclses
+        numauxs = self.numauxs
+        sizes = self.sizes
+        clsnames = COFF_SYM_CLASS_NAMES
+        rets = []
+        for idx in idxs:
+            nameoff = nameoffs[idx]
+            if nameoff >= 0:
+                name = get_string(nameoff)
+            else:
+                name = get_short(rawnames[(idx * 8):(idx * 8 + 8)])
+            storagecls = storageclses[idx]
+            rets.append((name,strfmt%(name,values[idx],sectnums[idx],types[idx],storagecls,clsnames.get(storagecls,''),numauxs[idx],sizes[idx])))
         return rets
 
+    def get_record(self,idx):
+        # the raw bytes of record idx , packed again from the columns , for the aux records
+        return struct.pack(self.recfmt,self.rawnames[(idx * 8):(idx * 8 + 8)],self.values[idx],\
+            self.sectnums[idx],self.types[idx],self.storageclses[idx],self.numauxs[idx])
+
+
+class SymbolList(object):
+    # lazy list of the symbols in one section , only keeps the indexes into SymbolTable
+    def __init__(self,table,idxs):
+        self.table = table
+        self.idxs = array.array('I',idxs)
+        return
+
+    def __len__(self):
+        return len(self.idxs)
+
+    def __getitem__(self,i):
+        if isinstance(i,slice):
+            return [self.table.get_symbol(idx) for idx in self.idxs[i]]
+        return self.table.get_symbol(self.idxs[i])
+
+    def __iter__(self):
+        get_symbol = self.table.get_symbol
+        for idx in self.idxs:
+            yield get_symbol(idx)
+        return
+
+    def format_symbols(self):
+        return self.table.format_symbols(self.idxs)
+
+    def __str__(self):
+        return str(list(self))
+
     def __repr__(self):
         return str(self)
 
+
+IMAGE_COMDAT_SELECT_NODUPLICATES=1
+IMAGE_COMDAT_SELECT_ANY=2
+IMAGE_COMDAT_SELECT_SAME_SIZE=3
+IMAGE_COMDAT_SELECT_EXACT_MATCH=4
+IMAGE_COMDAT_SELECT_ASSOCIATIVE=5
+IMAGE_COMDAT_SELECT_LARGEST=6
+
+class CoffSectionDef(_RecordObject):
+    # aux record after the symbol of a section , number and selection are for COMDAT sections
+    keywords = ['length','numrels','numlnno','checksum','number','selection']
+    __slots__ = keywords
+    headersize = 18
+    def __init__(self,data,bigobj=False):
+        if len(data) < self.__class__.headersize:
+            raise Exception('len[%d] < [%d]'%(len(data), self.__class__.headersize))
+        self.length, self.numrels, self.numlnno, self.checksum, self.number, self.selection, unused, highnumber = \
+            struct.unpack('<LHHLHBBH',data[:self.__class__.headersize])
+        if bigobj:
+            self.number |= (highnumber << 16)
+        return
+
     def get_size(self):
-        return self.__size
+        return self.__class__.headersize
+
+    def __str__(self):
+        return 'CoffSectionDef(length[0x%x];numrels[%d];numlnno[%d];checksum[0x%x];number[%d];selection[%d])'%(\
+            self.length,self.numrels,self.numlnno,self.checksum,self.number,self.selection)
+
+def coff_section_defs(symtab,numsects,bigobj=False):
+    # seckey to the CoffSectionDef of the section symbol (STATIC , value 0 , with aux record)
+    values = symtab.values
+    sectnums = symtab.sectnums
+    types = symtab.types
+    storageclses = symtab.storageclses
+    numauxs = symtab.numauxs
+    sectdefs = dict()
+    i = 0
+    while i < symtab.symnums:
+        numaux = numauxs[i]
+        sectnum = sectnums[i]
+        if numaux > 0 and sectnum >= 1 and sectnum <= numsects and storageclses[i] == IMAGE_SYM_CLASS_STATIC \
+            and values[i] == 0 and types[i] == 0 and (sectnum - 1) not in sectdefs:
+            sectdefs[sectnum - 1] = CoffSectionDef(symtab.get_record(i + 1),bigobj)
+        i += 1 + numaux
+    return sectdefs
 
 
 IMAGE_REL_AMD64_ABSOLUTE=0x0
@@ -593,90 +853,442 @@ IMAGE_REL_I386_TOKEN=0xc
 IMAGE_REL_I386_SECREL7=0xd
 IMAGE_REL_I386_REL32=0x14
 
-class CoffReloc(_LoggerObject):
+
+IMAGE_REL_ARM64_ABSOLUTE=0x0
+IMAGE_REL_ARM64_ADDR32=0x1
+IMAGE_REL_ARM64_ADDR32NB=0x2
+IMAGE_REL_ARM64_BRANCH26=0x3
+IMAGE_REL_ARM64_PAGEBASE_REL21=0x4
+IMAGE_REL_ARM64_REL21=0x5
+IMAGE_REL_ARM64_PAGEOFFSET_12A=0x6
+IMAGE_REL_ARM64_PAGEOFFSET_12L=0x7
+IMAGE_REL_ARM64_SECREL=0x8
+IMAGE_REL_ARM64_SECREL_LOW12A=0x9
+IMAGE_REL_ARM64_SECREL_HIGH12A=0xa
+IMAGE_REL_ARM64_SECREL_LOW12L=0xb
+IMAGE_REL_ARM64_TOKEN=0xc
+IMAGE_REL_ARM64_SECTION=0xd
+IMAGE_REL_ARM64_ADDR64=0xe
+IMAGE_REL_ARM64_BRANCH19=0xf
+IMAGE_REL_ARM64_BRANCH14=0x10
+IMAGE_REL_ARM64_REL32=0x11
+
+# bytes patched by every relocation type , the ones not listed patch nothing
+COFF_RELOC_SIZES = {
+    0x8664 : {
+        IMAGE_REL_AMD64_ADDR64 : 8,
+        IMAGE_REL_AMD64_ADDR32 : 4,
+        IMAGE_REL_AMD64_ADDR32NB : 4,
+        IMAGE_REL_AMD64_REL32 : 4,
+        IMAGE_REL_AMD64_REL32_1 : 4,
+        IMAGE_REL_AMD64_REL32_2 : 4,
+        IMAGE_REL_AMD64_REL32_3 : 4,
+        IMAGE_REL_AMD64_REL32_4 : 4,
+        IMAGE_REL_AMD64_REL32_5 : 4,
+        IMAGE_REL_AMD64_SECTION : 2,
+        IMAGE_REL_AMD64_SECREL : 4,
+        IMAGE_REL_AMD64_SECREL7 : 1,
+        IMAGE_REL_AMD64_TOKEN : 4,
+        IMAGE_REL_AMD64_SREL32 : 4,
+        IMAGE_REL_AMD64_SSPAN32 : 4,
+    },
+    0x14c : {
+        IMAGE_REL_I386_DIR16 : 2,
+        IMAGE_REL_I386_REL16 : 2,
+        IMAGE_REL_I386_DIR32 : 4,
+        IMAGE_REL_I386_DIR32NB : 4,
+        IMAGE_REL_I386_SEG12 : 2,
+        IMAGE_REL_I386_SECTION : 2,
+        IMAGE_REL_I386_SECREL : 4,
+        IMAGE_REL_I386_TOKEN : 4,
+        IMAGE_REL_I386_SECREL7 : 1,
+        IMAGE_REL_I386_REL32 : 4,
+    },
+    0xaa64 : {
+        IMAGE_REL_ARM64_ADDR32 : 4,
+        IMAGE_REL_ARM64_ADDR32NB : 4,
+        IMAGE_REL_ARM64_BRANCH26 : 4,
+        IMAGE_REL_ARM64_PAGEBASE_REL21 : 4,
+        IMAGE_REL_ARM64_REL21 : 4,
+        IMAGE_REL_ARM64_PAGEOFFSET_12A : 4,
+        IMAGE_REL_ARM64_PAGEOFFSET_12L : 4,
+        IMAGE_REL_ARM64_SECREL : 4,
+        IMAGE_REL_ARM64_SECREL_LOW12A : 4,
+        IMAGE_REL_ARM64_SECREL_HIGH12A : 4,
+        IMAGE_REL_ARM64_SECREL_LOW12L : 4,
+        IMAGE_REL_ARM64_TOKEN : 4,
+        IMAGE_REL_ARM64_SECTION : 2,
+        IMAGE_REL_ARM64_ADDR64 : 8,
+        IMAGE_REL_ARM64_BRANCH19 : 4,
+        IMAGE_REL_ARM64_BRANCH14 : 4,
+        IMAGE_REL_ARM64_REL32 : 4,
+    },
+}
+
+def coff_reloc_size(machine,reltype):
+    return COFF_RELOC_SIZES.get(machine,dict()).get(reltype,0)
+
+class CoffReloc(_RecordObject):
     keywords = ['name','vaddr','type']
+    __slots__ = keywords + ['size','symidx','symbol']
     headersize = 10
-    def __init__(self,data,dataoff,basesymoff,stroff,strend):
+    def __init__(self,data,dataoff,basesymoff,stroff,strend,strtab=None):
         if (dataoff + self.__class__.headersize) > len(data):
             raise Exception('[%d + %d] > [%d]'%(dataoff,self.__class__.headersize, len(data)))
-        self.__vaddr,symidx,self.__type = struct.unpack('<LLH', data[dataoff:(dataoff+self.__class__.headersize)])
-        symoff = (basesymoff + CoffSymtable.headersize * symidx)
+        self.vaddr,self.symidx,self.type = struct.unpack('<LLH', data[dataoff:(dataoff+self.__class__.headersize)])
+        symoff = (basesymoff + CoffSymtable.headersize * self.symidx)
         if (symoff + CoffSymtable.headersize) > len(data):
-            raise Exception('symidx [%d] outof size'%(symidx))
-        name = data[(symoff) : (symoff + 8)]
-        ni = 0
-        for b in name:
-            if sys.version[0] == '3':
-                if b == 0x0:
-                    break
-            else:
-                if ord(b) == 0x0:
-                    break
-            ni += 1
-        if ni > 0:
-            if sys.version[0] == '3':
-                nname = b''
-            else:
-                nname = ''
-            for b in name:
-                if sys.version[0] == '3':
-                    if b == 0x0 or b == 0x20:
-                        break
-                else:
-                    if ord(b) == 0x0 or ord(b) == 0x20:
-                        break
-                if sys.version[0] == '3':
-                    #logging.info('b [0x%x]'%(b))
-                    nname += b.to_bytes(1,'little')
-                else:
-                    nname += b
-            if sys.version[0] == '3':
-                self.__name = nname.decode('utf8')
-            else:
-                self.__name = str(nname)
+            raise Exception('symidx [%d] outof size'%(self.symidx))
+        if strtab is not None:
+            self.name = strtab.get_name(data[symoff:(symoff + 8)])
         else:
-            # this means we get from the stroff
-            nameoff = struct.unpack('<l',data[(symoff + 4):(symoff + 8)])[0]
-            nameoff += stroff
-            if sys.version[0] == '3':
-                nname = b''
-            else:
-                nname = ''
-            while nameoff < strend:
-                b = data[nameoff]
-                if sys.version[0] == '3':
-                    if b == 0x0:
-                        break
-                else:
-                    if ord(b) == 0:
-                        break
-                if sys.version[0] == '3':
-                    #logging.info('b [0x%x]'%(b))
-                    nname += b.to_bytes(1,'little')
-                else:
-                    nname += b
-                nameoff += 1
-            if sys.version[0] == '3':
-                self.__name = nname.decode('utf8')
-            else:
-                self.__name = str(nname)
+            self.name = coff_get_name(data,symoff,stroff,strend)
+        self.symbol = None
         self.size = 0
         return
 
+    @classmethod
+    def from_symbol(cls,vaddr,symidx,type,symbol):
+        # the symbol is already resolved by SymbolTable , so the name is not decoded again
+        self = cls.__new__(cls)
+        self.vaddr = vaddr
+        self.symidx = symidx
+        self.type = type
+        self.symbol = symbol
+        self.name = symbol.name
+        self.size = 0
+        return self
+
     def __str__(self):
         rets = 'CoffReloc(name[%s];vaddr[0x%x];type[0x%x];size[0x%x])'%(self.name,self.vaddr,self.type,self.size)
         return rets
 
+    def get_size(self):
+        return self.__class__.headersize
+
+
+class RelocTable(object):
+    # every relocation of every section decoded in bulk into parallel columns ,
+    # the sections follow each other and starts[i]:starts[i+1] are the ones of section i ,
+    # CoffReloc objects are only made when asked by get_reloc and not kept
+    recfmt = '<LLH'
+    columns = [('vaddrs','I'),('symidxs','I'),('types','H')]
+    def __init__(self,machine,symtab):
+        self.machine = machine
+        self.symtab = symtab
+        self.vaddrs = array.array('I')
+        self.symidxs = array.array('I')
+        self.types = array.array('H')
+        self.starts = array.array('I',[0])
+        self.__sizes = COFF_RELOC_SIZES.get(machine,dict())
+        return
+
+    @classmethod
+    def from_columns(cls,machine,symtab,starts,columns):
+        self = cls(machine,symtab)
+        self.starts = starts
+        for name, typecode in cls.columns:
+            setattr(self,name,columns[name])
+        return self
+
+    def add_section(self,data,offrel,numrels):
+        # append the relocations of the next section , one iter_unpack for all of them
+        relsize = CoffReloc.headersize
+        endrel = offrel + numrels * relsize
+        if endrel > len(data):
+            raise Exception('[%d + %d * %d] > [%d]'%(offrel,numrels,relsize, len(data)))
+        if numrels > 0:
+            vaddrs, symidxs, types = zip(*struct.iter_unpack(self.__class__.recfmt,data[offrel:endrel]))
+            maxidx = max(symidxs)
+            if maxidx >= self.symtab.symnums:
+                raise Exception('symidx [%d] outof size'%(maxidx))
+            self.vaddrs.extend(vaddrs)
+            self.symidxs.extend(symidxs)
+            self.types.extend(types)
+        self.starts.append(len(self.vaddrs))
+        return
+
+    def __len__(self):
+        return len(self.vaddrs)
+
+    def get_reloc(self,idx):
+        symidx = self.symidxs[idx]
+        rel = CoffReloc.from_symbol(self.vaddrs[idx],symidx,self.types[idx],self.symtab.get_symbol(symidx))
+        rel.size = self.__sizes.get(rel.type,0)
+        return rel
+
+    def get_section(self,seckey):
+        return RelocList(self,self.starts[seckey],self.starts[seckey + 1])
+
+
+class RelocList(object):
+    # lazy list of the relocations of one section in RelocTable
+    def __init__(self,table,start,end):
+        self.table = table
+        self.start = start
+        self.end = end
+        return
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self,i):
+        if isinstance(i,slice):
+            return [self.table.get_reloc(idx) for idx in range(self.start,self.end)[i]]
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError('reloc index [%d] out of range'%(i))
+        return self.table.get_reloc(self.start + i)
+
+    def __iter__(self):
+        get_reloc = self.table.get_reloc
+        for idx in range(self.start,self.end):
+            yield get_reloc(idx)
+        return
+
+    def __str__(self):
+        return str(list(self))
+
+    def __repr__(self):
+        return str(self)
+
+
+def coff_function_lines(symtab,symidx):
+    # (size,baseline) of function symbol symidx , size from its function aux record and baseline from
+    # the aux record of the .bf after it , 0 when they are not there
+    size = 0
+    baseline = 0
+    numaux = symtab.numauxs[symidx]
+    if numaux > 0 and (symidx + 1) < symtab.symnums:
+        tag, size = struct.unpack_from('<LL',symtab.get_record(symidx + 1),0)
+    bfidx = symidx + 1 + numaux
+    if (bfidx + 1) < symtab.symnums and symtab.storageclses[bfidx] == IMAGE_SYM_CLASS_FUNCTION and \
+            symtab.numauxs[bfidx] > 0 and symtab.get_name(bfidx) == '.bf':
+        baseline = struct.unpack_from('<H',symtab.get_record(bfidx + 1),4)[0]
+    return size, baseline
+
+def coff_file_symbols(symtab):
+    # ([symidx],[name]) of the .file symbols , the name is in the aux records after them
+    idxs = []
+    names = []
+    storageclses = symtab.storageclses
+    numauxs = symtab.numauxs
+    i = 0
+    while i < symtab.symnums:
+        numaux = numauxs[i]
+        if storageclses[i] == IMAGE_SYM_CLASS_FILE:
+            raw = b''.join([symtab.get_record(i + 1 + j) for j in range(min(numaux,symtab.symnums - i - 1))])
+            idxs.append(i)
+            names.append(raw.split(b'\0',1)[0].decode('utf8'))
+        i += 1 + numaux
+    return idxs, names
+
+
+class CoffLine(_RecordObject):
+    # what Coff.line_for (CodeView) and Coff.lineno_for (classic line numbers) give , offset is where the
+    # line starts in the section , function is the name of the function symbol and fname the source file
+    keywords = ['fname','line','offset','function']
+    __slots__ = keywords
+    def __init__(self,fname,line,offset,function):
+        self.fname = fname
+        self.line = line
+        self.offset = offset
+        self.function = function
+        return
+
+    def __str__(self):
+        return 'CoffLine(fname[%s];line[%d];offset[0x%x];function[%s])'%(self.fname,self.line,self.offset,self.function)
+
+
+class LineTable(object):
+    # the classic line numbers of one section , numlnno records of [addr,line] at lineentries ,
+    # decoded in one pass into columns sorted by offset
+    #   a record of line 0 starts a function , addr is the index of its symbol
+    #   the others have the address of the line , the lines are relative to the .bf of the function ,
+    #   so line + baseline - 1 is the source line as the linkers give it
+    # functions is [(symidx,start,size,baseline)] and funcs the index in it of every line , -1 for none
+    recfmt = '<LH'
+    recsize = 6
+    def __init__(self,data,offlnno,numlnno,symtab,vaddr=0):
+        recsize = self.__class__.recsize
+        end = offlnno + numlnno * recsize
+        if end > len(data):
+            raise Exception('lineno [0x%x] + [%d] * [%d] > [0x%x]'%(offlnno,numlnno,recsize,len(data)))
+        self.symtab = symtab
+        self.functions = []
+        offsets = []
+        lines = []
+        funcs = []
+        funcidx = -1
+        baseline = 1
+        for addr, line in struct.iter_unpack(self.__class__.recfmt,data[offlnno:end]):
+            if line == 0:
+                if addr >= symtab.symnums:
+                    raise Exception('lineno symidx [%d] outof size'%(addr))
+                start = symtab.values[addr]
+                size, baseline = coff_function_lines(symtab,addr)
+                self.functions.append((addr,start,size,baseline))
+                funcidx = len(self.functions) - 1
+                if baseline == 0:
+                    # no .bf , the lines are taken as they are
+                    baseline = 1
+                    continue
+                offsets.append(start)
+                lines.append(baseline)
+            else:
+                offsets.append(addr - vaddr)
+                lines.append(line + baseline - 1)
+            funcs.append(funcidx)
+        if any([offsets[i] > offsets[i + 1] for i in range(len(offsets) - 1)]):
+            order = sorted(range(len(offsets)),key=offsets.__getitem__)
+            offsets = [offsets[i] for i in order]
+            lines = [lines[i] for i in order]
+            funcs = [funcs[i] for i in order]
+        self.offsets = array.array('l',offsets)
+        self.lines = array.array('I',lines)
+        self.funcs = array.array('l',funcs)
+        return
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def find(self,offset):
+        # index of the line that holds offset , -1 when before the first one or after the end of its function
+        pos = bisect.bisect_right(self.offsets,offset) - 1
+        if pos < 0:
+            return -1
+        funcidx = self.funcs[pos]
+        if funcidx >= 0:
+            symidx, start, size, baseline = self.functions[funcidx]
+            if size > 0 and offset >= (start + size):
+                return -1
+        return pos
+
+    def get_symidx(self,pos):
+        funcidx = self.funcs[pos]
+        if funcidx < 0:
+            return -1
+        return self.functions[funcidx][0]
+
+
+# phases timed by Coff.stats , sizes is the symbol size pass , strings is the decoding of
+# the names in the string table , which runs inside the other phases and is only timed with COFF_PROFILE
+COFF_STAT_PHASES = ('read','header','sections','symbols','sizes','strings','relocs')
+# symbols are all the records and auxes the aux records among them , skipped the symbols left out
+# of symtables by the sectnum / numaux filter , strhits and strmisses the names of the string table
+# found decoded or decoded now , relocs the relocations kept and relskipped the ones left out by type
+COFF_STAT_COUNTERS = ('files','cachehits','symbols','auxes','skipped','strhits','strmisses','relocs','relskipped')
+
+class CoffStats(object):
+    # wall time and bytes touched by every phase and the counters of one Coff ,
+    # add merges the stats of another file so a corpus run can sum them
+    def __init__(self):
+        self.times = dict([(phase,0.0) for phase in COFF_STAT_PHASES])
+        self.sizes = dict([(phase,0) for phase in COFF_STAT_PHASES])
+        self.counters = dict([(name,0) for name in COFF_STAT_COUNTERS])
+        return
+
+    def add_phase(self,phase,seconds,size=0):
+        self.times[phase] += seconds
+        self.sizes[phase] += size
+        return
+
+    def add(self,other):
+        for phase in COFF_STAT_PHASES:
+            self.times[phase] += other.times[phase]
+            self.sizes[phase] += other.sizes[phase]
+        for name in COFF_STAT_COUNTERS:
+            self.counters[name] += other.counters[name]
+        return self
+
+    def copy(self):
+        return CoffStats().add(self)
+
+    def to_dict(self):
+        return dict(times=dict(self.times),sizes=dict(self.sizes),counters=dict(self.counters))
+
+    def format(self,title=None):
+        # one line for every phase with its MB/s , then the counters
+        rets = ''
+        if title is not None:
+            rets += '%s\n'%(title)
+        rets += '    %-10s %12s %14s %10s\n'%('phase','seconds','bytes','MB/s')
+        for phase in COFF_STAT_PHASES:
+            seconds = self.times[phase]
+            mbps = 0.0
+            if seconds > 0:
+                mbps = self.sizes[phase] / seconds / (1 << 20)
+            rets += '    %-10s %12.6f %14d %10.1f\n'%(phase,seconds,self.sizes[phase],mbps)
+        rets += '    %s\n'%(' '.join(['%s[%d]'%(name,self.counters[name]) for name in COFF_STAT_COUNTERS]))
+        return rets
+
+    def __str__(self):
+        return 'CoffStats(%s;%s)'%(';'.join(['%s[%.6f]'%(phase,self.times[phase]) for phase in COFF_STAT_PHASES]),\
+            ';'.join(['%s[%d]'%(name,self.counters[name]) for name in COFF_STAT_COUNTERS]))
+
     def __repr__(self):
         return str(self)
 
-    def get_size(self):
-        return self.__class__.headersize
+def coff_stats_merge(statses):
+    # the sum of many CoffStats , such as the summary.stats of coff.scan , None ones are left out
+    total = CoffStats()
+    for stats in statses:
+        if stats is not None:
+            total.add(stats)
+    return total
+
+def _coff_stats_strings(stats,strtable):
+    # stats with the string table counters of now
+    stats = stats.copy()
+    if strtable is not None:
+        stats.counters['strhits'] += strtable.hits
+        stats.counters['strmisses'] += strtable.misses
+        stats.add_phase('strings',strtable.seconds,strtable.decoded)
+    return stats
+
+# process total of COFF_PROFILE=2 , written at exit
+_COFF_PROFILE_TOTAL = None
+
+def _coff_profile_exit(total):
+    sys.stderr.write(total.format('coff total'))
+    return
+
+def _coff_profile_start():
+    # made before the finalizer of the first Coff , the finalizers left at exit run from
+    # the last made , so the total is written after the stats of every Coff
+    global _COFF_PROFILE_TOTAL
+    if _COFF_PROFILE_TOTAL is None:
+        _COFF_PROFILE_TOTAL = CoffStats()
+        weakref.finalize(_COFF_PROFILE_TOTAL,_coff_profile_exit,_COFF_PROFILE_TOTAL)
+    return
+
+class _CoffProfile(object):
+    # what COFF_PROFILE writes of one Coff , it holds no reference to the Coff , so weakref.finalize
+    # writes it once , on close , when the Coff is collected or at exit
+    __slots__ = ['fname','stats','strtable','total']
+    def __init__(self,fname,stats,total):
+        self.fname = fname
+        self.stats = stats
+        self.strtable = None
+        self.total = total
+        return
 
+def _coff_profile_write(profile):
+    stats = _coff_stats_strings(profile.stats,profile.strtable)
+    sys.stderr.write(stats.format('coff [%s]'%(profile.fname)))
+    if profile.total:
+        _COFF_PROFILE_TOTAL.add(stats)
+    return
 
+# sections of this size and more are hashed in the thread pool of Coff.section_hashes
+COFF_HASH_THREAD_SIZE = (1 << 16)
+
+# the parts Coff can parse , and coff_summary can give
+COFF_PARTS = ('header','sections','symbols','relocs')
 
 class Coff(_LoggerObject):
-    keywords = ['fname','header','opthdr','sections','relocs','symtables']
+    keywords = ['fname','header','opthdr','sections','relocs','symtables','symboltable','strtable','reloctable','allrelocs','stats']
     def __read_binary(self,infile=None):
         fin = sys.stdin
         if infile is not None:
@@ -689,114 +1301,653 @@ class Coff(_LoggerObject):
         fin = None
         return data
 
+    def __map_binary(self,infile):
+        return coff_map_file(infile)
+
+    def __read_head(self,infile,withsects):
+        # only the headers (and the section table) , the rest of the file is read when asked
+        with open(infile,'rb') as fin:
+            data = fin.read(CoffBigHeader.headersize)
+            hdr = coff_header(data)
+            size = hdr.get_size()
+            if hdr.optsize > 0:
+                size += max(hdr.optsize,CoffOptHeader.headersize)
+            if withsects:
+                size += hdr.numsects * CoffSectionHeader.headersize
+            if size > len(data):
+                data += fin.read(size - len(data))
+        return data
+
     def __reset(self):
         self.__fname = None
         self.__header = None
         self.__opthdr = None
-        self.__sections = []
-        self.__symtables = []
-        self.__relocs = dict()
+        self.__sections = None
+        self.__symtables = None
+        self.__symboltable = None
+        self.__symindex = dict()
+        self.__sectdefs = None
+        self.__lineindex = None
+        self.__linetables = dict()
+        self.__files = None
+        self.__strtable = None
+        self.__relocs = None
+        self.__reloctable = None
+        self.__allrelocs = False
+        self.__mmap = None
+        self.__data = None
+        self.__view = None
+        self.__usemmap = False
+        self.__partial = False
+        self.__sectoff = 0
         self.__stroffset = -1
         self.__symoffset = -1
         self.__strsize = -1
+        self.__hdrsize = 0
+        self.__stats = CoffStats()
+        self.__profile = 0
+        self.__profiled = None
         return
 
     def __parse_symtable(self,data):
-        symoff = self.__symoffset
+        stime = time.perf_counter()
+        symtab = SymbolTable(data,self.__symoffset,self.__header.symnums,self.__strtable,self.__header.symfmt)
+        self.__symboltable = symtab
+        values = symtab.values
+        sectnums = symtab.sectnums
+        numauxs = symtab.numauxs
+        storageclses = symtab.storageclses
+        sections = self.__sections
+        numsects = len(sections)
+        loginfo = self.is_enabled(logging.INFO)
+        tables = dict()
+        skipped = 0
         i = 0
-        self.__symtables = dict()
-        while i < self.__header.symnums:
-            sym = CoffSymtable(data,symoff, self.__stroffset, (self.__stroffset + self.__strsize))
-            i += 1
-            i += sym.numaux
-            symoff += sym.get_size()
-            if sym.sectnum < 1 or sym.sectnum > len(self.sections):
-                self.info('%s'%(sym))
+        while i < symtab.symnums:
+            sectnum = sectnums[i]
+            numaux = numauxs[i]
+            if sectnum < 1 or sectnum > numsects or numaux != 0:
+                if loginfo:
+                    self.info('%s'%(symtab.get_symbol(i)))
+                skipped += 1
+                i += 1 + numaux
                 continue
-            if sym.numaux != 0:
-                self.info('%s'%(sym))
-                continue            
-            section = self.sections[(sym.sectnum-1)]
-            seckey = sym.sectnum - 1
-            if seckey not in self.__symtables.keys():
-                self.__symtables[seckey] = []
-            self.__symtables[seckey].append(sym)
-        for seckey in self.__symtables.keys():
-            valuetble = self.__symtables[seckey]
-            valuetble = sorted(valuetble, key = lambda sym : sym.value)
-            idx = 0
-            for sym in valuetble:
-                nidx = idx + 1
-                while nidx < len(valuetble):
-                    if valuetble[idx].storagecls != IMAGE_SYM_CLASS_LABEL and valuetble[nidx].storagecls != IMAGE_SYM_CLASS_LABEL:
-                        sym.size = valuetble[nidx].value - valuetble[idx].value
-                        break
-                    elif valuetble[idx].storagecls == IMAGE_SYM_CLASS_LABEL:
-                        sym.size = valuetble[nidx].value - valuetble[idx].value
-                        break
+            seckey = sectnum - 1
+            idxs = tables.get(seckey,None)
+            if idxs is None:
+                idxs = []
+                tables[seckey] = idxs
+            idxs.append(i)
+            i += 1 + numaux
+        kept = sum([len(idxs) for idxs in tables.values()])
+        counters = self.__stats.counters
+        counters['symbols'] += symtab.symnums
+        counters['auxes'] += symtab.symnums - kept - skipped
+        counters['skipped'] += skipped
+        sizetime = time.perf_counter()
+        self.__stats.add_phase('symbols',sizetime - stime,symtab.symnums * symtab.recsize)
+        self.__symtables = dict()
+        sizes = symtab.sizes
+        for seckey in tables.keys():
+            valuetble = sorted(tables[seckey], key = values.__getitem__)
+            secsize = sections[seckey].size
+            # walk from the end , a label runs to the next symbol and any other
+            # symbol runs to the next symbol which is not a label
+            nextvalue = None
+            idx = len(valuetble) - 1
+            while idx >= 0:
+                cur = valuetble[idx]
+                if storageclses[cur] == IMAGE_SYM_CLASS_LABEL:
+                    if (idx + 1) < len(valuetble):
+                        sizes[cur] = values[valuetble[idx + 1]] - values[cur]
+                    else:
+                        sizes[cur] = secsize - values[cur]
+                else:
+                    if nextvalue is None:
+                        sizes[cur] = secsize - values[cur]
                     else:
-                        self.info('[%s][%d]%s [%d]%s'%(seckey,idx,valuetble[idx], nidx,valuetble[nidx]))
-                    nidx += 1
-                if nidx >= len(valuetble):                    
-                    section = self.sections[seckey]
-                    sym.size = section.size - valuetble[idx].value
-                idx += 1
-            self.__symtables[seckey] = valuetble
+                        sizes[cur] = nextvalue - values[cur]
+                    nextvalue = values[cur]
+                idx -= 1
+            self.__symtables[seckey] = SymbolList(symtab,valuetble)
+        self.__stats.add_phase('sizes',time.perf_counter() - sizetime,kept * symtab.sizes.itemsize)
         return
 
+    def __get_relrange(self,data,section):
+        # (offset,count) of all the relocations of section
+        offrel = section.offrel
+        numrels = section.numrels
+        if offrel == 0:
+            numrels = 0
+        elif (section.flags & IMAGE_SCN_LNK_NRELOC_OVFL) != 0 and numrels == 0xffff:
+            # the count is in the vaddr of the first relocation , which counts itself
+            if (offrel + CoffReloc.headersize) > len(data):
+                raise Exception('overflow reloc [0x%x] > [0x%x]'%(offrel,len(data)))
+            numrels = struct.unpack('<L',data[offrel:(offrel + 4)])[0] - 1
+            offrel += CoffReloc.headersize
+        return offrel, numrels
+
+    def __parse_allreloc(self,data):
+        # every relocation of every section , in the columns of RelocTable
+        table = RelocTable(self.__header.id,self.__symboltable)
+        self.__relocs = dict()
+        seckey = 0
+        for section in self.__sections:
+            offrel, numrels = self.__get_relrange(data,section)
+            table.add_section(data,offrel,numrels)
+            self.__relocs[seckey] = table.get_section(seckey)
+            seckey += 1
+        self.__reloctable = table
+        self.__stats.counters['relocs'] += len(table)
+        return len(table) * CoffReloc.headersize
+
     def __parse_reloc(self,data):
-        basesymoff = self.__symoffset
-        stroff = self.__stroffset
-        strend = (self.__stroffset + self.__strsize)
+        if self.__allrelocs:
+            return self.__parse_allreloc(data)
+        symtab = self.__symboltable
+        relsize = CoffReloc.headersize
         self.__relocs = dict()
+        numread = 0
         idx = 0
         for section in self.sections:
             idx += 1
             seckey = (idx - 1)
             self.__relocs[seckey] = []
             if section.offrel != 0 and (section.flags & IMAGE_SCN_CNT_CODE) != 0 and (section.flags & IMAGE_SCN_LNK_COMDAT) == 0:
-                curreloff = section.offrel
-                for i in range(section.numrels):
-                    rel = CoffReloc(data,curreloff,basesymoff, stroff,strend)
+                endrel = section.offrel + section.numrels * relsize
+                if endrel > len(data):
+                    raise Exception('[%d + %d * %d] > [%d]'%(section.offrel,section.numrels,relsize, len(data)))
+                relocs = self.__relocs[seckey]
+                numread += section.numrels
+                for vaddr, symidx, reltype in struct.iter_unpack('<LLH',data[section.offrel:endrel]):
+                    if symidx >= symtab.symnums:
+                        raise Exception('symidx [%d] outof size'%(symidx))
                     if self.__header.id == 0x8664:
-                        if rel.type >= IMAGE_REL_AMD64_REL32  and rel.type <= IMAGE_REL_AMD64_REL32_5:
-                            rel.size = 4
-                            self.__relocs[seckey].append(rel)
+                        if reltype < IMAGE_REL_AMD64_REL32  or reltype > IMAGE_REL_AMD64_REL32_5:
+                            continue
                     elif self.__header.id == 0x14c:
-                        if rel.type == IMAGE_REL_I386_DIR32  or rel.type == IMAGE_REL_I386_DIR32NB  or rel.type == IMAGE_REL_I386_REL32 :
-                            self.__relocs[seckey].append(rel)
-                            rel.size = 4
-                    curreloff += rel.get_size()
-        return
-
-
-    def __parse_coff(self,data):
-        self.__header = CoffHeader(data)
+                        if reltype != IMAGE_REL_I386_DIR32  and reltype != IMAGE_REL_I386_DIR32NB  and reltype != IMAGE_REL_I386_REL32 :
+                            continue
+                    else:
+                        continue
+                    rel = CoffReloc.from_symbol(vaddr,symidx,reltype,symtab.get_symbol(symidx))
+                    rel.size = 4
+                    relocs.append(rel)
+        numkept = sum([len(relocs) for relocs in self.__relocs.values()])
+        self.__stats.counters['relocs'] += numkept
+        self.__stats.counters['relskipped'] += numread - numkept
+        return numread * relsize
+
+
+    def __parse_header(self,view):
+        stime = time.perf_counter()
+        self.__header = coff_header(view)
         cursize = self.__header.get_size()
         self.__opthdr = None
         if self.__header.optsize > 0:
-            self.__opthdr = CoffOptHeader(data[cursize:])
+            self.__opthdr = CoffOptHeader(view[cursize:])
             cursize += self.__opthdr.get_size()
-        # now to get the numsections
-        for i in range(self.__header.numsects):
-            section = CoffSectionHeader(data[cursize:])
-            self.__sections.append(section)
-            cursize += section.get_size()
+        self.__sectoff = cursize
         self.__symoffset = self.__header.symtab
-        self.__stroffset = self.__header.symtab + (self.__header.symnums * CoffSymtable.headersize)
-        self.__strsize = struct.unpack('<I',data[self.__stroffset:(self.__stroffset+4)])[0]
-        self.__parse_symtable(data)
-        self.__parse_reloc(data)
+        self.__stroffset = self.__header.symtab + (self.__header.symnums * self.__header.symsize)
+        self.__stats.add_phase('header',time.perf_counter() - stime,cursize)
+        return cursize
+
+    def __get_sectend(self):
+        return self.__sectoff + self.__header.numsects * CoffSectionHeader.headersize
+
+    def __parse_sections(self,view):
+        # the whole section table in one pass
+        stime = time.perf_counter()
+        endsect = self.__get_sectend()
+        if endsect > len(view):
+            raise Exception('sections [0x%x] + [%d] * [%d] > [0x%x]'%(self.__sectoff,self.__header.numsects,CoffSectionHeader.headersize,len(view)))
+        self.__sections = [CoffSectionHeader.from_fields(fields) for fields in struct.iter_unpack(CoffSectionHeader.recfmt,view[self.__sectoff:endsect])]
+        self.__hdrsize = endsect
+        self.__stats.add_phase('sections',time.perf_counter() - stime,endsect - self.__sectoff)
+        return endsect
+
+    def __parse_symbols(self,view):
+        self.__strsize = struct.unpack('<I',view[self.__stroffset:(self.__stroffset+4)])[0]
+        self.__strtable = StringTable(view,self.__stroffset,self.__strsize)
+        self.__strtable.timed = (self.__profile > 0)
+        if self.__profiled is not None:
+            self.__profiled.strtable = self.__strtable
+        self.__parse_symtable(view)
         return
 
-    def __init__(self,fname=None):
+    def __get_view(self,size=None):
+        # slices of the memoryview share the buffer, so no section copies the rest of the file
+        # size is the bytes needed from the start , None for the whole file
+        if self.__data is None:
+            raise Exception('[%s] already closed'%(self.__fname))
+        if self.__partial and (size is None or size > len(self.__data)):
+            # only the head was read , get the whole file now
+            stime = time.perf_counter()
+            if self.__usemmap:
+                self.__mmap = self.__map_binary(self.__fname)
+                self.__data = memoryview(self.__mmap)
+            else:
+                self.__data = self.__read_binary(self.__fname)
+            self.__stats.add_phase('read',time.perf_counter() - stime,len(self.__data))
+            self.__view = None
+            self.__partial = False
+        if self.__view is None:
+            self.__view = self.__data
+            if not isinstance(self.__view,memoryview):
+                self.__view = memoryview(self.__data)
+        return self.__view
+
+    def __load_sections(self):
+        if self.__sections is None:
+            self.__parse_sections(self.__get_view(self.__get_sectend()))
+        return self.__sections
+
+    def __load_symbols(self):
+        if self.__symboltable is None:
+            self.__load_sections()
+            self.__parse_symbols(self.__get_view())
+        return self.__symboltable
+
+    def __load_relocs(self):
+        if self.__relocs is None:
+            self.__load_symbols()
+            view = self.__get_view()
+            stime = time.perf_counter()
+            size = self.__parse_reloc(view)
+            self.__stats.add_phase('relocs',time.perf_counter() - stime,size)
+        return self.__relocs
+
+    @property
+    def sections(self):
+        return self.__load_sections()
+
+    @property
+    def symboltable(self):
+        return self.__load_symbols()
+
+    @property
+    def strtable(self):
+        self.__load_symbols()
+        return self.__strtable
+
+    @property
+    def symtables(self):
+        self.__load_symbols()
+        return self.__symtables
+
+    @property
+    def relocs(self):
+        return self.__load_relocs()
+
+    @property
+    def stats(self):
+        # CoffStats of the parsing done so far , with the string table counters of now
+        return _coff_stats_strings(self.__stats,self.__strtable)
+
+    @property
+    def reloctable(self):
+        # RelocTable of allrelocs mode , None in the default mode
+        self.__load_relocs()
+        return self.__reloctable
+
+    def __get_state(self):
+        # everything parsed , as bytes , so the cache can build this Coff again without the file
+        state = dict()
+        state['headers'] = bytes(self.__data[:self.__hdrsize])
+        state['offsets'] = array.array('q',[self.__symoffset,self.__stroffset,self.__strsize]).tobytes()
+        state['strtable'] = self.__strtable.get_bytes()
+        state['rawnames'] = self.__symboltable.rawnames
+        for name, typecode in SymbolTable.columns:
+            state[name] = getattr(self.__symboltable,name).tobytes()
+        groups = array.array('I')
+        for seckey in self.__symtables.keys():
+            idxs = self.__symtables[seckey].idxs
+            groups.append(seckey)
+            groups.append(len(idxs))
+            groups.extend(idxs)
+        state['groups'] = groups.tobytes()
+        if self.__allrelocs:
+            # the relocations of allrelocs mode have their own names , so one mode never reads the other
+            state['allrelocstarts'] = self.__reloctable.starts.tobytes()
+            for name, typecode in RelocTable.columns:
+                state['allrelocs' + name] = getattr(self.__reloctable,name).tobytes()
+            return state
+        # the code relocations kept are columns as RelocTable has them , so a load from the cache
+        # makes no CoffReloc until they are asked
+        starts = array.array('I',[0])
+        vaddrs = array.array('I')
+        symidxs = array.array('I')
+        types = array.array('H')
+        for seckey in range(len(self.__sections)):
+            for rel in self.__relocs.get(seckey,[]):
+                vaddrs.append(rel.vaddr)
+                symidxs.append(rel.symidx)
+                types.append(rel.type)
+            starts.append(len(vaddrs))
+        state['relocstarts'] = starts.tobytes()
+        state['relocsvaddrs'] = vaddrs.tobytes()
+        state['relocssymidxs'] = symidxs.tobytes()
+        state['relocstypes'] = types.tobytes()
+        return state
+
+    def __set_state(self,state):
+        view = memoryview(state['headers'])
+        self.__parse_header(view)
+        self.__parse_sections(view)
+        self.__symoffset, self.__stroffset, self.__strsize = coff_array('q',state['offsets'])
+        strdata = state['strtable']
+        self.__strtable = StringTable(strdata,0,len(strdata))
+        if self.__profiled is not None:
+            self.__profiled.strtable = self.__strtable
+        columns = dict()
+        for name, typecode in SymbolTable.columns:
+            columns[name] = coff_array(typecode,state[name])
+        # a bytes copy , get_record packs slices of it with struct and the entry gives a memoryview
+        symtab = SymbolTable.from_columns(self.__strtable,bytes(state['rawnames']),columns,self.__header.symfmt)
+        self.__symboltable = symtab
+        self.__symtables = dict()
+        groups = coff_array('I',state['groups'])
+        i = 0
+        while i < len(groups):
+            seckey, num = groups[i], groups[i + 1]
+            self.__symtables[seckey] = SymbolList(symtab,groups[(i + 2):(i + 2 + num)])
+            i += 2 + num
+        # the relocations of allrelocs mode have their own names , so one mode never reads the other
+        prefix, startsname = 'relocs', 'relocstarts'
+        if self.__allrelocs:
+            prefix, startsname = 'allrelocs', 'allrelocstarts'
+        if startsname not in state.keys():
+            return
+        # both modes are restored as RelocList over the columns , the CoffReloc are made when asked
+        columns = dict()
+        for name, typecode in RelocTable.columns:
+            columns[name] = coff_array(typecode,state[prefix + name])
+        table = RelocTable.from_columns(self.__header.id,symtab,coff_array('I',state[startsname]),columns)
+        if self.__allrelocs:
+            self.__reloctable = table
+        self.__relocs = dict()
+        for seckey in range(len(self.__sections)):
+            self.__relocs[seckey] = table.get_section(seckey)
+        return
+
+    def __init__(self,fname=None,mmap=False,data=None,cache=None,parts=None,allrelocs=False):
+        # parts are the ones of COFF_PARTS parsed here , the others are parsed
+        # on the first use of sections , symtables , symboltable , strtable or relocs
+        # allrelocs=True keeps every relocation of every section instead of the
+        # code relocations used for the call graph , see RelocTable
         super(Coff,self).__init__()
         self.__reset()
         self.__fname = fname
-        data = self.__read_binary(fname)
-        self.__parse_coff(data)
+        self.__allrelocs = allrelocs
+        self.__profile = _get_profile()
+        self.__stats.counters['files'] = 1
+        if self.__profile > 0:
+            # the stats are written from the ones kept by the profile , whether close is called or not
+            if self.__profile > 1:
+                _coff_profile_start()
+            self.__profiled = _CoffProfile(fname,self.__stats,self.__profile > 1)
+            self.__profiler = weakref.finalize(self,_coff_profile_write,self.__profiled)
+        if parts is None:
+            parts = COFF_PARTS
+        for part in parts:
+            if part not in COFF_PARTS:
+                raise Exception('unknown part [%s]'%(part))
+        if cache is not None and (fname is None or data is not None):
+            cache = None
+        if cache is not None and 'symbols' not in parts and 'relocs' not in parts:
+            # reading the head is cheaper than the cache entry
+            cache = None
+        if cache is not None:
+            stime = time.perf_counter()
+            state = cache.get(fname)
+            if state is not None:
+                self.__stats.add_phase('read',time.perf_counter() - stime)
+                self.__stats.counters['cachehits'] = 1
+                self.__set_state(state)
+                # relocations of the other mode are not in the entry , they are read from the file when asked
+                self.__usemmap = mmap
+                self.__data = b''
+                self.__partial = True
+                return
+        self.__usemmap = mmap
+        stime = time.perf_counter()
+        if data is not None:
+            # already in memory , such as a member of CoffArchive
+            self.__data = data
+        elif mmap and fname is not None:
+            # the mapping stays open until close , the symbol names are decoded from it on demand
+            self.__mmap = self.__map_binary(fname)
+            self.__data = memoryview(self.__mmap)
+        elif fname is not None and 'symbols' not in parts and 'relocs' not in parts:
+            self.__data = self.__read_head(fname,'sections' in parts)
+            self.__partial = True
+        else:
+            self.__data = self.__read_binary(fname)
+        if data is None:
+            self.__stats.add_phase('read',time.perf_counter() - stime,len(self.__data))
+        self.__parse_header(self.__get_view(CoffBigHeader.headersize))
+        if 'sections' in parts:
+            self.__load_sections()
+        if 'symbols' in parts:
+            self.__load_symbols()
+        if 'relocs' in parts:
+            self.__load_relocs()
+        if cache is not None and len([part for part in COFF_PARTS if part not in parts]) == 0:
+            cache.put(fname,self.__get_state())
         return
 
+    def as_numpy(self):
+        # numpy structured arrays over the file buffer , see coff.npview.CoffArrays ,
+        # numpy is only needed by this call
+        from . import npview
+        sections = self.__load_sections()
+        view = self.__get_view()
+        if self.__strsize < 0:
+            self.__strsize = struct.unpack('<I',view[self.__stroffset:(self.__stroffset+4)])[0]
+        relranges = dict()
+        seckey = 0
+        for section in sections:
+            offrel, numrels = self.__get_relrange(view,section)
+            if numrels > 0:
+                relranges[seckey] = (offrel,numrels)
+            seckey += 1
+        return npview.CoffArrays(view,self.__symoffset,self.__header.symnums,self.__header.symsize,\
+            self.__sectoff,self.__header.numsects,self.__stroffset,self.__strsize,relranges)
+
+    def section_data(self,seckey):
+        # raw data of section seckey as a slice of the file buffer , nothing is copied ,
+        # empty for the sections without data such as .bss
+        sections = self.__load_sections()
+        if seckey < 0 or seckey >= len(sections):
+            raise Exception('[%s] no section [%d]'%(self.__fname,seckey))
+        section = sections[seckey]
+        view = self.__get_view()
+        if section.offdata == 0 or section.size <= 0 or (section.flags & IMAGE_SCN_CNT_UNINITIALIZED_DATA) != 0:
+            return view[0:0]
+        end = section.offdata + section.size
+        if end > len(view):
+            raise Exception('[%s] section [%d] data [0x%x] + [0x%x] > [0x%x]'%(self.__fname,seckey,section.offdata,section.size,len(view)))
+        return view[section.offdata:end]
+
+    def section_relocs(self,seckey):
+        # [(vaddr,symidx,type)] of every relocation of section seckey , read from the file buffer ,
+        # whatever allrelocs is
+        sections = self.__load_sections()
+        if seckey < 0 or seckey >= len(sections):
+            raise Exception('[%s] no section [%d]'%(self.__fname,seckey))
+        view = self.__get_view()
+        offrel, numrels = self.__get_relrange(view,sections[seckey])
+        endrel = offrel + numrels * CoffReloc.headersize
+        if endrel > len(view):
+            raise Exception('[%d + %d * %d] > [%d]'%(offrel,numrels,CoffReloc.headersize,len(view)))
+        return list(struct.iter_unpack(RelocTable.recfmt,view[offrel:endrel]))
+
+    def line_for(self,seckey,offset):
+        # CoffLine (source file , line) of the code at offset of section seckey from the line tables
+        # of .debug$S , None when no line table holds it , see coff.codeview.CvLineIndex
+        if self.__lineindex is None:
+            from . import codeview
+            self.__lineindex = codeview.CvLineIndex(self)
+        return self.__lineindex.line_for(seckey,offset)
+
+    def get_linetable(self,seckey):
+        # LineTable of the classic line numbers of section seckey , made on the first call ,
+        # None when the section has none
+        if seckey not in self.__linetables.keys():
+            sections = self.__load_sections()
+            if seckey < 0 or seckey >= len(sections):
+                raise Exception('[%s] no section [%d]'%(self.__fname,seckey))
+            section = sections[seckey]
+            table = None
+            if section.lineentries != 0 and section.numlnno > 0:
+                symtab = self.__load_symbols()
+                table = LineTable(self.__get_view(),section.lineentries,section.numlnno,symtab,section.vaddr)
+            self.__linetables[seckey] = table
+        return self.__linetables[seckey]
+
+    def lineno_for(self,seckey,offset):
+        # CoffLine of the code at offset of section seckey from the classic line numbers ,
+        # None when no line holds it , line_for reads the CodeView ones
+        table = self.get_linetable(seckey)
+        if table is None:
+            return None
+        pos = table.find(offset)
+        if pos < 0:
+            return None
+        symtab = self.__symboltable
+        symidx = table.get_symidx(pos)
+        function = None
+        fname = None
+        if symidx >= 0:
+            function = symtab.get_name(symidx)
+            if self.__files is None:
+                self.__files = coff_file_symbols(symtab)
+            idxs, names = self.__files
+            filepos = bisect.bisect_right(idxs,symidx) - 1
+            if filepos >= 0:
+                fname = names[filepos]
+        return CoffLine(fname,table.lines[pos],table.offsets[pos],function)
+
+    def section_hashes(self,algo='sha256',workers=None,seckeys=None):
+        # seckey to the hex digest of the section data , for every section or the ones of seckeys ,
+        # hashlib drops the GIL on big buffers , so the sections of COFF_HASH_THREAD_SIZE and more
+        # go to a pool of workers threads while the small ones are hashed here
+        if seckeys is None:
+            seckeys = range(len(self.__load_sections()))
+        if workers is None:
+            workers = os.cpu_count() or 1
+        datas = [(seckey,self.section_data(seckey)) for seckey in seckeys]
+        rets = dict()
+        bigs = [(seckey,data) for seckey, data in datas if len(data) >= COFF_HASH_THREAD_SIZE]
+        if workers <= 1 or len(bigs) < 2:
+            for seckey, data in datas:
+                rets[seckey] = hashlib.new(algo,data).hexdigest()
+            return rets
+        import concurrent.futures
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [(seckey,executor.submit(hashlib.new,algo,data)) for seckey, data in bigs]
+            for seckey, data in datas:
+                if len(data) < COFF_HASH_THREAD_SIZE:
+                    rets[seckey] = hashlib.new(algo,data).hexdigest()
+            for seckey, future in futures:
+                rets[seckey] = future.result().hexdigest()
+        # in the order of seckeys
+        return dict([(seckey,rets[seckey]) for seckey, data in datas])
+
+    def close(self):
+        if self.__profiled is not None:
+            # once , a second close or the collection of the Coff do not write it again
+            self.__profiler()
+        # it keeps slices of the buffer
+        self.__lineindex = None
+        if isinstance(self.__data,memoryview):
+            try:
+                self.__data.release()
+            except BufferError:
+                # still exported , such as the arrays of as_numpy , unmapped when they are gone
+                pass
+        if self.__mmap is not None:
+            try:
+                self.__mmap.close()
+            except BufferError:
+                pass
+            self.__mmap = None
+        self.__data = None
+        self.__view = None
+        return
+
+    def __get_symindex(self,seckey,labels=True):
+        # sorted start values of one section , made on the first query
+        key = (seckey,labels)
+        if key not in self.__symindex.keys():
+            if seckey not in self.symtables.keys():
+                return None
+            symlist = self.symtables[seckey]
+            values = self.__symboltable.values
+            storageclses = self.__symboltable.storageclses
+            idxs = symlist.idxs
+            if not labels:
+                idxs = array.array('I',[i for i in idxs if storageclses[i] != IMAGE_SYM_CLASS_LABEL])
+            starts = array.array('i',[values[i] for i in idxs])
+            self.__symindex[key] = (starts,SymbolList(self.__symboltable,idxs))
+        return self.__symindex[key]
+
+    def get_section_defs(self):
+        # seckey to the CoffSectionDef of the section symbol , made on the first call
+        if self.__sectdefs is None:
+            symtab = self.__load_symbols()
+            self.__sectdefs = coff_section_defs(symtab,len(self.__sections),isinstance(self.__header,CoffBigHeader))
+        return self.__sectdefs
+
+    def symbol_at(self,seckey,offset,labels=True):
+        # the symbol in section seckey whose [value,value+size) holds offset , None if no one
+        index = self.__get_symindex(seckey,labels)
+        if index is None:
+            return None
+        starts, symlist = index
+        pos = bisect.bisect_right(starts,offset) - 1
+        if pos < 0:
+            return None
+        sym = symlist[pos]
+        if offset >= (sym.value + sym.size):
+            return None
+        return sym
+
+    def symbols_at(self,seckey,offsets,labels=True):
+        # offsets must be sorted , they are resolved by one merge pass over the starts
+        rets = []
+        index = self.__get_symindex(seckey,labels)
+        if index is None:
+            return [None] * len(offsets)
+        starts, symlist = index
+        pos = -1
+        for offset in offsets:
+            while (pos + 1) < len(starts) and starts[pos + 1] <= offset:
+                pos += 1
+            sym = None
+            if pos >= 0:
+                sym = symlist[pos]
+                if offset >= (sym.value + sym.size):
+                    sym = None
+            rets.append(sym)
+        return rets
+
+    def symbols_in_range(self,seckey,lo,hi,labels=True):
+        # symbols of section seckey with value in [lo,hi)
+        index = self.__get_symindex(seckey,labels)
+        if index is None:
+            return []
+        starts, symlist = index
+        return symlist[bisect.bisect_left(starts,lo):bisect.bisect_left(starts,hi)]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,exctype,excvalue,tb):
+        self.close()
+        return False
+
     def __str__(self):
         return '[%s] %s'%(self.fname,self.header)
 
@@ -804,3 +1955,397 @@ class Coff(_LoggerObject):
         return str(self)
 
 
+class CoffSummary(_RecordObject):
+    # plain tuples of one Coff , cheap to pickle back from a worker process
+    # header (id,numsects,timestamp,symnums,flags)
+    # sections [(name,size,offdata,numrels,flags)]
+    # symbols [(name,sectnum,value,size,storagecls)]
+    # relocs {seckey : [(vaddr,symidx,name,type)]}
+    # stats the CoffStats of the parse , merge them with coff_stats_merge
+    keywords = ['fname','error','header','sections','symbols','relocs','stats']
+    __slots__ = keywords
+    def __init__(self,fname,error=None):
+        self.fname = fname
+        self.error = error
+        self.header = None
+        self.sections = None
+        self.symbols = None
+        self.relocs = None
+        self.stats = None
+        return
+
+    def __str__(self):
+        if self.error is not None:
+            return 'CoffSummary(fname[%s];error[%s])'%(self.fname,self.error)
+        return 'CoffSummary(fname[%s];sections[%s];symbols[%s];relocs[%s])'%(self.fname,\
+            None if self.sections is None else len(self.sections),\
+            None if self.symbols is None else len(self.symbols),\
+            None if self.relocs is None else sum([len(v) for v in self.relocs.values()]))
+
+
+def coff_summary(cffmt,parts=None):
+    if parts is None:
+        parts = COFF_PARTS
+    summary = CoffSummary(cffmt.fname)
+    if 'header' in parts:
+        hdr = cffmt.header
+        summary.header = (hdr.id,hdr.numsects,hdr.timestamp,hdr.symnums,hdr.flags)
+    if 'sections' in parts:
+        summary.sections = []
+        for section in cffmt.sections:
+            summary.sections.append((section.name,section.size,section.offdata,section.numrels,section.flags))
+    if 'symbols' in parts:
+        summary.symbols = []
+        for seckey in cffmt.symtables.keys():
+            for sym in cffmt.symtables[seckey]:
+                summary.symbols.append((sym.name,sym.sectnum,sym.value,sym.size,sym.storagecls))
+    if 'relocs' in parts:
+        summary.relocs = dict()
+        for seckey in cffmt.relocs.keys():
+            summary.relocs[seckey] = [(rel.vaddr,rel.symidx,rel.name,rel.type) for rel in cffmt.relocs[seckey]]
+    summary.stats = cffmt.stats
+    return summary
+
+
+def _scan_one(fname,parts,mmap):
+    try:
+        cffmt = Coff(fname,mmap=mmap,parts=parts)
+        try:
+            return coff_summary(cffmt,parts)
+        finally:
+            cffmt.close()
+    except Exception as e:
+        return CoffSummary(fname,error='%s'%(e))
+
+def _scan_worker(fnames,parts,mmap):
+    return [_scan_one(fname,parts,mmap) for fname in fnames]
+
+def scan(paths,workers=None,parts=None,ordered=True,chunksize=16,mmap=False):
+    # yield one CoffSummary for every path , a path fails to parse gives summary.error and the scan goes on
+    # paths are sent to the workers chunksize at a time and only a few chunks are in flight
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        for fname in paths:
+            yield _scan_one(fname,parts,mmap)
+        return
+    import concurrent.futures
+    import itertools
+    pathiter = iter(paths)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        while True:
+            while len(pending) < (workers * 2):
+                chunk = list(itertools.islice(pathiter,chunksize))
+                if len(chunk) == 0:
+                    break
+                pending.append(executor.submit(_scan_worker,chunk,parts,mmap))
+            if len(pending) == 0:
+                break
+            if ordered:
+                future = pending.pop(0)
+            else:
+                done, notdone = concurrent.futures.wait(pending,return_when=concurrent.futures.FIRST_COMPLETED)
+                future = done.pop()
+                pending.remove(future)
+            for summary in future.result():
+                yield summary
+    return
+
+def aload(fname,**kwargs):
+    # coroutine of Coff(fname) parsed off the event loop , see coff.aio.aload
+    from . import aio
+    return aio.aload(fname,**kwargs)
+
+def aload_many(paths,concurrency=8,**kwargs):
+    # async generator of (fname,result) with at most concurrency loads in flight , see coff.aio.aload_many
+    from . import aio
+    return aio.aload_many(paths,concurrency,**kwargs)
+
+
+class CoffArchiveMember(_RecordObject):
+    keywords = ['name','date','uid','gid','mode','size','offset']
+    __slots__ = keywords
+    headersize = 60
+    def __init__(self,data,offset,longnames=None):
+        if (offset + self.__class__.headersize) > len(data):
+            raise Exception('member [0x%x] + [%d] > [0x%x]'%(offset,self.__class__.headersize,len(data)))
+        hdr = bytes(data[offset:(offset + self.__class__.headersize)])
+        if hdr[58:60] != b'`\n':
+            raise Exception('member [0x%x] bad end [%s]'%(offset,hdr[58:60]))
+        self.offset = offset
+        self.date = coff_ar_int(hdr[16:28],10)
+        self.uid = coff_ar_int(hdr[28:34],10)
+        self.gid = coff_ar_int(hdr[34:40],10)
+        self.mode = coff_ar_int(hdr[40:48],8)
+        self.size = coff_ar_int(hdr[48:58],10)
+        name = hdr[:16].rstrip(b' ').decode('utf8')
+        if name in ('/','//'):
+            self.name = name
+        elif name.startswith('/') and longnames is not None:
+            nameoff = int(name[1:])
+            end = coff_find_nul(longnames,nameoff,len(longnames))
+            lname = bytes(longnames[nameoff:end])
+            idx = lname.find(b'/\n')
+            if idx >= 0:
+                lname = lname[:idx]
+            self.name = lname.decode('utf8')
+        elif name.endswith('/'):
+            self.name = name[:-1]
+        else:
+            self.name = name
+        return
+
+    def get_size(self):
+        return self.__class__.headersize
+
+    def get_dataoff(self):
+        return self.offset + self.__class__.headersize
+
+    def get_next(self):
+        # member data is padded to even size
+        return self.get_dataoff() + self.size + (self.size & 1)
+
+    def __str__(self):
+        return 'CoffArchiveMember(name[%s];offset[0x%x];size[0x%x];date[0x%x];mode[0%o])'%(\
+                self.name,self.offset,self.size,self.date,self.mode)
+
+
+def coff_ar_int(field,base):
+    field = field.strip(b' ')
+    if len(field) == 0:
+        return 0
+    return int(field,base)
+
+
+class CoffImportHeader(_RecordObject):
+    # short import object of the import library , it is not a coff
+    keywords = ['id','timestamp','sizedata','ordinal','type','name','dll']
+    __slots__ = keywords
+    headersize = 20
+    def __init__(self,data):
+        if len(data) < self.__class__.headersize:
+            raise Exception('len[%d] < [%d]'%(len(data), self.__class__.headersize))
+        sig1, sig2, version, self.id, self.timestamp, self.sizedata, self.ordinal, self.type = \
+            struct.unpack('<HHHHLLHH',data[:self.__class__.headersize])
+        if sig1 != 0 or sig2 != 0xffff:
+            raise Exception('not import header sig1[0x%x] sig2[0x%x]'%(sig1,sig2))
+        names = bytes(data[self.__class__.headersize:(self.__class__.headersize + self.sizedata)]).split(b'\0')
+        self.name = names[0].decode('utf8')
+        self.dll = ''
+        if len(names) > 1:
+            self.dll = names[1].decode('utf8')
+        return
+
+    @classmethod
+    def is_import(cls,data):
+        if len(data) < cls.headersize:
+            return False
+        sig1, sig2, version = struct.unpack('<HHH',data[:6])
+        return sig1 == 0 and sig2 == 0xffff and version == 0
+
+    def get_size(self):
+        return self.__class__.headersize + self.sizedata
+
+    def __str__(self):
+        return 'CoffImportHeader(name[%s];dll[%s];id[0x%x];ordinal[0x%x];type[0x%x])'%(\
+                self.name,self.dll,self.id,self.ordinal,self.type)
+
+
+def _archive_apply(cffmt,func):
+    # func of a member , the Coff is closed after it , import objects are given as they are
+    if not isinstance(cffmt,Coff):
+        return cffmt
+    try:
+        return func(cffmt)
+    finally:
+        cffmt.close()
+
+def _archive_worker(fname,offsets,func):
+    rets = []
+    arch = CoffArchive(fname)
+    try:
+        for offset in offsets:
+            rets.append(_archive_apply(arch.get_member(offset,cache=False),func))
+    finally:
+        arch.close()
+    return rets
+
+
+class CoffArchive(_LoggerObject):
+    keywords = ['fname','members']
+    magic = b'!<arch>\n'
+    def __reset(self):
+        self.__fname = None
+        self.__mmap = None
+        self.__data = None
+        self.__members = []
+        self.__symbols = None
+        self.__longnames = None
+        self.__linkers = []
+        self.__coffs = dict()
+        return
+
+    def __parse_members(self):
+        data = self.__data
+        if bytes(data[:len(self.__class__.magic)]) != self.__class__.magic:
+            raise Exception('[%s] not archive'%(self.__fname))
+        # only the 60 bytes headers are read here , the members are parsed when asked
+        offset = len(self.__class__.magic)
+        while (offset + CoffArchiveMember.headersize) <= len(data):
+            member = CoffArchiveMember(data,offset,self.__longnames)
+            if member.name == '/':
+                self.__linkers.append(member)
+            elif member.name == '//':
+                self.__longnames = data[member.get_dataoff():(member.get_dataoff() + member.size)]
+            else:
+                self.__members.append(member)
+            offset = member.get_next()
+        return
+
+    def __parse_linker(self):
+        data = self.__data
+        symbols = dict()
+        if len(self.__linkers) >= 2:
+            # second linker member : little endian offsets and 1 based member indexes
+            member = self.__linkers[1]
+            curoff = member.get_dataoff()
+            nummembers = struct.unpack('<L',data[curoff:(curoff + 4)])[0]
+            curoff += 4
+            offsets = array.array('I',bytes(data[curoff:(curoff + 4 * nummembers)]))
+            if sys.byteorder != 'little':
+                offsets.byteswap()
+            curoff += 4 * nummembers
+            numsyms = struct.unpack('<L',data[curoff:(curoff + 4)])[0]
+            curoff += 4
+            indexes = array.array('H',bytes(data[curoff:(curoff + 2 * numsyms)]))
+            if sys.byteorder != 'little':
+                indexes.byteswap()
+            curoff += 2 * numsyms
+            names = bytes(data[curoff:(member.get_dataoff() + member.size)]).split(b'\0')
+            for i in range(numsyms):
+                symbols[names[i].decode('utf8')] = offsets[indexes[i] - 1]
+        elif len(self.__linkers) == 1:
+            # first linker member : big endian offsets for every symbol
+            member = self.__linkers[0]
+            curoff = member.get_dataoff()
+            numsyms = struct.unpack('>L',data[curoff:(curoff + 4)])[0]
+            curoff += 4
+            offsets = struct.unpack('>%dL'%(numsyms),data[curoff:(curoff + 4 * numsyms)])
+            curoff += 4 * numsyms
+            names = bytes(data[curoff:(member.get_dataoff() + member.size)]).split(b'\0')
+            for i in range(numsyms):
+                symbols[names[i].decode('utf8')] = offsets[i]
+        self.__symbols = symbols
+        return
+
+    def __init__(self,fname,mmap=True):
+        super(CoffArchive,self).__init__()
+        self.__reset()
+        self.__fname = fname
+        if mmap:
+            self.__mmap = coff_map_file(fname)
+            self.__data = memoryview(self.__mmap)
+        else:
+            fin = open(fname,'rb')
+            self.__data = memoryview(fin.read())
+            fin.close()
+            fin = None
+        self.__parse_members()
+        return
+
+    def get_member_header(self,offset):
+        return CoffArchiveMember(self.__data,offset,self.__longnames)
+
+    def get_member(self,offset,cache=True):
+        # offset is the member header offset , as the linker members keep
+        if offset in self.__coffs.keys():
+            return self.__coffs[offset]
+        member = self.get_member_header(offset)
+        data = self.__data[member.get_dataoff():(member.get_dataoff() + member.size)]
+        if CoffImportHeader.is_import(data):
+            cffmt = CoffImportHeader(data)
+        else:
+            cffmt = Coff('%s(%s)'%(self.__fname,member.name),data=data)
+        if cache:
+            self.__coffs[offset] = cffmt
+        return cffmt
+
+    def find_symbol(self,name):
+        # member header offset of the member defines name , None if not in the index
+        if self.__symbols is None:
+            self.__parse_linker()
+        return self.__symbols.get(name,None)
+
+    def get_symbol_member(self,name):
+        offset = self.find_symbol(name)
+        if offset is None:
+            return None
+        return self.get_member(offset)
+
+    def iter_members(self):
+        # yield (CoffArchiveMember, Coff) , import objects are yielded as CoffImportHeader ,
+        # the caller closes the Coff
+        for member in self.__members:
+            yield member, self.get_member(member.offset,cache=False)
+        return
+
+    def map_members(self,func=coff_summary,workers=0,chunksize=16):
+        # yield (CoffArchiveMember, func(Coff)) in the order of the members , the Coff is closed after func ,
+        # import objects are yielded as CoffImportHeader , with workers > 1 the members are parsed in a
+        # process pool so func and what it gives must be picklable , the results are the same either way
+        if workers is None or workers <= 1:
+            for member in self.__members:
+                yield member, _archive_apply(self.get_member(member.offset,cache=False),func)
+            return
+        import concurrent.futures
+        chunks = []
+        for i in range(0,len(self.__members),chunksize):
+            chunks.append(self.__members[i:(i + chunksize)])
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = []
+            for chunk in chunks:
+                futures.append(executor.submit(_archive_worker,self.__fname,[m.offset for m in chunk],func))
+            for chunk, future in zip(chunks,futures):
+                for member, result in zip(chunk,future.result()):
+                    yield member, result
+        return
+
+    @property
+    def symbols(self):
+        if self.__symbols is None:
+            self.__parse_linker()
+        return self.__symbols
+
+    def close(self):
+        for cffmt in self.__coffs.values():
+            if isinstance(cffmt,Coff):
+                cffmt.close()
+        self.__coffs = dict()
+        self.__longnames = None
+        if self.__mmap is not None:
+            self.__data.release()
+            try:
+                self.__mmap.close()
+            except BufferError:
+                # members given out still hold the mapping , it is unmapped when they are gone
+                pass
+            self.__mmap = None
+        self.__data = None
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,exctype,excvalue,tb):
+        self.close()
+        return False
+
+    def __len__(self):
+        return len(self.__members)
+
+    def __str__(self):
+        return 'CoffArchive[%s] members[%d]'%(self.__fname,len(self.__members))
+
+    def __repr__(self):
+        return str(self)
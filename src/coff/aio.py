@@ -0,0 +1,127 @@
+#! /usr/bin/env python
+
+import asyncio
+import threading
+import concurrent.futures
+
+from . import Coff, coff_summary
+
+
+class _LoadState(object):
+    # shared by aload and its worker thread , the one of them that comes second closes
+    # the Coff nobody will get
+    __slots__ = ['lock','cancelled','result']
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cancelled = False
+        self.result = None
+        return
+
+    def set_result(self,cffmt):
+        with self.lock:
+            if not self.cancelled:
+                self.result = cffmt
+                return True
+        return False
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled = True
+            cffmt = self.result
+            self.result = None
+        if cffmt is not None:
+            cffmt.close()
+        return
+
+
+def _load_one(fname,mmap,parts,allrelocs,cache,func,state=None):
+    # runs in the executor : the file is read and parsed here , never on the event loop
+    if state is not None and state.cancelled:
+        return None
+    cffmt = Coff(fname,mmap=mmap,parts=parts,allrelocs=allrelocs,cache=cache)
+    if func is not None:
+        try:
+            return func(cffmt)
+        finally:
+            cffmt.close()
+    if state is not None and not state.set_result(cffmt):
+        cffmt.close()
+        return None
+    return cffmt
+
+
+async def aload(fname,executor=None,func=None,mmap=False,parts=None,allrelocs=False,cache=None):
+    # Coff(fname) or func(Coff(fname)) parsed in executor , None is the default executor of the loop
+    # a ProcessPoolExecutor can not give back the Coff , func is coff_summary when not given and
+    # it must be picklable , so is cache
+    # when the caller is cancelled a load not started is dropped , a running one is closed when done
+    loop = asyncio.get_running_loop()
+    if isinstance(executor,concurrent.futures.ProcessPoolExecutor):
+        if func is None:
+            func = coff_summary
+        return await loop.run_in_executor(executor,_load_one,fname,mmap,parts,allrelocs,cache,func)
+    state = _LoadState()
+    future = loop.run_in_executor(executor,_load_one,fname,mmap,parts,allrelocs,cache,func,state)
+    try:
+        return await future
+    except asyncio.CancelledError:
+        state.cancel()
+        raise
+
+
+def _close_result(task):
+    if task.cancelled() or task.exception() is not None:
+        return
+    result = task.result()
+    if isinstance(result,Coff):
+        result.close()
+    return
+
+async def aload_many(paths,concurrency=8,executor=None,func=None,ordered=True,return_exceptions=False,\
+        mmap=False,parts=None,allrelocs=False,cache=None):
+    # async generator of (fname,result) , result as aload gives
+    # at most concurrency loads are in flight and no new one starts while the caller is
+    # handling a result , so a slow consumer holds back the reads
+    # a failed load raises and cancels the others , with return_exceptions=True the exception is the result
+    # cancelling the caller or leaving the loop early cancels the loads in flight and closes
+    # the Coff done but not yielded
+    if concurrency < 1:
+        raise Exception('concurrency [%d] < 1'%(concurrency))
+    pathiter = iter(paths)
+    pending = []
+    tasks = dict()
+    try:
+        while True:
+            while len(pending) < concurrency:
+                try:
+                    fname = next(pathiter)
+                except StopIteration:
+                    break
+                task = asyncio.ensure_future(aload(fname,executor,func,mmap,parts,allrelocs,cache))
+                tasks[task] = fname
+                pending.append(task)
+            if len(pending) == 0:
+                break
+            if ordered:
+                task = pending[0]
+                await asyncio.wait([task])
+            else:
+                done, notdone = await asyncio.wait(pending,return_when=asyncio.FIRST_COMPLETED)
+                task = done.pop()
+            pending.remove(task)
+            fname = tasks.pop(task)
+            exc = task.exception()
+            if exc is not None:
+                if not return_exceptions:
+                    raise exc
+                yield fname, exc
+            else:
+                yield fname, task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if len(pending) > 0:
+            await asyncio.gather(*pending,return_exceptions=True)
+        for task in pending:
+            _close_result(task)
+    return
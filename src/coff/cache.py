@@ -0,0 +1,196 @@
+#! /usr/bin/env python
+
+import os
+import sys
+import struct
+import hashlib
+import tempfile
+
+
+class ParseCache(object):
+    # parsed Coff kept on disk , one file for every (path,mtime,size) , pass it as Coff(fname,cache=...)
+    # entry file layout :
+    #   magic[8] version[H] byteorder[B] pad[B] mtime_ns[q] size[q] digest[32] pathlen[I] path
+    #   then for every part : namelen[H] name datalen[Q] data
+    magic = b'COFFCACH'
+    version = 3
+    suffix = '.coffcache'
+    headfmt = '<8sHBBqq32sI'
+    def __init__(self,cachedir,maxsize=None,verify=False):
+        self.cachedir = cachedir
+        self.maxsize = maxsize
+        self.verify = verify
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        if not os.path.isdir(cachedir):
+            os.makedirs(cachedir,exist_ok=True)
+        self.__cursize = None
+        return
+
+    def __key(self,fname):
+        fname = os.path.abspath(fname)
+        st = os.stat(fname)
+        return fname, st.st_mtime_ns, st.st_size
+
+    def __entry(self,fname,mtime,size):
+        keystr = '%s|%d|%d'%(fname,mtime,size)
+        return os.path.join(self.cachedir,hashlib.sha1(keystr.encode('utf8')).hexdigest() + self.__class__.suffix)
+
+    def __digest(self,fname):
+        h = hashlib.blake2b(digest_size=32)
+        with open(fname,'rb') as fin:
+            while True:
+                buf = fin.read(1 << 20)
+                if len(buf) == 0:
+                    break
+                h.update(buf)
+        return h.digest()
+
+    def __byteorder(self):
+        if sys.byteorder == 'little':
+            return 1
+        return 2
+
+    def get(self,fname):
+        # dictionary of the parts stored by put , None when not cached or out of date
+        try:
+            fname, mtime, size = self.__key(fname)
+        except OSError:
+            self.misses += 1
+            return None
+        entry = self.__entry(fname,mtime,size)
+        try:
+            with open(entry,'rb') as fin:
+                data = fin.read()
+        except OSError:
+            self.misses += 1
+            return None
+        state = self.__decode(data,fname,mtime,size)
+        if state is None:
+            self.misses += 1
+            return None
+        try:
+            # the modify time of the entry is the last use for the lru eviction
+            os.utime(entry,None)
+        except OSError:
+            pass
+        self.hits += 1
+        return state
+
+    def __decode(self,data,fname,mtime,size):
+        headsize = struct.calcsize(self.__class__.headfmt)
+        if len(data) < headsize:
+            return None
+        magic, version, byteorder, pad, emtime, esize, digest, pathlen = struct.unpack(self.__class__.headfmt,data[:headsize])
+        if magic != self.__class__.magic or version != self.__class__.version or byteorder != self.__byteorder():
+            return None
+        if emtime != mtime or esize != size:
+            return None
+        curoff = headsize
+        if data[curoff:(curoff + pathlen)] != fname.encode('utf8'):
+            return None
+        curoff += pathlen
+        if self.verify and digest != self.__digest(fname):
+            return None
+        view = memoryview(data)
+        state = dict()
+        while curoff < len(data):
+            namelen = struct.unpack('<H',data[curoff:(curoff + 2)])[0]
+            curoff += 2
+            name = bytes(data[curoff:(curoff + namelen)]).decode('utf8')
+            curoff += namelen
+            datalen = struct.unpack('<Q',data[curoff:(curoff + 8)])[0]
+            curoff += 8
+            if (curoff + datalen) > len(data):
+                return None
+            state[name] = view[curoff:(curoff + datalen)]
+            curoff += datalen
+        return state
+
+    def put(self,fname,state):
+        fname, mtime, size = self.__key(fname)
+        digest = b'\0' * 32
+        if self.verify:
+            digest = self.__digest(fname)
+        pathbytes = fname.encode('utf8')
+        chunks = [struct.pack(self.__class__.headfmt,self.__class__.magic,self.__class__.version,self.__byteorder(),0,mtime,size,digest,len(pathbytes)),pathbytes]
+        for name in state.keys():
+            namebytes = name.encode('utf8')
+            chunks.append(struct.pack('<H',len(namebytes)))
+            chunks.append(namebytes)
+            chunks.append(struct.pack('<Q',len(state[name])))
+            chunks.append(state[name])
+        entry = self.__entry(fname,mtime,size)
+        # write to a temporary file and rename , so other processes never see half an entry
+        fd, tmpname = tempfile.mkstemp(dir=self.cachedir,suffix='.tmp')
+        try:
+            with os.fdopen(fd,'wb') as fout:
+                for c in chunks:
+                    fout.write(c)
+            os.replace(tmpname,entry)
+        except:
+            try:
+                os.remove(tmpname)
+            except OSError:
+                pass
+            raise
+        self.stores += 1
+        if self.maxsize is not None:
+            if self.__cursize is None:
+                self.__cursize = self.__total()
+            else:
+                self.__cursize += sum([len(c) for c in chunks])
+            if self.__cursize > self.maxsize:
+                self.evict()
+        return
+
+    def __list(self):
+        entries = []
+        for de in os.scandir(self.cachedir):
+            if not de.name.endswith(self.__class__.suffix):
+                continue
+            try:
+                st = de.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime_ns,st.st_size,de.path))
+        return entries
+
+    def __total(self):
+        return sum([e[1] for e in self.__list()])
+
+    def evict(self,maxsize=None):
+        # remove the least recently used entries until the cache is under 90% of maxsize
+        if maxsize is None:
+            maxsize = self.maxsize
+        entries = sorted(self.__list())
+        total = sum([e[1] for e in entries])
+        target = int(maxsize * 0.9)
+        for mtime, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except OSError:
+                # another process removed or still holds it
+                pass
+            total -= size
+        self.__cursize = total
+        return
+
+    def clear(self):
+        self.evict(0)
+        return
+
+    def stats(self):
+        return dict(hits=self.hits,misses=self.misses,stores=self.stores,evictions=self.evictions)
+
+    def __str__(self):
+        return 'ParseCache(cachedir[%s];hits[%d];misses[%d];stores[%d];evictions[%d])'%(\
+            self.cachedir,self.hits,self.misses,self.stores,self.evictions)
+
+    def __repr__(self):
+        return str(self)
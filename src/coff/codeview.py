@@ -0,0 +1,262 @@
+#! /usr/bin/env python
+
+import sys
+import array
+import bisect
+import struct
+
+from . import _RecordObject, CoffLine, coff_find_nul, IMAGE_REL_AMD64_SECREL, IMAGE_REL_I386_SECREL, IMAGE_REL_ARM64_SECREL
+
+# .debug$S of objects starts with the signature , then the subsections one after another ,
+# every one is kind[L] size[L] data , padded to 4 bytes
+CV_SIGNATURE_C13 = 4
+
+DEBUG_S_IGNORE = 0x80000000
+DEBUG_S_SYMBOLS = 0xf1
+DEBUG_S_LINES = 0xf2
+DEBUG_S_STRINGTABLE = 0xf3
+DEBUG_S_FILECHKSMS = 0xf4
+DEBUG_S_FRAMEDATA = 0xf5
+DEBUG_S_INLINEELINES = 0xf6
+DEBUG_S_CROSSSCOPEIMPORTS = 0xf7
+DEBUG_S_CROSSSCOPEEXPORTS = 0xf8
+DEBUG_S_IL_LINES = 0xf9
+DEBUG_S_FUNC_MDTOKEN_MAP = 0xfa
+DEBUG_S_TYPE_MDTOKEN_MAP = 0xfb
+DEBUG_S_MERGED_ASSEMBLYINPUT = 0xfc
+DEBUG_S_COFF_SYMBOL_RVA = 0xfd
+
+# lines header flags
+CV_LINES_HAVE_COLUMNS = 1
+
+# symbol record kinds of the procedures
+S_END = 0x6
+S_LPROC32 = 0x110f
+S_GPROC32 = 0x1110
+S_LPROC32_ID = 0x1146
+S_GPROC32_ID = 0x1147
+S_PROC_ID_END = 0x114f
+CV_PROC_KINDS = (S_LPROC32,S_GPROC32,S_LPROC32_ID,S_GPROC32_ID)
+
+# the relocation that gives the offset of the line table and of the procedures
+CV_SECREL_TYPES = {
+    0x8664 : IMAGE_REL_AMD64_SECREL,
+    0x14c : IMAGE_REL_I386_SECREL,
+    0xaa64 : IMAGE_REL_ARM64_SECREL,
+}
+
+# line numbers of the code with no source line
+CV_LINE_HIDDEN = (0xfeefee,0xf00f00)
+
+
+def cv_subsections(data):
+    # yield (kind,offset,view) for every subsection of the data of one .debug$S , view is a slice of data
+    # without kind and size , offset is where view starts in the section , nothing is copied
+    if len(data) < 4:
+        return
+    signature = struct.unpack_from('<L',data,0)[0]
+    if signature != CV_SIGNATURE_C13:
+        raise Exception('codeview signature [%d] != [%d]'%(signature,CV_SIGNATURE_C13))
+    off = 4
+    end = len(data)
+    while (off + 8) <= end:
+        kind, size = struct.unpack_from('<LL',data,off)
+        off += 8
+        if (off + size) > end:
+            raise Exception('subsection [0x%x] at [0x%x] size [0x%x] > [0x%x]'%(kind,off - 8,size,end))
+        yield kind, off, data[off:(off + size)]
+        off += (size + 3) & ~3
+    return
+
+def cv_records(data):
+    # yield (offset,kind,view) for every record of a DEBUG_S_SYMBOLS subsection ,
+    # view is the record after its length and kind
+    off = 0
+    end = len(data)
+    while (off + 4) <= end:
+        reclen, kind = struct.unpack_from('<HH',data,off)
+        if reclen < 2 or (off + 2 + reclen) > end:
+            raise Exception('record [0x%x] at [0x%x] len [0x%x] > [0x%x]'%(kind,off,reclen,end))
+        yield off, kind, data[(off + 4):(off + 2 + reclen)]
+        off += 2 + reclen
+    return
+
+def cv_file_checksums(data):
+    # yield (fileid,nameoff,kind,checksum) for every entry of a DEBUG_S_FILECHKSMS subsection ,
+    # fileid is the offset of the entry that the line blocks give , nameoff is in DEBUG_S_STRINGTABLE
+    off = 0
+    end = len(data)
+    while (off + 6) <= end:
+        nameoff, size, kind = struct.unpack_from('<LBB',data,off)
+        if (off + 6 + size) > end:
+            raise Exception('checksum at [0x%x] size [0x%x] > [0x%x]'%(off,size,end))
+        yield off, nameoff, kind, data[(off + 6):(off + 6 + size)]
+        off = (off + 6 + size + 3) & ~3
+    return
+
+def cv_string(data,off):
+    # the string at off of a DEBUG_S_STRINGTABLE subsection
+    if off < 0 or off >= len(data):
+        raise Exception('string [0x%x] >= [0x%x]'%(off,len(data)))
+    return bytes(data[off:coff_find_nul(data,off,len(data))]).decode('utf8')
+
+def cv_lines_header(data):
+    # (offset,segment,flags,size) of a DEBUG_S_LINES subsection , offset and segment are 0 in objects ,
+    # the relocations at 0 and 4 of the subsection give them
+    if len(data) < 12:
+        raise Exception('lines header len [%d] < 12'%(len(data)))
+    return struct.unpack_from('<LHHL',data,0)
+
+def cv_line_blocks(data,hidden=False):
+    # yield (fileid,offsets,lines) for every file block of a DEBUG_S_LINES subsection ,
+    # offsets from the start of the code and the line numbers , as arrays
+    # the lines of CV_LINE_HIDDEN are not source lines , they are left out unless hidden is set
+    offset, segment, flags, size = cv_lines_header(data)
+    colsize = 0
+    if (flags & CV_LINES_HAVE_COLUMNS) != 0:
+        colsize = 4
+    off = 12
+    end = len(data)
+    while (off + 12) <= end:
+        fileid, numlines, blocksize = struct.unpack_from('<LLL',data,off)
+        if blocksize < (12 + numlines * (8 + colsize)) or (off + blocksize) > end:
+            raise Exception('line block at [0x%x] size [0x%x] lines [%d] > [0x%x]'%(off,blocksize,numlines,end))
+        pairs = array.array('I',bytes(data[(off + 12):(off + 12 + numlines * 8)]))
+        if sys.byteorder != 'little':
+            pairs.byteswap()
+        # linenumStart:24 deltaLineEnd:7 fStatement:1
+        offsets = pairs[0::2]
+        lines = array.array('I',[v & 0xffffff for v in pairs[1::2]])
+        if not hidden and (CV_LINE_HIDDEN[0] in lines or CV_LINE_HIDDEN[1] in lines):
+            keeps = [i for i in range(len(lines)) if lines[i] not in CV_LINE_HIDDEN]
+            offsets = array.array('I',[offsets[i] for i in keeps])
+            lines = array.array('I',[lines[i] for i in keeps])
+        yield fileid, offsets, lines
+        off += blocksize
+    return
+
+
+class CvProc(_RecordObject):
+    # S_GPROC32 , S_LPROC32 and the _ID ones , offset and segment are 0 in objects before the relocations
+    keywords = ['kind','name','offset','segment','size','dbgstart','dbgend','typeidx','flags']
+    __slots__ = keywords
+    def __init__(self,kind,data):
+        if len(data) < 35:
+            raise Exception('proc len [%d] < 35'%(len(data)))
+        self.kind = kind
+        parent, end, next, self.size, self.dbgstart, self.dbgend, self.typeidx, self.offset, self.segment, self.flags = \
+            struct.unpack_from('<LLLLLLLLHB',data,0)
+        self.name = bytes(data[35:coff_find_nul(data,35,len(data))]).decode('utf8')
+        return
+
+    def __str__(self):
+        return 'CvProc(name[%s];kind[0x%x];offset[0x%x];segment[%d];size[0x%x];typeidx[0x%x])'%(\
+            self.name,self.kind,self.offset,self.segment,self.size,self.typeidx)
+
+
+class CvLineIndex(object):
+    # the line tables of every .debug$S of one Coff
+    # on the first query only the 12 bytes header of every DEBUG_S_LINES is read , with the SECREL
+    # relocation on it , to know the code range of every function , the lines of a function are
+    # decoded on the first query inside it
+    def __init__(self,cffmt):
+        self.cffmt = cffmt
+        # seckey to (starts,[(start,size,dbgkey,off,view,symidx)]) sorted by start , off is where view is in dbgkey
+        self.__ranges = None
+        # (dbgkey,offset of view) to (offsets,lines,fileids) sorted by offset , without the hidden lines ,
+        # so the code of a hidden line gets the real line before it
+        self.__tables = dict()
+        self.__checksums = None
+        self.__strings = None
+        self.__fnames = dict()
+        return
+
+    def __load_ranges(self):
+        cffmt = self.cffmt
+        symtab = cffmt.symboltable
+        secreltype = CV_SECREL_TYPES.get(cffmt.header.id,None)
+        ranges = dict()
+        dbgkey = 0
+        for section in cffmt.sections:
+            if section.name == '.debug$S':
+                data = cffmt.section_data(dbgkey)
+                secrels = dict([(vaddr,symidx) for vaddr, symidx, reltype in cffmt.section_relocs(dbgkey) if reltype == secreltype])
+                for kind, off, view in cv_subsections(data):
+                    if kind == DEBUG_S_LINES:
+                        start, segment, flags, size = cv_lines_header(view)
+                        symidx = secrels.get(off,None)
+                        if symidx is not None:
+                            seckey = symtab.sectnums[symidx] - 1
+                            start += symtab.values[symidx]
+                        elif segment > 0:
+                            seckey = segment - 1
+                        else:
+                            continue
+                        ranges.setdefault(seckey,[]).append((start,size,dbgkey,off,view,symidx))
+                    elif kind == DEBUG_S_FILECHKSMS and self.__checksums is None:
+                        # the COMDAT functions of /Gy have their own .debug$S , they use the file
+                        # checksums and strings of the main one
+                        self.__checksums = view
+                    elif kind == DEBUG_S_STRINGTABLE and self.__strings is None:
+                        self.__strings = view
+            dbgkey += 1
+        self.__ranges = dict()
+        for seckey, entries in ranges.items():
+            entries.sort(key=lambda e: e[0])
+            self.__ranges[seckey] = (array.array('l',[e[0] for e in entries]),entries)
+        return
+
+    def __get_table(self,entry):
+        start, size, dbgkey, off, view, symidx = entry
+        key = (dbgkey,off)
+        table = self.__tables.get(key,None)
+        if table is None:
+            triples = []
+            for fileid, offsets, lines in cv_line_blocks(view):
+                triples.extend(zip(offsets,lines,[fileid] * len(offsets)))
+            triples.sort(key=lambda t: t[0])
+            table = (array.array('I',[t[0] for t in triples]),array.array('I',[t[1] for t in triples]),[t[2] for t in triples])
+            self.__tables[key] = table
+        return table
+
+    def get_fname(self,fileid):
+        fname = self.__fnames.get(fileid,None)
+        if fname is None:
+            if self.__checksums is None or self.__strings is None:
+                return None
+            if (fileid + 6) > len(self.__checksums):
+                raise Exception('fileid [0x%x] > [0x%x]'%(fileid,len(self.__checksums)))
+            nameoff = struct.unpack_from('<L',self.__checksums,fileid)[0]
+            fname = cv_string(self.__strings,nameoff)
+            self.__fnames[fileid] = fname
+        return fname
+
+    def functions(self,seckey):
+        # [(start,size)] of the line tables in section seckey
+        if self.__ranges is None:
+            self.__load_ranges()
+        if seckey not in self.__ranges.keys():
+            return []
+        return [(e[0],e[1]) for e in self.__ranges[seckey][1]]
+
+    def line_for(self,seckey,offset):
+        if self.__ranges is None:
+            self.__load_ranges()
+        if seckey not in self.__ranges.keys():
+            return None
+        starts, entries = self.__ranges[seckey]
+        pos = bisect.bisect_right(starts,offset) - 1
+        if pos < 0:
+            return None
+        entry = entries[pos]
+        start, size, dbgkey, off, view, symidx = entry
+        if offset >= (start + size):
+            return None
+        offsets, lines, fileids = self.__get_table(entry)
+        i = bisect.bisect_right(offsets,offset - start) - 1
+        if i < 0:
+            return None
+        function = None
+        if symidx is not None:
+            function = self.cffmt.symboltable.get_name(symidx)
+        return CoffLine(self.get_fname(fileids[i]),lines[i],start + offsets[i],function)
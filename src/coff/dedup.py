@@ -0,0 +1,148 @@
+#! /usr/bin/env python
+
+import os
+import itertools
+
+from . import Coff, CoffArchive, CoffImportHeader, IMAGE_SCN_LNK_COMDAT, IMAGE_SYM_CLASS_STATIC
+
+
+def comdat_names(cffmt,seckeys):
+    # seckey to the COMDAT symbol of the section , the first symbol of the section after
+    # the section symbol , the section name for the associative ones that have none
+    symtab = cffmt.symboltable
+    values = symtab.values
+    sectnums = symtab.sectnums
+    types = symtab.types
+    storageclses = symtab.storageclses
+    numauxs = symtab.numauxs
+    wanted = set(seckeys)
+    names = dict()
+    i = 0
+    while i < symtab.symnums and len(names) < len(wanted):
+        seckey = sectnums[i] - 1
+        if seckey in wanted and seckey not in names:
+            if not (storageclses[i] == IMAGE_SYM_CLASS_STATIC and values[i] == 0 and types[i] == 0 and numauxs[i] > 0):
+                names[seckey] = symtab.get_name(i)
+        i += 1 + numauxs[i]
+    for seckey in wanted:
+        if seckey not in names:
+            names[seckey] = cffmt.sections[seckey].name
+    return names
+
+
+class ComdatIndex(object):
+    # the COMDAT sections of many objects grouped by the hash of their data ,
+    # groups[digest] is [(objid,name,secname,size)] , the same body under any name ,
+    # errors is path to the error of the files build could not read
+    def __init__(self,algo='sha256'):
+        self.algo = algo
+        self.objects = []
+        self.groups = dict()
+        self.errors = dict()
+        return
+
+    def add_coff(self,cffmt,name=None,workers=1):
+        if name is None:
+            name = cffmt.fname
+        objid = len(self.objects)
+        self.objects.append(name)
+        sections = cffmt.sections
+        seckeys = [seckey for seckey in range(len(sections)) if (sections[seckey].flags & IMAGE_SCN_LNK_COMDAT) != 0]
+        if len(seckeys) == 0:
+            return objid
+        names = comdat_names(cffmt,seckeys)
+        hashes = cffmt.section_hashes(self.algo,workers,seckeys)
+        for seckey in seckeys:
+            section = sections[seckey]
+            self.groups.setdefault(hashes[seckey],[]).append((objid,names[seckey],section.name,section.size))
+        return objid
+
+    def add_archive(self,arch):
+        for member, cffmt in arch.iter_members():
+            if isinstance(cffmt,CoffImportHeader):
+                continue
+            self.add_coff(cffmt,'%s(%s)'%(arch.fname,member.name))
+            cffmt.close()
+        return
+
+    def add_file(self,fname,workers=1):
+        with open(fname,'rb') as fin:
+            magic = fin.read(len(CoffArchive.magic))
+        if magic == CoffArchive.magic:
+            arch = CoffArchive(fname)
+            try:
+                self.add_archive(arch)
+            finally:
+                arch.close()
+        else:
+            cffmt = Coff(fname,mmap=True,parts=('sections','symbols'))
+            try:
+                self.add_coff(cffmt,workers=workers)
+            finally:
+                cffmt.close()
+        return
+
+    def merge(self,other):
+        if other.algo != self.algo:
+            raise Exception('merge [%s] hashes into [%s] ones'%(other.algo,self.algo))
+        objoff = len(self.objects)
+        self.objects.extend(other.objects)
+        self.errors.update(other.errors)
+        for digest, members in other.groups.items():
+            self.groups.setdefault(digest,[]).extend([(objid + objoff,name,secname,size) for objid, name, secname, size in members])
+        return self
+
+    def duplicates(self,minsize=0):
+        # yield (digest,size,[(object,name,secname)]) for the bodies found more than once
+        for digest, members in self.groups.items():
+            if len(members) < 2 or members[0][3] < minsize:
+                continue
+            yield digest, members[0][3], [(self.objects[objid],name,secname) for objid, name, secname, size in members]
+        return
+
+    def get_wasted(self,minsize=0):
+        # bytes of the copies after the first of every body
+        return sum([size * (len(members) - 1) for digest, size, members in self.duplicates(minsize)])
+
+    def __len__(self):
+        return len(self.groups)
+
+    def __str__(self):
+        return 'ComdatIndex(algo[%s];objects[%d];bodies[%d];sections[%d];errors[%d])'%(\
+            self.algo,len(self.objects),len(self.groups),sum([len(m) for m in self.groups.values()]),len(self.errors))
+
+    def __repr__(self):
+        return str(self)
+
+
+def _dedup_worker(fnames,algo):
+    index = ComdatIndex(algo)
+    for fname in fnames:
+        try:
+            index.add_file(fname)
+        except Exception as e:
+            index.errors[fname] = '%s'%(e)
+    return index
+
+def build(paths,algo='sha256',workers=None,chunksize=16):
+    # ComdatIndex of objects and archives , every worker process hashes its chunks and they are merged ,
+    # a file that fails goes to index.errors and the build goes on
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        return _dedup_worker(paths,algo)
+    import concurrent.futures
+    index = ComdatIndex(algo)
+    pathiter = iter(paths)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        while True:
+            while len(pending) < (workers * 2):
+                chunk = list(itertools.islice(pathiter,chunksize))
+                if len(chunk) == 0:
+                    break
+                pending.append(executor.submit(_dedup_worker,chunk,algo))
+            if len(pending) == 0:
+                break
+            index.merge(pending.pop(0).result())
+    return index
@@ -0,0 +1,111 @@
+#! /usr/bin/env python
+
+import io
+import csv
+import json
+
+# rows are plain tuples in the order of the fields , nothing is collected or sorted here
+SECTION_FIELDS = ['index','name','paddr','vaddr','size','offdata','offrel','numrels','lineentries','numlnno','flags']
+SYMBOL_FIELDS = ['index','name','value','sectnum','type','storagecls','numaux','size']
+RELOC_FIELDS = ['section','vaddr','symidx','name','type','size']
+EXPORT_FIELDS = dict(sections=SECTION_FIELDS,symbols=SYMBOL_FIELDS,relocs=RELOC_FIELDS)
+# the parts of Coff(parts=...) every export needs , the others are not parsed
+EXPORT_PARTS = dict(sections=('sections',),symbols=('sections','symbols'),relocs=('sections','symbols','relocs'))
+
+
+def iter_sections(cffmt):
+    idx = 0
+    for section in cffmt.sections:
+        yield (idx,section.name,section.paddr,section.vaddr,section.size,section.offdata,section.offrel,\
+            section.numrels,section.lineentries,section.numlnno,section.flags)
+        idx += 1
+    return
+
+def iter_symbols(cffmt,allsyms=False):
+    # by default the symbols of Coff.symtables in section and value order ,
+    # allsyms=True gives every symbol record in the table order , undefined and absolute ones included
+    symtab = cffmt.symboltable
+    values = symtab.values
+    sectnums = symtab.sectnums
+    types = symtab.types
+    storageclses = symtab.storageclses
+    numauxs = symtab.numauxs
+    sizes = symtab.sizes
+    if allsyms:
+        idx = 0
+        while idx < symtab.symnums:
+            yield (idx,symtab.get_name(idx),values[idx],sectnums[idx],types[idx],storageclses[idx],numauxs[idx],sizes[idx])
+            idx += 1 + numauxs[idx]
+        return
+    for seckey in cffmt.symtables.keys():
+        for idx in cffmt.symtables[seckey].idxs:
+            yield (idx,symtab.get_name(idx),values[idx],sectnums[idx],types[idx],storageclses[idx],numauxs[idx],sizes[idx])
+    return
+
+def iter_relocs(cffmt):
+    # the relocations Coff keeps , only the code ones of the call graph unless it was made with allrelocs=True
+    for seckey in cffmt.relocs.keys():
+        for rel in cffmt.relocs[seckey]:
+            yield (seckey,rel.vaddr,rel.symidx,rel.name,rel.type,rel.size)
+    return
+
+def iter_rows(cffmt,what,allsyms=False):
+    if what == 'sections':
+        return iter_sections(cffmt)
+    elif what == 'symbols':
+        return iter_symbols(cffmt,allsyms)
+    elif what == 'relocs':
+        return iter_relocs(cffmt)
+    raise Exception('unknown export [%s]'%(what))
+
+
+def write_jsonl(rows,fields,fout,bufsize=(1 << 16)):
+    # one json object for every row , written and flushed every bufsize characters
+    cnt = 0
+    buf = []
+    bufcnt = 0
+    dumps = json.JSONEncoder(ensure_ascii=False,separators=(',',':')).encode
+    for row in rows:
+        s = dumps(dict(zip(fields,row)))
+        buf.append(s)
+        buf.append('\n')
+        bufcnt += len(s) + 1
+        cnt += 1
+        if bufcnt >= bufsize:
+            fout.write(''.join(buf))
+            fout.flush()
+            buf = []
+            bufcnt = 0
+    if len(buf) > 0:
+        fout.write(''.join(buf))
+    fout.flush()
+    return cnt
+
+def write_csv(rows,fields,fout,bufsize=(1 << 16),header=True):
+    cnt = 0
+    buf = io.StringIO()
+    writer = csv.writer(buf,lineterminator='\n')
+    if header:
+        writer.writerow(fields)
+    for row in rows:
+        writer.writerow(row)
+        cnt += 1
+        if buf.tell() >= bufsize:
+            fout.write(buf.getvalue())
+            fout.flush()
+            buf.seek(0)
+            buf.truncate(0)
+    if buf.tell() > 0:
+        fout.write(buf.getvalue())
+    fout.flush()
+    return cnt
+
+def export(cffmt,fout,what='symbols',fmt='jsonl',allsyms=False,bufsize=(1 << 16)):
+    # stream one table of cffmt to the text file fout , returns the rows written
+    rows = iter_rows(cffmt,what,allsyms)
+    fields = EXPORT_FIELDS[what]
+    if fmt == 'jsonl':
+        return write_jsonl(rows,fields,fout,bufsize)
+    elif fmt == 'csv':
+        return write_csv(rows,fields,fout,bufsize)
+    raise Exception('unknown format [%s]'%(fmt))
@@ -0,0 +1,100 @@
+#! /usr/bin/env python
+
+import numpy
+
+# record layouts of the file , the name field is also seen as (zeroes,nameoff) for the long names
+SECTION_DTYPE = numpy.dtype({
+    'names' : ['name','paddr','vaddr','size','offdata','offrel','lineentries','numrels','numlnno','flags'],
+    'formats' : ['S8','<i4','<i4','<i4','<i4','<i4','<i4','<u2','<u2','<i4'],
+    'offsets' : [0,8,12,16,20,24,28,32,34,36],
+    'itemsize' : 40})
+SYMBOL_DTYPE = numpy.dtype({
+    'names' : ['name','zeroes','nameoff','value','sectnum','type','storagecls','numaux'],
+    'formats' : ['S8','<u4','<i4','<i4','<i2','<u2','u1','u1'],
+    'offsets' : [0,0,4,8,12,14,16,17],
+    'itemsize' : 18})
+BIGOBJ_SYMBOL_DTYPE = numpy.dtype({
+    'names' : ['name','zeroes','nameoff','value','sectnum','type','storagecls','numaux'],
+    'formats' : ['S8','<u4','<i4','<i4','<i4','<u2','u1','u1'],
+    'offsets' : [0,0,4,8,12,16,18,19],
+    'itemsize' : 20})
+RELOC_DTYPE = numpy.dtype({
+    'names' : ['vaddr','symidx','type'],
+    'formats' : ['<u4','<u4','<u2'],
+    'offsets' : [0,4,8],
+    'itemsize' : 10})
+
+
+class CoffArrays(object):
+    # structured arrays over the buffer of one Coff , made by Coff.as_numpy , nothing is copied
+    # symbols has every record of the symbol table , aux records included , as SymbolTable
+    # relocs is seckey to the relocations of the section , every section with relocations
+    def __init__(self,view,symoff,symnums,symsize,sectoff,numsects,stroff,strsize,relranges):
+        symdtype = SYMBOL_DTYPE
+        if symsize == BIGOBJ_SYMBOL_DTYPE.itemsize:
+            symdtype = BIGOBJ_SYMBOL_DTYPE
+        self.sections = numpy.frombuffer(view,dtype=SECTION_DTYPE,count=numsects,offset=sectoff)
+        self.symbols = numpy.frombuffer(view,dtype=symdtype,count=symnums,offset=symoff)
+        self.strtab = numpy.frombuffer(view,dtype=numpy.uint8,count=strsize,offset=stroff)
+        self.relocs = dict()
+        for seckey in relranges.keys():
+            offrel, numrels = relranges[seckey]
+            self.relocs[seckey] = numpy.frombuffer(view,dtype=RELOC_DTYPE,count=numrels,offset=offrel)
+        self.__nuls = None
+        self.__isaux = None
+        return
+
+    def get_auxmask(self):
+        # True for the aux records in symbols , they only follow the numaux of the records before
+        if self.__isaux is None:
+            isaux = numpy.zeros(len(self.symbols),dtype=bool)
+            numauxs = self.symbols['numaux'].tolist()
+            i = 0
+            while i < len(numauxs):
+                isaux[(i + 1):(i + 1 + numauxs[i])] = True
+                i += 1 + numauxs[i]
+            self.__isaux = isaux
+        return self.__isaux
+
+    def get_primary(self):
+        # rows of symbols which are symbol records , not aux ones
+        return numpy.flatnonzero(~self.get_auxmask())
+
+    def get_names(self,rows=None):
+        # names of the symbols at rows (all of them when None) , in the same order , '' for aux records ,
+        # the short names are cut on the whole array and the long names decoded once per distinct offset ,
+        # their ends found by one searchsorted
+        syms = self.symbols
+        isaux = self.get_auxmask()
+        if rows is not None:
+            syms = syms[rows]
+            isaux = isaux[rows]
+        names = numpy.full(len(syms),'',dtype=object)
+        islong = ((syms['zeroes'] & 0xff) == 0) & ~isaux
+        shortrows = numpy.flatnonzero(~islong & ~isaux)
+        if len(shortrows) > 0:
+            shorts, inverse = numpy.unique(syms['name'][shortrows],return_inverse=True)
+            # the bytes from the first nul or space on are zeroed , numpy drops the trailing nuls
+            raw = shorts.astype('S8').view(numpy.uint8).reshape(-1,8).copy()
+            stops = (raw == 0) | (raw == 0x20)
+            lens = numpy.where(stops.any(axis=1),stops.argmax(axis=1),8)
+            raw[numpy.arange(8) >= lens[:,None]] = 0
+            shorts = raw.view('S8').reshape(-1)
+            names[shortrows] = numpy.char.decode(shorts,'utf8').astype(object)[inverse.reshape(-1)]
+        longrows = numpy.flatnonzero(islong)
+        if len(longrows) > 0:
+            if self.__nuls is None:
+                self.__nuls = numpy.flatnonzero(self.strtab == 0)
+            strsize = len(self.strtab)
+            offs, inverse = numpy.unique(syms['nameoff'][longrows].astype(numpy.int64),return_inverse=True)
+            pos = numpy.searchsorted(self.__nuls,offs)
+            ends = numpy.full(len(offs),strsize,dtype=numpy.int64)
+            found = pos < len(self.__nuls)
+            ends[found] = self.__nuls[pos[found]]
+            longs = numpy.full(len(offs),'',dtype=object)
+            valid = numpy.flatnonzero((offs >= 0) & (offs < strsize))
+            strtab = self.strtab
+            for i, off, end in zip(valid.tolist(),offs[valid].tolist(),ends[valid].tolist()):
+                longs[i] = strtab[off:end].tobytes().decode('utf8')
+            names[longrows] = longs[inverse.reshape(-1)]
+        return names
@@ -0,0 +1,267 @@
+#! /usr/bin/env python
+
+import os
+import array
+import itertools
+
+from . import Coff, CoffArchive, CoffImportHeader, IMAGE_SCN_LNK_COMDAT, \
+    IMAGE_SYM_CLASS_EXTERNAL, IMAGE_SYM_CLASS_WEAK_EXTERNAL, \
+    IMAGE_COMDAT_SELECT_NODUPLICATES, IMAGE_COMDAT_SELECT_SAME_SIZE, IMAGE_COMDAT_SELECT_EXACT_MATCH
+
+# selection of a common symbol (sectnum 0 with a size) , the COMDAT ones are 1 to 6 and 0 is no COMDAT
+SYMINDEX_SELECT_COMMON = 0xff
+
+# where a definition comes from , only the ones of objects can be duplicates ,
+# the linker takes archive members and imports on demand
+SYMINDEX_KIND_OBJECT = 0
+SYMINDEX_KIND_MEMBER = 1
+SYMINDEX_KIND_IMPORT = 2
+# weak external , it falls back to the symbol of its aux record when nobody else defines it
+SYMINDEX_KIND_WEAK = 3
+
+
+class SymbolIndex(object):
+    # external symbols of many objects , every definition and reference is one slot of the
+    # arrays below , defined[name] and referenced[name] are the last slot of the name and
+    # defnext / refnext link the ones before , -1 ends , errors is path to the error of the files
+    # build could not read
+    def __init__(self):
+        self.objects = []
+        self.errors = dict()
+        self.defined = dict()
+        self.defobjs = array.array('I')
+        self.defkinds = array.array('B')
+        self.defsels = array.array('B')
+        self.deflens = array.array('I')
+        self.defsums = array.array('I')
+        self.defnext = array.array('i')
+        self.referenced = dict()
+        self.refobjs = array.array('I')
+        self.refnext = array.array('i')
+        return
+
+    def __add_def(self,name,objid,kind,sel=0,length=0,checksum=0):
+        self.defobjs.append(objid)
+        self.defkinds.append(kind)
+        self.defsels.append(sel)
+        self.deflens.append(length)
+        self.defsums.append(checksum)
+        self.defnext.append(self.defined.get(name,-1))
+        self.defined[name] = len(self.defobjs) - 1
+        return
+
+    def __add_ref(self,name,objid):
+        self.refobjs.append(objid)
+        self.refnext.append(self.referenced.get(name,-1))
+        self.referenced[name] = len(self.refobjs) - 1
+        return
+
+    def add_coff(self,cffmt,name=None,kind=SYMINDEX_KIND_OBJECT):
+        # the external symbols of cffmt , straight from the columns of the symbol table
+        if name is None:
+            name = cffmt.fname
+        objid = len(self.objects)
+        self.objects.append(name)
+        symtab = cffmt.symboltable
+        sections = cffmt.sections
+        sectdefs = None
+        numsects = len(sections)
+        values = symtab.values
+        sectnums = symtab.sectnums
+        storageclses = symtab.storageclses
+        numauxs = symtab.numauxs
+        i = 0
+        while i < symtab.symnums:
+            storagecls = storageclses[i]
+            if storagecls == IMAGE_SYM_CLASS_EXTERNAL:
+                sectnum = sectnums[i]
+                if sectnum >= 1 and sectnum <= numsects:
+                    section = sections[sectnum - 1]
+                    if (section.flags & IMAGE_SCN_LNK_COMDAT) != 0:
+                        if sectdefs is None:
+                            sectdefs = cffmt.get_section_defs()
+                        sectdef = sectdefs.get(sectnum - 1,None)
+                        if sectdef is not None:
+                            self.__add_def(symtab.get_name(i),objid,kind,sectdef.selection,sectdef.length,sectdef.checksum)
+                        else:
+                            self.__add_def(symtab.get_name(i),objid,kind,IMAGE_COMDAT_SELECT_NODUPLICATES,section.size)
+                    else:
+                        self.__add_def(symtab.get_name(i),objid,kind,0,section.size)
+                elif sectnum == 0 and values[i] != 0:
+                    self.__add_def(symtab.get_name(i),objid,kind,SYMINDEX_SELECT_COMMON,values[i])
+                elif sectnum == 0:
+                    self.__add_ref(symtab.get_name(i),objid)
+                elif sectnum < 0:
+                    # absolute (-1) and debug (-2) symbols
+                    self.__add_def(symtab.get_name(i),objid,kind)
+            elif storagecls == IMAGE_SYM_CLASS_WEAK_EXTERNAL:
+                self.__add_def(symtab.get_name(i),objid,SYMINDEX_KIND_WEAK)
+            i += 1 + numauxs[i]
+        return objid
+
+    def add_import(self,imphdr,name):
+        objid = len(self.objects)
+        self.objects.append(name)
+        # low 2 bits of type , 0 is code , which has the thunk and the __imp_ pointer
+        if (imphdr.type & 0x3) == 0:
+            self.__add_def(imphdr.name,objid,SYMINDEX_KIND_IMPORT)
+        self.__add_def('__imp_' + imphdr.name,objid,SYMINDEX_KIND_IMPORT)
+        return objid
+
+    def add_archive(self,arch):
+        for member, cffmt in arch.iter_members():
+            name = '%s(%s)'%(arch.fname,member.name)
+            if isinstance(cffmt,CoffImportHeader):
+                self.add_import(cffmt,name)
+            else:
+                self.add_coff(cffmt,name,SYMINDEX_KIND_MEMBER)
+                cffmt.close()
+        return
+
+    def add_file(self,fname):
+        # object or archive , by the magic of the file
+        with open(fname,'rb') as fin:
+            magic = fin.read(len(CoffArchive.magic))
+        if magic == CoffArchive.magic:
+            arch = CoffArchive(fname)
+            try:
+                self.add_archive(arch)
+            finally:
+                arch.close()
+        else:
+            cffmt = Coff(fname,mmap=True,parts=('sections','symbols'))
+            try:
+                self.add_coff(cffmt)
+            finally:
+                cffmt.close()
+        return
+
+    def merge(self,other):
+        # take every slot of other , such as the partial index of a worker , O(slots of other)
+        objoff = len(self.objects)
+        defoff = len(self.defobjs)
+        refoff = len(self.refobjs)
+        self.objects.extend(other.objects)
+        self.errors.update(other.errors)
+        self.defobjs.extend([o + objoff for o in other.defobjs])
+        self.defkinds.extend(other.defkinds)
+        self.defsels.extend(other.defsels)
+        self.deflens.extend(other.deflens)
+        self.defsums.extend(other.defsums)
+        self.defnext.extend([n + defoff if n >= 0 else -1 for n in other.defnext])
+        self.refobjs.extend([o + objoff for o in other.refobjs])
+        self.refnext.extend([n + refoff if n >= 0 else -1 for n in other.refnext])
+        self.__join(self.defined,other.defined,self.defnext,defoff)
+        self.__join(self.referenced,other.referenced,self.refnext,refoff)
+        return self
+
+    def __join(self,heads,otherheads,nexts,off):
+        for name in otherheads.keys():
+            last = otherheads[name] + off
+            first = heads.get(name,-1)
+            if first >= 0:
+                # the first slot of the other chain goes on to the chain here
+                cur = last
+                while nexts[cur] >= 0:
+                    cur = nexts[cur]
+                nexts[cur] = first
+            heads[name] = last
+        return
+
+    def __chain(self,idx,nexts):
+        rets = []
+        while idx >= 0:
+            rets.append(idx)
+            idx = nexts[idx]
+        rets.reverse()
+        return rets
+
+    def get_definitions(self,name):
+        # [(object,kind,selection,length,checksum)] in the order they were added
+        return [(self.objects[self.defobjs[i]],self.defkinds[i],self.defsels[i],self.deflens[i],self.defsums[i]) \
+            for i in self.__chain(self.defined.get(name,-1),self.defnext)]
+
+    def get_references(self,name):
+        return [self.objects[self.refobjs[i]] for i in self.__chain(self.referenced.get(name,-1),self.refnext)]
+
+    def __conflict(self,first,i):
+        # does slot i clash with the first definition , as the linker decides by the first selection
+        fsel = self.defsels[first]
+        sel = self.defsels[i]
+        if fsel == SYMINDEX_SELECT_COMMON or sel == SYMINDEX_SELECT_COMMON:
+            return False
+        if fsel == 0 or sel == 0:
+            return True
+        if fsel == IMAGE_COMDAT_SELECT_NODUPLICATES:
+            return True
+        if fsel == IMAGE_COMDAT_SELECT_SAME_SIZE:
+            return self.deflens[first] != self.deflens[i]
+        if fsel == IMAGE_COMDAT_SELECT_EXACT_MATCH:
+            return self.deflens[first] != self.deflens[i] or self.defsums[first] != self.defsums[i]
+        return False
+
+    def duplicates(self):
+        # yield (name,[objects]) for the names defined more than once by objects in a way the linker refuses
+        defkinds = self.defkinds
+        defnext = self.defnext
+        for name, idx in self.defined.items():
+            if defnext[idx] < 0:
+                continue
+            slots = [i for i in self.__chain(idx,defnext) if defkinds[i] == SYMINDEX_KIND_OBJECT]
+            if len(slots) < 2:
+                continue
+            for i in slots[1:]:
+                if self.__conflict(slots[0],i):
+                    yield name, [self.objects[self.defobjs[j]] for j in slots]
+                    break
+        return
+
+    def unresolved(self):
+        # yield (name,[objects]) for the names referenced and defined nowhere
+        for name, idx in self.referenced.items():
+            if name not in self.defined:
+                yield name, [self.objects[self.refobjs[i]] for i in self.__chain(idx,self.refnext)]
+        return
+
+    def __len__(self):
+        return len(self.defined)
+
+    def __str__(self):
+        return 'SymbolIndex(objects[%d];defined[%d];definitions[%d];referenced[%d];references[%d];errors[%d])'%(\
+            len(self.objects),len(self.defined),len(self.defobjs),len(self.referenced),len(self.refobjs),len(self.errors))
+
+    def __repr__(self):
+        return str(self)
+
+
+def _index_worker(fnames):
+    index = SymbolIndex()
+    for fname in fnames:
+        try:
+            index.add_file(fname)
+        except Exception as e:
+            index.errors[fname] = '%s'%(e)
+    return index
+
+def build(paths,workers=None,chunksize=16):
+    # SymbolIndex of objects and archives , every worker builds the index of its chunks and they are merged ,
+    # a file that fails goes to index.errors and the build goes on
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        return _index_worker(paths)
+    import concurrent.futures
+    index = SymbolIndex()
+    pathiter = iter(paths)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        while True:
+            while len(pending) < (workers * 2):
+                chunk = list(itertools.islice(pathiter,chunksize))
+                if len(chunk) == 0:
+                    break
+                pending.append(executor.submit(_index_worker,chunk))
+            if len(pending) == 0:
+                break
+            index.merge(pending.pop(0).result())
+    return index
@@ -0,0 +1,258 @@
+#! /usr/bin/env python
+
+import os
+import time
+import pickle
+import hashlib
+import tempfile
+
+from . import Coff, _RecordObject, IMAGE_SYM_CLASS_LABEL
+
+
+class IndexEntry(_RecordObject):
+    # one object of the tree in the manifest
+    # sections [(name,size,flags)]
+    # symbols {(name,secname) : (value,size,storagecls)} , labels are left out
+    keywords = ['path','mtime','size','digest','sections','symbols','error']
+    __slots__ = keywords
+    def __init__(self,path,mtime,size,digest=None):
+        self.path = path
+        self.mtime = mtime
+        self.size = size
+        self.digest = digest
+        self.sections = []
+        self.symbols = dict()
+        self.error = None
+        return
+
+    def __str__(self):
+        return 'IndexEntry(path[%s];mtime[%d];size[%d];sections[%d];symbols[%d];error[%s])'%(\
+            self.path,self.mtime,self.size,len(self.sections),len(self.symbols),self.error)
+
+
+class WatchReport(_RecordObject):
+    # what one IncrementalIndex.refresh found
+    # added , removed , changed are paths , errors is path to the parse error
+    # symbols is path to (added,removed,changed) lists of (name,secname)
+    keywords = ['added','removed','changed','errors','symbols']
+    __slots__ = keywords
+    def __init__(self):
+        self.added = []
+        self.removed = []
+        self.changed = []
+        self.errors = dict()
+        self.symbols = dict()
+        return
+
+    def is_empty(self):
+        return len(self.added) == 0 and len(self.removed) == 0 and len(self.changed) == 0
+
+    def __str__(self):
+        return 'WatchReport(added[%d];removed[%d];changed[%d];errors[%d];symbols[%d])'%(\
+            len(self.added),len(self.removed),len(self.changed),len(self.errors),\
+            sum([len(a) + len(r) + len(c) for a, r, c in self.symbols.values()]))
+
+
+def diff_symbols(oldsyms,newsyms):
+    added = [k for k in newsyms.keys() if k not in oldsyms]
+    removed = [k for k in oldsyms.keys() if k not in newsyms]
+    changed = [k for k in newsyms.keys() if k in oldsyms and oldsyms[k] != newsyms[k]]
+    return added, removed, changed
+
+
+class IncrementalIndex(object):
+    # manifest of the objects under root , refresh stats every file with os.scandir
+    # and only reads the ones whose (mtime,size) moved , and parses the ones whose hash moved
+    magic = b'COFFWTCH'
+    version = 1
+    def __init__(self,root,suffixes=('.obj','.o')):
+        self.root = os.path.abspath(root)
+        self.suffixes = tuple(suffixes)
+        self.entries = dict()
+        self.dirs = []
+        return
+
+    def __walk(self):
+        # (path,mtime,size) of every object under root , the directories are kept for the inotify watch
+        files = []
+        dirs = [self.root]
+        stack = [self.root]
+        while len(stack) > 0:
+            curdir = stack.pop()
+            try:
+                it = os.scandir(curdir)
+            except OSError:
+                continue
+            with it:
+                for de in it:
+                    try:
+                        if de.is_dir(follow_symlinks=False):
+                            stack.append(de.path)
+                            dirs.append(de.path)
+                        elif de.name.endswith(self.suffixes):
+                            st = de.stat()
+                            files.append((de.path,st.st_mtime_ns,st.st_size))
+                    except OSError:
+                        # removed while walking
+                        continue
+        self.dirs = dirs
+        return files
+
+    def __parse(self,entry,data):
+        entry.sections = []
+        entry.symbols = dict()
+        entry.error = None
+        try:
+            # closed on the error path too , the next rewrite of the file must not find it open
+            with Coff(entry.path,data=data,parts=('sections','symbols')) as cffmt:
+                for section in cffmt.sections:
+                    entry.sections.append((section.name,section.size,section.flags))
+                # straight from the columns , no CoffSymtable is made
+                symtab = cffmt.symboltable
+                get_name = symtab.get_name
+                values = symtab.values
+                sizes = symtab.sizes
+                storageclses = symtab.storageclses
+                symbols = entry.symbols
+                for seckey in cffmt.symtables.keys():
+                    secname = cffmt.sections[seckey].name
+                    for idx in cffmt.symtables[seckey].idxs:
+                        storagecls = storageclses[idx]
+                        if storagecls == IMAGE_SYM_CLASS_LABEL:
+                            continue
+                        symbols.setdefault((get_name(idx),secname),(values[idx],sizes[idx],storagecls))
+        except Exception as e:
+            entry.error = '%s'%(e)
+        return
+
+    def refresh(self):
+        report = WatchReport()
+        seen = set()
+        for path, mtime, size in self.__walk():
+            seen.add(path)
+            old = self.entries.get(path,None)
+            if old is not None and old.mtime == mtime and old.size == size:
+                continue
+            try:
+                with open(path,'rb') as fin:
+                    data = fin.read()
+            except OSError:
+                continue
+            digest = hashlib.blake2b(data,digest_size=16).digest()
+            if old is not None and old.digest == digest:
+                # touched , the content is the same
+                old.mtime = mtime
+                old.size = size
+                continue
+            entry = IndexEntry(path,mtime,size,digest)
+            self.__parse(entry,data)
+            if entry.error is not None:
+                report.errors[path] = entry.error
+            if old is None:
+                report.added.append(path)
+                report.symbols[path] = (list(entry.symbols.keys()),[],[])
+            else:
+                report.changed.append(path)
+                report.symbols[path] = diff_symbols(old.symbols,entry.symbols)
+            self.entries[path] = entry
+        if len(seen) != len(self.entries):
+            for path in list(self.entries.keys()):
+                if path not in seen:
+                    report.removed.append(path)
+                    report.symbols[path] = ([],list(self.entries[path].symbols.keys()),[])
+                    del self.entries[path]
+        return report
+
+    def get(self,path):
+        return self.entries.get(os.path.abspath(path),None)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def save(self,fname):
+        # write to a temporary file and rename , so a reader never sees half a manifest
+        dirname = os.path.dirname(os.path.abspath(fname))
+        fd, tmpname = tempfile.mkstemp(dir=dirname,suffix='.tmp')
+        try:
+            with os.fdopen(fd,'wb') as fout:
+                fout.write(self.__class__.magic)
+                pickle.dump((self.__class__.version,self.root,self.suffixes,\
+                    [(e.path,e.mtime,e.size,e.digest,e.sections,e.symbols,e.error) for e in self.entries.values()]),\
+                    fout,protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmpname,fname)
+        except:
+            try:
+                os.remove(tmpname)
+            except OSError:
+                pass
+            raise
+        return
+
+    @classmethod
+    def load(cls,fname):
+        with open(fname,'rb') as fin:
+            if fin.read(len(cls.magic)) != cls.magic:
+                raise Exception('[%s] not a manifest'%(fname))
+            version, root, suffixes, entries = pickle.load(fin)
+        if version != cls.version:
+            raise Exception('[%s] manifest version [%d] != [%d]'%(fname,version,cls.version))
+        self = cls(root,suffixes)
+        for path, mtime, size, digest, sections, symbols, error in entries:
+            entry = IndexEntry(path,mtime,size,digest)
+            entry.sections = sections
+            entry.symbols = symbols
+            entry.error = error
+            self.entries[path] = entry
+        return self
+
+    def __str__(self):
+        return 'IncrementalIndex(root[%s];entries[%d])'%(self.root,len(self.entries))
+
+    def __repr__(self):
+        return str(self)
+
+
+def _inotify_waiter(index,interval):
+    # block until something changes under the directories of index , None when inotify_simple is missing
+    try:
+        import inotify_simple
+    except ImportError:
+        return None
+    notify = inotify_simple.INotify()
+    mask = inotify_simple.flags.CLOSE_WRITE | inotify_simple.flags.MOVED_TO | inotify_simple.flags.MOVED_FROM | \
+        inotify_simple.flags.DELETE | inotify_simple.flags.CREATE
+    watched = set()
+    def waiter():
+        for d in index.dirs:
+            if d not in watched:
+                try:
+                    notify.add_watch(d,mask)
+                    watched.add(d)
+                except OSError:
+                    pass
+        events = notify.read(timeout=int(interval * 1000))
+        if len(events) > 0:
+            # one build writes many files , take them all in one refresh
+            time.sleep(0.05)
+            notify.read(timeout=0)
+        return
+    return waiter
+
+def watch(root,interval=1.0,suffixes=('.obj','.o'),index=None,inotify=True):
+    # yield a WatchReport every time the objects under root change ,
+    # poll every interval seconds , or wait on inotify when inotify_simple is installed
+    if index is None:
+        index = IncrementalIndex(root,suffixes)
+        index.refresh()
+    waiter = None
+    if inotify:
+        waiter = _inotify_waiter(index,interval)
+    while True:
+        if waiter is not None:
+            waiter()
+        else:
+            time.sleep(interval)
+        report = index.refresh()
+        if not report.is_empty():
+            yield report
+    return
@@ -0,0 +1,394 @@
+#! /usr/bin/env python
+
+import os
+import struct
+import itertools
+import tempfile
+
+from . import Coff, CoffBigHeader, CoffSectionHeader, CoffReloc, StringTable, SymbolTable, coff_map_file, coff_section_defs, \
+    IMAGE_SCN_LNK_NRELOC_OVFL, IMAGE_SCN_CNT_UNINITIALIZED_DATA, \
+    IMAGE_SYM_CLASS_EXTERNAL, IMAGE_SYM_CLASS_STATIC, IMAGE_SYM_CLASS_FUNCTION, IMAGE_SYM_CLASS_WEAK_EXTERNAL, \
+    IMAGE_COMDAT_SELECT_ASSOCIATIVE
+
+# the sections strip_debug removes , codeview symbols , types , precompiled types and the checksums
+COFF_DEBUG_SECTIONS = ('.debug$S','.debug$T','.debug$P','.debug$F','.debug$H','.chks64')
+
+# line number record , symbol index when the line is 0 , else the address
+COFF_LINENO_FMT = '<LH'
+COFF_LINENO_SIZE = 6
+
+COFF_BASE64 = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+
+def coff_section_stroff(name):
+    # offset in the string table of a section name like /123 or //AAAAAA , -1 for the short names
+    if name.startswith('//'):
+        off = 0
+        for c in name[2:]:
+            off = off * 64 + COFF_BASE64.index(c)
+        return off
+    if name.startswith('/') and name[1:].isdigit():
+        return int(name[1:])
+    return -1
+
+def coff_section_strname(off):
+    if off <= 9999999:
+        return ('/%d'%(off)).encode('utf8')
+    s = ''
+    while off > 0:
+        s = COFF_BASE64[off % 64] + s
+        off //= 64
+    return ('//' + s.rjust(6,'A')).encode('utf8')
+
+
+class CoffWriter(object):
+    # writes an object without some of its sections , the section numbers of the symbols ,
+    # the associative COMDAT numbers , the symbol indexes of the relocations and the string
+    # table are fixed , the data of the kept sections is copied straight from the mapping
+    def __init__(self,fname):
+        self.fname = fname
+        self.__mmap = coff_map_file(fname)
+        self.__view = memoryview(self.__mmap)
+        # only the headers and the columns of the symbol table , the symbols are not grouped by section
+        self.cffmt = Coff(fname,data=self.__view,parts=('sections',))
+        self.header = self.cffmt.header
+        self.sections = self.cffmt.sections
+        stroff = self.header.symtab + self.header.symnums * self.header.symsize
+        if (stroff + 4) > len(self.__view):
+            raise Exception('[%s] string table [0x%x] > [0x%x]'%(fname,stroff,len(self.__view)))
+        self.strtable = StringTable(self.__view,stroff,struct.unpack('<L',self.__view[stroff:(stroff + 4)])[0])
+        self.symboltable = SymbolTable(self.__view,self.header.symtab,self.header.symnums,self.strtable,self.header.symfmt)
+        self.removed = set()
+        return
+
+    def get_section_name(self,seckey):
+        # long names are looked up in the string table
+        name = self.sections[seckey].name
+        off = coff_section_stroff(name)
+        if off >= 0:
+            return self.strtable.get_string(off)
+        return name
+
+    def remove_section(self,seckey):
+        if seckey < 0 or seckey >= len(self.sections):
+            raise Exception('[%s] no section [%d]'%(self.fname,seckey))
+        self.removed.add(seckey)
+        return
+
+    def remove_sections(self,names):
+        # every section with one of names , returns how many
+        cnt = 0
+        for seckey in range(len(self.sections)):
+            if self.get_section_name(seckey) in names:
+                self.remove_section(seckey)
+                cnt += 1
+        return cnt
+
+    def strip_debug(self):
+        return self.remove_sections(COFF_DEBUG_SECTIONS)
+
+    def __get_removed(self):
+        # the COMDAT sections associated with a removed section go with it
+        removed = set(self.removed)
+        sectdefs = coff_section_defs(self.symboltable,len(self.sections),isinstance(self.header,CoffBigHeader))
+        while True:
+            more = [seckey for seckey, sectdef in sectdefs.items() if seckey not in removed and \
+                sectdef.selection == IMAGE_COMDAT_SELECT_ASSOCIATIVE and (sectdef.number - 1) in removed]
+            if len(more) == 0:
+                break
+            removed.update(more)
+        return removed
+
+    def __get_relrange(self,section):
+        # (offset,records) of the raw relocations , the overflow count record included
+        if section.offrel == 0:
+            return 0, 0
+        numrels = section.numrels
+        if (section.flags & IMAGE_SCN_LNK_NRELOC_OVFL) != 0 and numrels == 0xffff:
+            numrels = struct.unpack('<L',self.__view[section.offrel:(section.offrel + 4)])[0]
+        return section.offrel, numrels
+
+    def __map_symbols(self,secmap):
+        # old symbol index to the new one , -1 for the records of removed sections ,
+        # keeps is 1 for every record kept and primaries are the kept symbols without their aux records
+        symtab = self.symboltable
+        sectnums = symtab.sectnums
+        numauxs = symtab.numauxs
+        keeps = bytearray(symtab.symnums)
+        primaries = []
+        i = 0
+        while i < symtab.symnums:
+            sectnum = sectnums[i]
+            num = 1 + numauxs[i]
+            if sectnum > len(secmap):
+                raise Exception('[%s] symbol [%d] sectnum [%d] > [%d] sections'%(self.fname,i,sectnum,len(secmap)))
+            if sectnum <= 0 or secmap[sectnum - 1] >= 0:
+                if num == 1:
+                    keeps[i] = 1
+                else:
+                    keeps[i:(i + num)] = b'\x01' * num
+                primaries.append(i)
+            i += num
+        symmap = [n - 1 if k else -1 for n, k in zip(itertools.accumulate(keeps),keeps)]
+        return symmap, keeps, primaries
+
+    def __map_strings(self,primaries,keepsects):
+        # new string table with only the names still used , old offset to the new one
+        symtab = self.symboltable
+        strtab = self.strtable
+        stroff = strtab.stroff
+        strend = strtab.strend
+        newtab = bytearray(4)
+        offmap = dict()
+        seen = dict()
+        def add(off):
+            newoff = offmap.get(off,None)
+            if newoff is None:
+                start = stroff + off
+                if start < stroff + 4 or start >= strend:
+                    raise Exception('[%s] string offset [0x%x] out of table'%(self.fname,off))
+                end = self.__mmap.find(b'\0',start,strend)
+                if end < 0:
+                    end = strend
+                raw = bytes(self.__view[start:end])
+                newoff = seen.get(raw,None)
+                if newoff is None:
+                    newoff = len(newtab)
+                    newtab.extend(raw + b'\0')
+                    seen[raw] = newoff
+                offmap[off] = newoff
+            return newoff
+        for seckey in keepsects:
+            off = coff_section_stroff(self.sections[seckey].name)
+            if off >= 0:
+                add(off)
+        nameoffs = symtab.nameoffs
+        for off in dict.fromkeys([nameoffs[i] for i in primaries if nameoffs[i] >= 0]):
+            add(off)
+        newtab[0:4] = struct.pack('<L',len(newtab))
+        return bytes(newtab), offmap
+
+    def __map_lineno(self,lnmap,off):
+        # file offset of a line number record to the one in the new file , 0 when it is gone
+        for oldstart, oldend, newstart in lnmap:
+            if off >= oldstart and off < oldend:
+                return newstart + (off - oldstart)
+        return 0
+
+    def __get_symbols(self,secmap,symmap,keeps,primaries,offmap,lnmap):
+        # the new symbol table , every record is packed again from the columns , which gives
+        # the same bytes for the aux records , then the kept symbols get their section numbers ,
+        # names and first aux record fixed
+        symtab = self.symboltable
+        bigobj = isinstance(self.header,CoffBigHeader)
+        recsize = self.header.symsize
+        symoff = self.header.symtab
+        view = self.__view
+        rawnames = symtab.rawnames
+        sectnums = symtab.sectnums
+        numauxs = symtab.numauxs
+        nameoffs = symtab.nameoffs
+        newsects = list(sectnums)
+        for i in primaries:
+            if sectnums[i] > 0:
+                newsects[i] = secmap[sectnums[i] - 1] + 1
+        names = [rawnames[j:(j + 8)] for j in range(0,symtab.symnums * 8,8)]
+        if offmap is not None:
+            for i in primaries:
+                if nameoffs[i] >= 0:
+                    names[i] = struct.pack('<LL',0,offmap[nameoffs[i]])
+        recs = list(map(struct.Struct(self.header.symfmt).pack,names,symtab.values,newsects,symtab.types,symtab.storageclses,numauxs))
+        for i in primaries:
+            if numauxs[i] > 0:
+                off = symoff + (i + 1) * recsize
+                aux = bytearray(view[off:(off + recsize)])
+                self.__fix_aux(aux,i,sectnums[i],symtab.storageclses[i],symmap,secmap,lnmap,bigobj)
+                recs[i + 1] = bytes(aux)
+        return b''.join(itertools.compress(recs,keeps))
+
+    def __fix_aux(self,aux,i,sectnum,storagecls,symmap,secmap,lnmap,bigobj):
+        symtab = self.symboltable
+        if storagecls == IMAGE_SYM_CLASS_STATIC and sectnum > 0 and symtab.values[i] == 0 and symtab.types[i] == 0:
+            # section definition , the associated section number of an associative COMDAT ,
+            # some writers put the number of the section itself in the others
+            number, selection = struct.unpack('<HB',aux[12:15])
+            if bigobj:
+                number |= struct.unpack('<H',aux[16:18])[0] << 16
+            if number > 0 and number <= len(secmap):
+                number = max(secmap[number - 1] + 1,0)
+                struct.pack_into('<H',aux,12,number & 0xffff)
+                if bigobj:
+                    struct.pack_into('<H',aux,16,number >> 16)
+        elif storagecls == IMAGE_SYM_CLASS_WEAK_EXTERNAL:
+            tag = struct.unpack('<L',aux[0:4])[0]
+            if tag < len(symmap):
+                if symmap[tag] < 0:
+                    raise Exception('[%s] weak external [%s] falls back to removed symbol [%d]'%(self.fname,symtab.get_name(i),tag))
+                struct.pack_into('<L',aux,0,symmap[tag])
+        elif (storagecls == IMAGE_SYM_CLASS_EXTERNAL and sectnum > 0 and (symtab.types[i] & 0x30) == 0x20) or \
+            (storagecls == IMAGE_SYM_CLASS_FUNCTION and symtab.get_name(i) == '.bf'):
+            # function definition and .bf , tag index , size , line numbers and next function
+            tag, size, lnptr, nextfunc = struct.unpack('<LLLL',aux[0:16])
+            if storagecls == IMAGE_SYM_CLASS_EXTERNAL:
+                if tag > 0 and tag < len(symmap):
+                    struct.pack_into('<L',aux,0,max(symmap[tag],0))
+                if lnptr > 0:
+                    struct.pack_into('<L',aux,8,self.__map_lineno(lnmap,lnptr))
+            if nextfunc > 0 and nextfunc < len(symmap):
+                struct.pack_into('<L',aux,12,max(symmap[nextfunc],0))
+        return
+
+    def __get_relocs(self,section,symmap,identity):
+        offrel, numrels = self.__get_relrange(section)
+        raw = self.__view[offrel:(offrel + numrels * CoffReloc.headersize)]
+        if identity or numrels == 0:
+            return raw
+        first = b''
+        if (section.flags & IMAGE_SCN_LNK_NRELOC_OVFL) != 0 and section.numrels == 0xffff:
+            # the count record keeps its place and is not a relocation
+            first = bytes(raw[:CoffReloc.headersize])
+            raw = raw[CoffReloc.headersize:]
+        relfmt = struct.Struct('<LLH')
+        vaddrs, symidxs, types = zip(*relfmt.iter_unpack(raw))
+        newidxs = [symmap[idx] if idx < len(symmap) else -1 for idx in symidxs]
+        if min(newidxs) < 0:
+            idx = symidxs[newidxs.index(-1)]
+            raise Exception('[%s] relocation in [%s] to symbol [%d] of a removed section'%(self.fname,section.name,idx))
+        return first + b''.join(map(relfmt.pack,vaddrs,newidxs,types))
+
+    def __get_linenos(self,section,symmap,identity):
+        raw = self.__view[section.lineentries:(section.lineentries + section.numlnno * COFF_LINENO_SIZE)]
+        if identity:
+            return raw
+        raw = bytearray(raw)
+        for i, (addr, lineno) in enumerate(struct.iter_unpack(COFF_LINENO_FMT,raw)):
+            if lineno == 0:
+                struct.pack_into('<L',raw,i * COFF_LINENO_SIZE,max(symmap[addr],0) if addr < len(symmap) else addr)
+        return bytes(raw)
+
+    def write(self,fname,bufsize=(1 << 20)):
+        # write the new object to fname , through a temporary file so fname is never half written ,
+        # when fname is the object read the writer is closed before it is replaced
+        if self.__mmap is None:
+            raise Exception('[%s] already closed'%(self.fname))
+        removed = self.__get_removed()
+        secmap = []
+        keepsects = []
+        for seckey in range(len(self.sections)):
+            if seckey in removed:
+                secmap.append(-1)
+            else:
+                secmap.append(len(keepsects))
+                keepsects.append(seckey)
+        symmap, keeps, primaries = self.__map_symbols(secmap)
+        newsyms = keeps.count(1)
+        identity = (newsyms == len(symmap))
+        if identity:
+            # no symbol is gone , the names keep their offsets
+            strtab, offmap = self.strtable.get_bytes(), None
+        else:
+            strtab, offmap = self.__map_strings(primaries,keepsects)
+
+        hdr = self.header
+        sectoff = hdr.get_size() + hdr.optsize
+        headers = bytearray(self.__view[:sectoff])
+        # every piece of the new file , in order , as (new offset , bytes)
+        cur = sectoff + len(keepsects) * CoffSectionHeader.headersize
+        pieces = []
+        lnmap = []
+        sechdrs = []
+        for seckey in keepsects:
+            section = self.sections[seckey]
+            off = sectoff + seckey * CoffSectionHeader.headersize
+            sechdr = bytearray(self.__view[off:(off + CoffSectionHeader.headersize)])
+            stroff = coff_section_stroff(section.name)
+            if stroff >= 0 and offmap is not None:
+                sechdr[0:8] = coff_section_strname(offmap[stroff]).ljust(8,b'\0')
+            offdata = 0
+            if section.offdata != 0 and section.size > 0 and (section.flags & IMAGE_SCN_CNT_UNINITIALIZED_DATA) == 0:
+                offdata = cur
+                pieces.append(self.__view[section.offdata:(section.offdata + section.size)])
+                cur += section.size
+            offrel = 0
+            relocs = self.__get_relocs(section,symmap,identity)
+            if len(relocs) > 0:
+                offrel = cur
+                pieces.append(relocs)
+                cur += len(relocs)
+            offlnno = 0
+            if section.lineentries != 0 and section.numlnno > 0:
+                offlnno = cur
+                lnmap.append((section.lineentries,section.lineentries + section.numlnno * COFF_LINENO_SIZE,cur))
+                pieces.append(self.__get_linenos(section,symmap,identity))
+                cur += section.numlnno * COFF_LINENO_SIZE
+            struct.pack_into('<lll',sechdr,20,offdata,offrel,offlnno)
+            sechdrs.append(bytes(sechdr))
+        symoff = cur
+        symbols = self.__get_symbols(secmap,symmap,keeps,primaries,offmap,lnmap)
+        if isinstance(hdr,CoffBigHeader):
+            struct.pack_into('<LLL',headers,44,len(keepsects),symoff,newsyms)
+        else:
+            struct.pack_into('<H',headers,2,len(keepsects))
+            struct.pack_into('<ll',headers,8,symoff,newsyms)
+
+        dirname = os.path.dirname(os.path.abspath(fname))
+        fd, tmpname = tempfile.mkstemp(dir=dirname,suffix='.tmp')
+        try:
+            with os.fdopen(fd,'wb',buffering=bufsize) as fout:
+                fout.write(headers)
+                fout.write(b''.join(sechdrs))
+                for piece in pieces:
+                    fout.write(piece)
+                fout.write(symbols)
+                fout.write(strtab)
+            if os.path.normcase(os.path.abspath(fname)) == os.path.normcase(os.path.abspath(self.fname)):
+                # the pieces are slices of the mapping , windows does not replace a mapped file
+                pieces = piece = relocs = None
+                self.close()
+            os.replace(tmpname,fname)
+        except:
+            try:
+                os.remove(tmpname)
+            except OSError:
+                pass
+            raise
+        return symoff + len(symbols) + len(strtab)
+
+    def close(self):
+        if self.cffmt is not None:
+            self.cffmt.close()
+            self.cffmt = None
+        # they keep slices of the mapping
+        self.strtable = None
+        self.symboltable = None
+        if self.__mmap is not None:
+            try:
+                self.__view.release()
+                self.__mmap.close()
+            except BufferError:
+                pass
+            self.__mmap = None
+            self.__view = None
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,exctype,excvalue,tb):
+        self.close()
+        return
+
+    def __str__(self):
+        return 'CoffWriter(fname[%s];sections[%d];removed[%d])'%(self.fname,len(self.sections),len(self.removed))
+
+    def __repr__(self):
+        return str(self)
+
+
+def strip(fname,outname=None,names=COFF_DEBUG_SECTIONS,bufsize=(1 << 20)):
+    # write fname without the sections of names to outname , fname itself when outname is None
+    if outname is None:
+        outname = fname
+    with CoffWriter(fname) as writer:
+        writer.remove_sections(names)
+        return writer.write(outname,bufsize)
@@ -0,0 +1,79 @@
+#! /usr/bin/env python
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..'))
+import coffobj
+import coff
+
+
+def make_member(name):
+	builder = coffobj.ObjectBuilder()
+	sectnum = builder.add_section('.text',b'\xc3' * 16)
+	builder.add_section_symbol(sectnum)
+	builder.add_symbol(name,0,sectnum,0x20)
+	return builder.build()
+
+# an odd count of members , the offsets of the second linker member are 4 bytes each
+MEMBERS = [('one.obj',make_member('one')),('a_very_long_member_name.obj',make_member('two')),('three.obj',make_member('three'))]
+SYMBOLS = [('one',0),('two',1),('three',2)]
+
+
+class ArchiveTest(unittest.TestCase):
+	def setUp(self):
+		self.tmpdir = tempfile.mkdtemp()
+		return
+
+	def tearDown(self):
+		shutil.rmtree(self.tmpdir)
+		return
+
+	def __write(self,fname,data):
+		fname = os.path.join(self.tmpdir,fname)
+		with open(fname,'wb') as fout:
+			fout.write(data)
+		return fname
+
+	def __check(self,fname):
+		with coff.CoffArchive(fname) as lib:
+			self.assertEqual([member.name for member in lib.members],[name for name, data in MEMBERS])
+			offsets = [member.offset for member in lib.members]
+			self.assertEqual(lib.symbols,dict([(name,offsets[idx]) for name, idx in SYMBOLS]))
+			self.assertEqual(lib.find_symbol('two'),offsets[1])
+			self.assertIsNone(lib.find_symbol('four'))
+			cffmt = lib.get_symbol_member('three')
+			self.assertIn('three',[sym.name for sym in cffmt.symtables[0]])
+		return
+
+	def test_both_linkers(self):
+		self.__check(self.__write('both.lib',coffobj.make_archive(MEMBERS,SYMBOLS)))
+		return
+
+	def test_even_members(self):
+		members = MEMBERS + [('four.obj',make_member('four'))]
+		fname = self.__write('even.lib',coffobj.make_archive(members,SYMBOLS + [('four',3)]))
+		with coff.CoffArchive(fname) as lib:
+			self.assertEqual(lib.find_symbol('four'),lib.members[3].offset)
+			self.assertEqual(lib.find_symbol('one'),lib.members[0].offset)
+		return
+
+	def test_first_linker(self):
+		self.__check(self.__write('first.lib',coffobj.make_archive(MEMBERS,SYMBOLS,second=False)))
+		return
+
+	def test_map_members(self):
+		fname = self.__write('map.lib',coffobj.make_archive(MEMBERS,SYMBOLS))
+		with coff.CoffArchive(fname) as lib:
+			serial = [(member.name,str(summary)) for member, summary in lib.map_members()]
+			parallel = [(member.name,str(summary)) for member, summary in lib.map_members(workers=2,chunksize=1)]
+		self.assertEqual(serial,parallel)
+		self.assertEqual(len(serial),len(MEMBERS))
+		return
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,162 @@
+#! /usr/bin/env python
+
+import sys
+import os
+import struct
+import random
+import argparse
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..','..','src'))
+import coff
+
+AMD64_RELOCS = [coff.IMAGE_REL_AMD64_ADDR64,coff.IMAGE_REL_AMD64_ADDR32NB,coff.IMAGE_REL_AMD64_REL32,coff.IMAGE_REL_AMD64_REL32_4,coff.IMAGE_REL_AMD64_SECREL,coff.IMAGE_REL_AMD64_SECTION]
+I386_RELOCS = [coff.IMAGE_REL_I386_DIR32,coff.IMAGE_REL_I386_DIR32NB,coff.IMAGE_REL_I386_REL32,coff.IMAGE_REL_I386_SECREL,coff.IMAGE_REL_I386_SECTION]
+
+TEXT_FLAGS = coff.IMAGE_SCN_CNT_CODE | coff.IMAGE_SCN_MEM_EXECUTE | coff.IMAGE_SCN_MEM_READ | coff.IMAGE_SCN_ALIGN_16BYTES
+DATA_FLAGS = coff.IMAGE_SCN_CNT_INITIALIZED_DATA | coff.IMAGE_SCN_MEM_READ | coff.IMAGE_SCN_MEM_WRITE | coff.IMAGE_SCN_ALIGN_8BYTES
+DEBUG_FLAGS = coff.IMAGE_SCN_CNT_INITIALIZED_DATA | coff.IMAGE_SCN_MEM_DISCARDABLE | coff.IMAGE_SCN_MEM_READ | coff.IMAGE_SCN_ALIGN_1BYTES
+
+
+def signed32(v):
+	return struct.unpack('<l',struct.pack('<L',v & 0xffffffff))[0]
+
+class CoffGenerator(object):
+	# deterministic object file , the same arguments always give the same bytes
+	#   sections   : .text$mn (some COMDAT) , .data , .debug$S , every one with its section symbol and aux record
+	#   symbols    : externals , statics , labels , undefined externals , some functions with an aux record
+	#   longratio  : part of the symbol names longer than 8 bytes , so in the string table
+	#   relocs     : relocations of every .text and .data section
+	def __init__(self,machine=0x8664,numsects=8,numsyms=1000,numrels=100,longratio=0.3,auxratio=0.05,comdatratio=0.5,secsize=0x1000,seed=0):
+		self.machine = machine
+		self.numsects = numsects
+		self.numsyms = numsyms
+		self.numrels = numrels
+		self.longratio = longratio
+		self.auxratio = auxratio
+		self.comdatratio = comdatratio
+		self.secsize = secsize
+		self.rnd = random.Random(seed)
+		self.strtab = bytearray(4)
+		return
+
+	def __name(self,name):
+		b = name.encode('utf8')
+		if len(b) <= 8:
+			return b.ljust(8,b'\0')
+		off = len(self.strtab)
+		self.strtab += b + b'\0'
+		return struct.pack('<LL',0,off)
+
+	def __symbol(self,name,value,sectnum,type,storagecls,auxs=()):
+		rec = self.__name(name) + struct.pack('<lhHBB',value,sectnum,type,storagecls,len(auxs))
+		for aux in auxs:
+			rec += aux.ljust(coff.CoffSymtable.headersize,b'\0')
+		return rec, 1 + len(auxs)
+
+	def __sections(self):
+		rets = []
+		for i in range(self.numsects):
+			kind = i % 4
+			if kind == 3:
+				name, flags = '.debug$S', DEBUG_FLAGS
+			elif kind == 2:
+				name, flags = '.data', DATA_FLAGS
+			else:
+				name, flags = '.text$mn', TEXT_FLAGS
+				if self.rnd.random() < self.comdatratio:
+					flags |= coff.IMAGE_SCN_LNK_COMDAT
+			size = self.rnd.randint(self.secsize // 2,self.secsize)
+			numrels = 0
+			if (flags & coff.IMAGE_SCN_MEM_DISCARDABLE) == 0:
+				numrels = min(self.numrels,0xffff)
+			rets.append(dict(name=name,flags=flags,size=size,numrels=numrels,data=bytes(self.rnd.getrandbits(8) for _ in range(64)) * (size // 64) + b'\xcc' * (size % 64)))
+		return rets
+
+	def generate(self):
+		rnd = self.rnd
+		sections = self.__sections()
+		symbytes = bytearray()
+		rawidx = []
+		nrec = 0
+		# section symbols with the section definition aux record
+		for i, section in enumerate(sections):
+			sel = 0
+			if section['flags'] & coff.IMAGE_SCN_LNK_COMDAT:
+				sel = coff.IMAGE_COMDAT_SELECT_ANY
+			aux = struct.pack('<LHHLHBB',section['size'],section['numrels'],0,rnd.getrandbits(32),i + 1 if sel else 0,sel,0)
+			rec, num = self.__symbol(section['name'],0,i + 1,0,coff.IMAGE_SYM_CLASS_STATIC,[aux])
+			symbytes += rec
+			rawidx.append(nrec)
+			nrec += num
+		classes = [coff.IMAGE_SYM_CLASS_EXTERNAL,coff.IMAGE_SYM_CLASS_STATIC,coff.IMAGE_SYM_CLASS_LABEL,coff.IMAGE_SYM_CLASS_LABEL]
+		for j in range(self.numsyms - len(sections)):
+			if rnd.random() < self.longratio:
+				name = '?generated_function_%d@@YAXPEAUcontext@@H@Z'%(j)
+			else:
+				name = 'f%d'%(j)
+			seckey = rnd.randrange(len(sections) + 1) - 1
+			if seckey < 0:
+				# undefined external
+				rec, num = self.__symbol(name,0,0,0x20,coff.IMAGE_SYM_CLASS_EXTERNAL)
+			else:
+				storagecls = rnd.choice(classes)
+				value = rnd.randrange(sections[seckey]['size'])
+				auxs = []
+				if storagecls == coff.IMAGE_SYM_CLASS_EXTERNAL and rnd.random() < self.auxratio:
+					# function definition aux : tag , size , line numbers , next function
+					auxs.append(struct.pack('<LLLL',0,rnd.randint(1,0x100),0,0))
+				rec, num = self.__symbol(name,value,seckey + 1,0x20 if len(auxs) > 0 else 0,storagecls,auxs)
+			symbytes += rec
+			rawidx.append(nrec)
+			nrec += num
+		if self.machine == 0x14c:
+			reltypes = I386_RELOCS
+		else:
+			reltypes = AMD64_RELOCS
+		hdrsize = coff.CoffHeader.headersize + len(sections) * coff.CoffSectionHeader.headersize
+		body = bytearray()
+		sechdrs = bytearray()
+		for section in sections:
+			offdata = hdrsize + len(body)
+			body += section['data']
+			numrels = section['numrels']
+			offrel = 0
+			if numrels > 0:
+				offrel = hdrsize + len(body)
+				for r in range(numrels):
+					body += struct.pack('<LLH',rnd.randrange(section['size'] - 8),rnd.choice(rawidx),rnd.choice(reltypes))
+			sechdrs += section['name'].encode('utf8').ljust(8,b'\0')
+			sechdrs += struct.pack('<llllllHHl',0,0,section['size'],offdata,offrel,0,numrels,0,signed32(section['flags']))
+		symoff = hdrsize + len(body)
+		self.strtab[0:4] = struct.pack('<L',len(self.strtab))
+		header = struct.pack('<HHiiiHH',self.machine,len(sections),0,symoff,nrec,0,0)
+		return bytes(header + sechdrs + body + symbytes + self.strtab)
+
+def make_coff(fname,**kwargs):
+	data = CoffGenerator(**kwargs).generate()
+	with open(fname,'wb') as fout:
+		fout.write(data)
+	return len(data)
+
+def main():
+	parser = argparse.ArgumentParser(description='write a deterministic synthetic coff object')
+	parser.add_argument('output')
+	parser.add_argument('-m','--machine',default='amd64',choices=['amd64','i386'])
+	parser.add_argument('-S','--sections',type=int,default=8)
+	parser.add_argument('-n','--symbols',type=int,default=1000)
+	parser.add_argument('-r','--relocs',type=int,default=100,help='relocations in every code and data section')
+	parser.add_argument('-l','--longratio',type=float,default=0.3)
+	parser.add_argument('-a','--auxratio',type=float,default=0.05)
+	parser.add_argument('-s','--seed',type=int,default=0)
+	args = parser.parse_args()
+	machine = 0x8664
+	if args.machine == 'i386':
+		machine = 0x14c
+	size = make_coff(args.output,machine=machine,numsects=args.sections,numsyms=args.symbols,numrels=args.relocs,\
+		longratio=args.longratio,auxratio=args.auxratio,seed=args.seed)
+	sys.stdout.write('[%s] %d bytes\n'%(args.output,size))
+	sys.exit(0)
+	return
+
+if __name__ == '__main__':
+	main()
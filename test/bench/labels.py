@@ -0,0 +1,103 @@
+#! /usr/bin/env python
+
+import sys
+import os
+import struct
+import random
+import tempfile
+import time
+import argparse
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..','..','src'))
+import coff
+
+
+def make_labels_coff(fname,numlabels,funcevery,seed):
+	rnd = random.Random(seed)
+	secsize = numlabels * 4 + 0x100
+	strtab = b''
+	syms = b''
+	numsyms = 0
+	for i in range(numlabels):
+		if (i % funcevery) == 0:
+			storagecls = coff.IMAGE_SYM_CLASS_EXTERNAL
+		else:
+			storagecls = coff.IMAGE_SYM_CLASS_LABEL
+		name = ('$LN%d'%(i)).encode('utf8')
+		if len(name) > 8:
+			nameraw = struct.pack('<II',0,len(strtab) + 4)
+			strtab += name + b'\0'
+		else:
+			nameraw = name.ljust(8,b'\0')
+		value = rnd.randint(0,secsize - 1)
+		syms += nameraw + struct.pack('<lhHBB',value,1,0,storagecls,0)
+		numsyms += 1
+	offdata = coff.CoffHeader.headersize + coff.CoffSectionHeader.headersize
+	symtab = offdata + secsize
+	data = struct.pack('<HHiiiHH',0x8664,1,0,symtab,numsyms,0,0)
+	data += b'.text'.ljust(8,b'\0') + struct.pack('<llllllHHl',0,0,secsize,offdata,0,0,0,0,coff.IMAGE_SCN_CNT_CODE)
+	data += b'\xcc' * secsize
+	data += syms
+	data += struct.pack('<I',len(strtab) + 4) + strtab
+	with open(fname,'wb') as fout:
+		fout.write(data)
+	return
+
+def reference_sizes(valuetble,secsize):
+	# the nested loop the size pass used before , without the logging
+	sizes = []
+	idx = 0
+	for value,storagecls in valuetble:
+		size = 0
+		nidx = idx + 1
+		while nidx < len(valuetble):
+			if storagecls != coff.IMAGE_SYM_CLASS_LABEL and valuetble[nidx][1] != coff.IMAGE_SYM_CLASS_LABEL:
+				size = valuetble[nidx][0] - value
+				break
+			elif storagecls == coff.IMAGE_SYM_CLASS_LABEL:
+				size = valuetble[nidx][0] - value
+				break
+			nidx += 1
+		if nidx >= len(valuetble):
+			size = secsize - value
+		sizes.append(size)
+		idx += 1
+	return sizes
+
+def main():
+	parser = argparse.ArgumentParser(description='size pass benchmark on a synthetic section full of labels')
+	parser.add_argument('-n','--labels',type=int,default=100000)
+	parser.add_argument('-f','--funcevery',type=int,default=1000)
+	parser.add_argument('-s','--seed',type=int,default=0)
+	args = parser.parse_args()
+	fd, fname = tempfile.mkstemp(suffix='.obj')
+	os.close(fd)
+	try:
+		make_labels_coff(fname,args.labels,args.funcevery,args.seed)
+		stime = time.time()
+		cffmt = coff.Coff(fname)
+		parsetime = time.time() - stime
+		syms = cffmt.symtables[0]
+		section = cffmt.sections[0]
+		valuetble = [(sym.value,sym.storagecls) for sym in syms]
+		stime = time.time()
+		sizes = reference_sizes(valuetble,section.size)
+		reftime = time.time() - stime
+		bad = 0
+		idx = 0
+		for sym in syms:
+			if sym.size != sizes[idx]:
+				if bad < 10:
+					sys.stderr.write('[%d] %s reference size [0x%x]\n'%(idx,sym,sizes[idx]))
+				bad += 1
+			idx += 1
+		sys.stdout.write('labels [%d] parse [%.3fs] reference size pass [%.3fs] mismatch [%d]\n'%(len(syms),parsetime,reftime,bad))
+	finally:
+		os.remove(fname)
+	if bad > 0:
+		sys.exit(1)
+	sys.exit(0)
+	return
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,139 @@
+#! /usr/bin/env python
+
+import sys
+import os
+import time
+import json
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+import argparse
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..','..','src'))
+sys.path.insert(0,os.path.dirname(__file__))
+import coff
+import gencoff
+
+# name , sections , symbols , relocations in every code and data section
+SIZES = [
+	('small',16,1000,100),
+	('medium',64,20000,1000),
+	('large',256,200000,4000),
+]
+
+def git_commit():
+	try:
+		return subprocess.check_output(['git','rev-parse','HEAD'],cwd=os.path.dirname(os.path.abspath(__file__)),stderr=subprocess.DEVNULL).decode('utf8').strip()
+	except Exception:
+		return None
+
+def time_phases(fname,mmap):
+	# the lazy parts of Coff let every phase be timed on its own
+	phases = dict()
+	stime = time.perf_counter()
+	cffmt = coff.Coff(fname,mmap=mmap,parts=('header',))
+	phases['header'] = time.perf_counter() - stime
+	stime = time.perf_counter()
+	cffmt.sections
+	phases['sections'] = time.perf_counter() - stime
+	stime = time.perf_counter()
+	cffmt.symtables
+	phases['symbols'] = time.perf_counter() - stime
+	stime = time.perf_counter()
+	cffmt.relocs
+	phases['relocs'] = time.perf_counter() - stime
+	cffmt.close()
+	return phases
+
+def time_parse(fname,mmap):
+	stime = time.perf_counter()
+	cffmt = coff.Coff(fname,mmap=mmap)
+	total = time.perf_counter() - stime
+	cffmt.close()
+	return total
+
+def peak_memory(fname,mmap):
+	tracemalloc.start()
+	try:
+		cffmt = coff.Coff(fname,mmap=mmap)
+		current, peak = tracemalloc.get_traced_memory()
+		cffmt.close()
+	finally:
+		tracemalloc.stop()
+	return current, peak
+
+def bench_one(name,numsects,numsyms,numrels,repeat,seed,mmap):
+	fd, fname = tempfile.mkstemp(suffix='.obj')
+	os.close(fd)
+	try:
+		filesize = gencoff.make_coff(fname,numsects=numsects,numsyms=numsyms,numrels=numrels,seed=seed)
+		cffmt = coff.Coff(fname)
+		symnums = cffmt.header.symnums
+		relnums = sum([len(v) for v in cffmt.relocs.values()])
+		cffmt.close()
+		best = None
+		for i in range(repeat):
+			t = time_parse(fname,mmap)
+			if best is None or t < best:
+				best = t
+		phases = None
+		for i in range(repeat):
+			p = time_phases(fname,mmap)
+			if phases is None:
+				phases = p
+			else:
+				for k in p.keys():
+					phases[k] = min(phases[k],p[k])
+		current, peak = peak_memory(fname,mmap)
+	finally:
+		os.remove(fname)
+	return dict(name=name,mmap=mmap,numsects=numsects,symnums=symnums,relocs=relnums,filesize=filesize,\
+		seconds=best,mbps=(filesize / (1 << 20)) / best,symsps=symnums / best,phases=phases,\
+		retained=current,peak=peak)
+
+def compare(results,baseline):
+	olds = dict()
+	for r in baseline['results']:
+		olds[(r['name'],r['mmap'])] = r
+	for r in results:
+		old = olds.get((r['name'],r['mmap']),None)
+		if old is None:
+			continue
+		sys.stdout.write('%-8s mmap[%-5s] seconds %.4f -> %.4f (x%.2f) peak %d -> %d\n'%(r['name'],r['mmap'],\
+			old['seconds'],r['seconds'],old['seconds'] / r['seconds'],old['peak'],r['peak']))
+	return
+
+def main():
+	parser = argparse.ArgumentParser(description='Coff parse benchmark on synthetic objects , results in json')
+	parser.add_argument('-o','--output',default=None,help='json file for the results')
+	parser.add_argument('-b','--baseline',default=None,help='json file of an older run to compare with')
+	parser.add_argument('-r','--repeat',type=int,default=3)
+	parser.add_argument('-s','--seed',type=int,default=0)
+	parser.add_argument('--sizes',default=','.join([s[0] for s in SIZES]),help='names of the sizes to run')
+	parser.add_argument('--mmap',action='store_true',help='also run with mmap=True')
+	args = parser.parse_args()
+	names = args.sizes.split(',')
+	results = []
+	for name, numsects, numsyms, numrels in SIZES:
+		if name not in names:
+			continue
+		for mmap in ([False,True] if args.mmap else [False]):
+			r = bench_one(name,numsects,numsyms,numrels,args.repeat,args.seed,mmap)
+			results.append(r)
+			sys.stdout.write('%-8s mmap[%-5s] size[%d] syms[%d] relocs[%d] %.4fs %.1f MB/s %.0f syms/s peak %d phases %s\n'%(\
+				name,mmap,r['filesize'],r['symnums'],r['relocs'],r['seconds'],r['mbps'],r['symsps'],r['peak'],\
+				' '.join(['%s[%.4f]'%(k,v) for k, v in r['phases'].items()])))
+	report = dict(commit=git_commit(),python=platform.python_version(),platform=platform.platform(),\
+		time=time.strftime('%Y-%m-%dT%H:%M:%S'),seed=args.seed,results=results)
+	if args.output is not None:
+		with open(args.output,'w') as fout:
+			json.dump(report,fout,indent=1)
+	if args.baseline is not None:
+		with open(args.baseline,'r') as fin:
+			compare(results,json.load(fin))
+	sys.exit(0)
+	return
+
+if __name__ == '__main__':
+	main()
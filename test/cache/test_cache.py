@@ -0,0 +1,85 @@
+#! /usr/bin/env python
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..'))
+import coffobj
+import coff
+import coff.cache
+import coff.symindex
+
+
+def make_object():
+	# .text with two functions , their calls and classic line numbers , a COMDAT function and .data
+	builder = coffobj.ObjectBuilder()
+	text = builder.add_section('.text',b'\x90' * 0x40)
+	comdat = builder.add_section('.text$mn',b'\xc3' * 0x10,coffobj.COMDAT_FLAGS)
+	data = builder.add_section('.data',b'\0' * 0x10,coffobj.DATA_FLAGS)
+	builder.add_file('src/main.c')
+	builder.add_section_symbol(text)
+	builder.add_section_symbol(comdat,selection=coff.IMAGE_COMDAT_SELECT_ANY,checksum=0x1234)
+	builder.add_section_symbol(data)
+	main = builder.add_function('main',0x0,text,0x20,baseline=10)
+	helper = builder.add_function('helper_function_with_long_name',0x20,text,0x20,baseline=40)
+	builder.add_function('comdat_func',0x0,comdat,0x10)
+	callee = builder.add_symbol('callee')
+	builder.add_symbol('global_data',0x8,data)
+	builder.sections[text - 1]['relocs'] = [(0x5,callee,coff.IMAGE_REL_AMD64_REL32),(0x15,helper,coff.IMAGE_REL_AMD64_REL32)]
+	builder.sections[data - 1]['relocs'] = [(0x0,main,coff.IMAGE_REL_AMD64_ADDR64)]
+	builder.sections[text - 1]['linenos'] = [(main,0),(0x4,2),(0x10,3),(helper,0),(0x24,2)]
+	return builder
+
+
+class CacheTest(unittest.TestCase):
+	def setUp(self):
+		self.tmpdir = tempfile.mkdtemp()
+		self.fname = make_object().write(os.path.join(self.tmpdir,'main.obj'))
+		return
+
+	def tearDown(self):
+		shutil.rmtree(self.tmpdir)
+		return
+
+	def __results(self,cffmt):
+		# everything the other modules ask of a Coff , as strings
+		rets = dict()
+		rets['sections'] = [str(section) for section in cffmt.sections]
+		rets['symbols'] = dict([(seckey,[str(sym) for sym in symlist]) for seckey, symlist in cffmt.symtables.items()])
+		rets['relocs'] = dict([(seckey,[str(rel) for rel in rels]) for seckey, rels in cffmt.relocs.items()])
+		rets['sectdefs'] = dict([(seckey,str(sectdef)) for seckey, sectdef in cffmt.get_section_defs().items()])
+		rets['lines'] = [str(cffmt.lineno_for(0,offset)) for offset in range(0,0x40,4)]
+		rets['symbol_at'] = [str(cffmt.symbol_at(0,offset)) for offset in (0x0,0x1f,0x20)]
+		index = coff.symindex.SymbolIndex()
+		index.add_coff(cffmt,'main.obj')
+		rets['defined'] = [(name,index.get_definitions(name)) for name in sorted(index.defined.keys())]
+		rets['referenced'] = sorted(index.referenced.keys())
+		return rets
+
+	def __load(self,cache,allrelocs=False):
+		cffmt = coff.Coff(self.fname,cache=cache,allrelocs=allrelocs)
+		try:
+			return cffmt.stats.counters['cachehits'], self.__results(cffmt)
+		finally:
+			cffmt.close()
+
+	def test_cold_warm(self):
+		for allrelocs in (False,True):
+			cache = coff.cache.ParseCache(os.path.join(self.tmpdir,'cache%d'%(allrelocs)))
+			coldhit, cold = self.__load(cache,allrelocs)
+			warmhit, warm = self.__load(cache,allrelocs)
+			self.assertEqual((coldhit,warmhit),(0,1))
+			self.assertEqual(cold,warm)
+		# the lines and the COMDAT selection are the ones of the file
+		self.assertEqual(cold['lines'][0],str(coff.CoffLine('src/main.c',10,0x0,'main')))
+		self.assertEqual(cold['lines'][9],str(coff.CoffLine('src/main.c',41,0x24,'helper_function_with_long_name')))
+		self.assertEqual(cold['sectdefs'][1],str(coff.CoffSectionDef(b'\x10\0\0\0\0\0\0\0\x34\x12\0\0\0\0\x02\0\0\0')))
+		self.assertEqual(len(cold['relocs'][2]),1)
+		return
+
+
+if __name__ == '__main__':
+	unittest.main()
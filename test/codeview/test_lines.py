@@ -0,0 +1,105 @@
+#! /usr/bin/env python
+
+import sys
+import os
+import struct
+import unittest
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..'))
+import coffobj
+import coff
+import coff.codeview
+
+# (offset,line) of the line table of foo , 0x80000000 is fStatement
+FOO_LINES = [(0x0,10),(0x4,0xfeefee),(0x8,11),(0x10,0xf00f00),(0x18,12)]
+FOO_SIZE = 0x20
+# bar is the /Gy COMDAT function , its lines are in b.h , the second file of the checksums
+BAR_LINES = [(0x0,20),(0x6,21)]
+BAR_SIZE = 0x10
+# offsets of a.c and b.h in the file checksums , entries of 6 bytes aligned on 4
+FILEIDS = {'a.c' : 0, 'b.h' : 8}
+
+
+def subsection(kind,data):
+	data += b'\0' * ((4 - len(data) % 4) % 4)
+	return struct.pack('<LL',kind,len(data)) + data
+
+def lines_subsection(fileid,size,cvlines):
+	lines = struct.pack('<LHHL',0,0,0,size)
+	lines += struct.pack('<LLL',fileid,len(cvlines),12 + 8 * len(cvlines))
+	for off, line in cvlines:
+		lines += struct.pack('<LL',off,line | 0x80000000)
+	return subsection(coff.codeview.DEBUG_S_LINES,lines)
+
+def make_object():
+	# amd64 object of .text with foo and the .text$mn COMDAT with bar , the .debug$S of bar is
+	# associative to it and has only its lines , which use the file checksums and strings of
+	# the main .debug$S after it , the one of foo with the hidden lines
+	builder = coffobj.ObjectBuilder()
+	text = builder.add_section('.text',b'\x90' * FOO_SIZE)
+	comdat = builder.add_section('.text$mn',b'\x90' * BAR_SIZE,coffobj.COMDAT_FLAGS)
+	signature = struct.pack('<L',coff.codeview.CV_SIGNATURE_C13)
+	bardebug = signature + lines_subsection(FILEIDS['b.h'],BAR_SIZE,BAR_LINES)
+	debug = signature + lines_subsection(FILEIDS['a.c'],FOO_SIZE,FOO_LINES)
+	debug += subsection(coff.codeview.DEBUG_S_FILECHKSMS,struct.pack('<LBB',1,0,0) + b'\0\0' + struct.pack('<LBB',5,0,0))
+	debug += subsection(coff.codeview.DEBUG_S_STRINGTABLE,b'\0a.c\0b.h\0')
+	bardbg = builder.add_section('.debug$S',bardebug,coffobj.DEBUG_FLAGS | coff.IMAGE_SCN_LNK_COMDAT)
+	dbg = builder.add_section('.debug$S',debug,coffobj.DEBUG_FLAGS)
+	builder.add_section_symbol(text)
+	builder.add_section_symbol(comdat,selection=coff.IMAGE_COMDAT_SELECT_ANY)
+	builder.add_section_symbol(bardbg,number=comdat,selection=coff.IMAGE_COMDAT_SELECT_ASSOCIATIVE)
+	builder.add_section_symbol(dbg)
+	foo = builder.add_symbol('foo',0,text,0x20)
+	bar = builder.add_symbol('bar',0,comdat,0x20)
+	# the lines subsection follows the 4 bytes signature and its 8 bytes header
+	for sectnum, symidx in [(dbg,foo),(bardbg,bar)]:
+		builder.sections[sectnum - 1]['relocs'] = [(12,symidx,coff.IMAGE_REL_AMD64_SECREL),(16,symidx,coff.IMAGE_REL_AMD64_SECTION)]
+	return builder.build()
+
+
+class CodeviewLinesTest(unittest.TestCase):
+	def setUp(self):
+		self.cffmt = coff.Coff(data=memoryview(make_object()))
+		return
+
+	def tearDown(self):
+		self.cffmt.close()
+		return
+
+	def test_line_blocks(self):
+		view = list(coff.codeview.cv_subsections(self.cffmt.section_data(3)))[0][2]
+		blocks = list(coff.codeview.cv_line_blocks(view))
+		self.assertEqual(len(blocks),1)
+		self.assertEqual(list(blocks[0][1]),[0x0,0x8,0x18])
+		self.assertEqual(list(blocks[0][2]),[10,11,12])
+		blocks = list(coff.codeview.cv_line_blocks(view,hidden=True))
+		self.assertEqual(list(blocks[0][2]),[line for off, line in FOO_LINES])
+		return
+
+	def test_line_for(self):
+		# the code of a hidden line gets the real line before it
+		for offset, line, start in [(0x0,10,0x0),(0x4,10,0x0),(0x8,11,0x8),(0x10,11,0x8),(0x17,11,0x8),(0x1f,12,0x18)]:
+			cvline = self.cffmt.line_for(0,offset)
+			self.assertIsNotNone(cvline)
+			self.assertEqual((cvline.fname,cvline.line,cvline.offset,cvline.function),('a.c',line,start,'foo'))
+		self.assertIsNone(self.cffmt.line_for(0,FOO_SIZE))
+		return
+
+	def test_comdat(self):
+		# the lines of bar are found through the relocations of its own .debug$S , the name of its file
+		# through the checksums and strings of the main one
+		for offset, line, start in [(0x0,20,0x0),(0x5,20,0x0),(0x6,21,0x6),(0xf,21,0x6)]:
+			cvline = self.cffmt.line_for(1,offset)
+			self.assertIsNotNone(cvline)
+			self.assertEqual((cvline.fname,cvline.line,cvline.offset,cvline.function),('b.h',line,start,'bar'))
+		self.assertIsNone(self.cffmt.line_for(1,BAR_SIZE))
+		self.assertEqual(self.cffmt.line_for(0,0x0).function,'foo')
+		index = coff.codeview.CvLineIndex(self.cffmt)
+		self.assertEqual(index.functions(0),[(0,FOO_SIZE)])
+		self.assertEqual(index.functions(1),[(0,BAR_SIZE)])
+		self.assertEqual(index.functions(2),[])
+		return
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,176 @@
+#! /usr/bin/env python
+
+import sys
+import os
+import struct
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..','src'))
+import coff
+
+TEXT_FLAGS = coff.IMAGE_SCN_CNT_CODE | coff.IMAGE_SCN_MEM_EXECUTE | coff.IMAGE_SCN_MEM_READ | coff.IMAGE_SCN_ALIGN_16BYTES
+DATA_FLAGS = coff.IMAGE_SCN_CNT_INITIALIZED_DATA | coff.IMAGE_SCN_MEM_READ | coff.IMAGE_SCN_MEM_WRITE | coff.IMAGE_SCN_ALIGN_8BYTES
+DEBUG_FLAGS = coff.IMAGE_SCN_CNT_INITIALIZED_DATA | coff.IMAGE_SCN_MEM_DISCARDABLE | coff.IMAGE_SCN_MEM_READ | coff.IMAGE_SCN_ALIGN_4BYTES
+COMDAT_FLAGS = TEXT_FLAGS | coff.IMAGE_SCN_LNK_COMDAT
+
+
+class ObjectBuilder(object):
+	# hand made objects for the tests , sections with their data , relocations and line numbers ,
+	# symbols with their aux records and the string table , sectnums are 1 based as in the file
+	def __init__(self,machine=0x8664,bigobj=False):
+		self.machine = machine
+		self.bigobj = bigobj
+		self.sections = []
+		self.symbols = []
+		self.strtab = bytearray(4)
+		return
+
+	def add_string(self,name):
+		off = len(self.strtab)
+		self.strtab += name.encode('utf8') + b'\0'
+		return off
+
+	def add_section(self,name,data=b'',flags=TEXT_FLAGS,relocs=(),linenos=(),size=None):
+		# relocs are (vaddr,symidx,type) , linenos (addr,line) , size without data is a .bss
+		if size is None:
+			size = len(data)
+		self.sections.append(dict(name=name,data=data,flags=flags,relocs=list(relocs),linenos=list(linenos),size=size))
+		return len(self.sections)
+
+	def add_symbol(self,name,value=0,sectnum=0,type=0,storagecls=coff.IMAGE_SYM_CLASS_EXTERNAL,auxes=()):
+		symidx = sum([1 + len(sym[5]) for sym in self.symbols])
+		self.symbols.append((name,value,sectnum,type,storagecls,list(auxes)))
+		return symidx
+
+	def add_section_symbol(self,sectnum,number=0,selection=0,checksum=0):
+		# STATIC symbol of the section with its CoffSectionDef aux record , packed by build as the
+		# relocations and line numbers may be added after
+		section = self.sections[sectnum - 1]
+		return self.add_symbol(section['name'],0,sectnum,0,coff.IMAGE_SYM_CLASS_STATIC,[(sectnum,number,selection,checksum)])
+
+	def __section_def(self,sectnum,number,selection,checksum):
+		section = self.sections[sectnum - 1]
+		return struct.pack('<LHHLHBBH',section['size'],len(section['relocs']),len(section['linenos']),checksum,\
+			number & 0xffff,selection,0,(number >> 16) if self.bigobj else 0)
+
+	def add_file(self,fname):
+		# .file symbol , the name fills its aux records
+		raw = fname.encode('utf8')
+		auxes = [raw[i:(i + 18)] for i in range(0,len(raw),18)]
+		return self.add_symbol('.file',0,-2,0,coff.IMAGE_SYM_CLASS_FILE,auxes)
+
+	def add_function(self,name,value,sectnum,size,baseline=0,storagecls=coff.IMAGE_SYM_CLASS_EXTERNAL):
+		# function symbol with its aux record , then the .bf with the base line of the classic line numbers
+		symidx = self.add_symbol(name,value,sectnum,0x20,storagecls,[struct.pack('<LLLL',0,size,0,0)])
+		if baseline > 0:
+			self.add_symbol('.bf',value,sectnum,0,coff.IMAGE_SYM_CLASS_FUNCTION,[struct.pack('<LH',0,baseline)])
+		return symidx
+
+	def __name(self,name):
+		raw = name.encode('utf8')
+		if len(raw) <= 8:
+			return raw.ljust(8,b'\0')
+		return struct.pack('<LL',0,self.add_string(name))
+
+	def build(self):
+		# the string table is made again on every build
+		self.strtab = bytearray(4)
+		symsize = 18
+		hdrsize = 20
+		if self.bigobj:
+			symsize = 20
+			hdrsize = 56
+		cur = hdrsize + 40 * len(self.sections)
+		sechdrs = b''
+		bodies = b''
+		for section in self.sections:
+			raw = section['name'].encode('utf8')
+			if len(raw) > 8:
+				raw = ('/%d'%(self.add_string(section['name']))).encode('utf8')
+			offdata = offrel = offlnno = 0
+			body = b''
+			if len(section['data']) > 0:
+				offdata = cur + len(body)
+				body += section['data']
+			if len(section['relocs']) > 0:
+				offrel = cur + len(body)
+				body += b''.join([struct.pack('<LLH',vaddr,symidx,reltype) for vaddr, symidx, reltype in section['relocs']])
+			if len(section['linenos']) > 0:
+				offlnno = cur + len(body)
+				body += b''.join([struct.pack('<LH',addr,line) for addr, line in section['linenos']])
+			sechdrs += struct.pack('<8sLLLLLLHHL',raw.ljust(8,b'\0'),0,0,section['size'],offdata,offrel,offlnno,\
+				len(section['relocs']),len(section['linenos']),section['flags'])
+			bodies += body
+			cur += len(body)
+		symfmt = '<8sLhHBB'
+		if self.bigobj:
+			symfmt = '<8sLlHBB'
+		symbols = b''
+		numsyms = 0
+		for name, value, sectnum, type, storagecls, auxes in self.symbols:
+			symbols += struct.pack(symfmt,self.__name(name),value,sectnum,type,storagecls,len(auxes))
+			for aux in auxes:
+				if isinstance(aux,tuple):
+					aux = self.__section_def(*aux)
+				symbols += aux.ljust(symsize,b'\0')
+			numsyms += 1 + len(auxes)
+		struct.pack_into('<L',self.strtab,0,len(self.strtab))
+		if self.bigobj:
+			header = struct.pack('<HHHHl16sLLLLLLL',0,0xffff,2,self.machine,0,coff.IMAGE_BIGOBJ_CLASSID,0,0,0,0,\
+				len(self.sections),cur,numsyms)
+		else:
+			header = struct.pack('<HHLLLHH',self.machine,len(self.sections),0,cur,numsyms,0,0)
+		return header + sechdrs + bodies + symbols + bytes(self.strtab)
+
+	def write(self,fname):
+		with open(fname,'wb') as fout:
+			fout.write(self.build())
+		return fname
+
+
+def ar_header(name,size):
+	return ('%-16s%-12d%-6d%-6d%-8o%-10d`\n'%(name,0,0,0,0o644,size)).encode('utf8')
+
+def make_archive(members,symbols,first=True,second=True):
+	# .lib of members [(name,data)] , symbols [(name,member index)] go to the linker members ,
+	# the names longer than 15 bytes go to the // member
+	longnames = b''
+	names = []
+	for name, data in members:
+		if len(name) > 15:
+			names.append('/%d'%(len(longnames)))
+			longnames += name.encode('utf8') + b'\0'
+		else:
+			names.append(name + '/')
+	strings = b''.join([name.encode('utf8') + b'\0' for name, idx in symbols])
+	sortsyms = sorted(symbols)
+	sortstrings = b''.join([name.encode('utf8') + b'\0' for name, idx in sortsyms])
+	firstsize = 4 + 4 * len(symbols) + len(strings)
+	secondsize = 4 + 4 * len(members) + 4 + 2 * len(symbols) + len(sortstrings)
+	# the offsets of the members are known once the sizes of the members before are
+	cur = len(coff.CoffArchive.magic)
+	if first:
+		cur += 60 + firstsize + (firstsize & 1)
+	if second:
+		cur += 60 + secondsize + (secondsize & 1)
+	if len(longnames) > 0:
+		cur += 60 + len(longnames) + (len(longnames) & 1)
+	offsets = []
+	for name, data in members:
+		offsets.append(cur)
+		cur += 60 + len(data) + (len(data) & 1)
+	data = bytearray(coff.CoffArchive.magic)
+	def append(name,body):
+		data.extend(ar_header(name,len(body)) + body)
+		if (len(body) & 1) != 0:
+			data.extend(b'\n')
+		return
+	if first:
+		append('/',struct.pack('>L',len(symbols)) + b''.join([struct.pack('>L',offsets[idx]) for name, idx in symbols]) + strings)
+	if second:
+		append('/',struct.pack('<L',len(members)) + b''.join([struct.pack('<L',off) for off in offsets]) + \
+			struct.pack('<L',len(symbols)) + b''.join([struct.pack('<H',idx + 1) for name, idx in sortsyms]) + sortstrings)
+	if len(longnames) > 0:
+		append('//',longnames)
+	for name, (mname, body) in zip(names,members):
+		append(name,body)
+	return bytes(data)
@@ -5,9 +5,13 @@ import sys
 import os
 import extargsparse
 import logging
+import itertools
+import operator
 
 sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..','..','src'))
 import coff
+import coff.export
+import coff.writer
 
 def read_binary(infile=None):
 	fin = sys.stdin
@@ -33,13 +37,61 @@ def set_logging_level(args):
     logging.basicConfig(level=loglvl,format='%(asctime)s:%(filename)s:%(funcName)s:%(lineno)d\t%(message)s')
     return
 
+# lines joined for one write
+CHUNK_LINES = 8192
+
+def write_lines(lines,fout=None):
+	# lines are made lazily and written CHUNK_LINES at a time , an item may be many lines
+	if fout is None:
+		fout = sys.stdout
+	lines = iter(lines)
+	while True:
+		chunk = ''.join(itertools.islice(lines,CHUNK_LINES))
+		if len(chunk) == 0:
+			break
+		fout.write(chunk)
+	fout.flush()
+	return
+
+def section_lines(v,data):
+	hdr = coff.coff_header(data)
+	size = hdr.get_size()
+	if hdr.optsize != 0:
+		size += hdr.optsize
+	curoff = size
+	yield '[%s] %s\n'%(v,hdr)
+	for i in range(hdr.numsects):
+		sections = coff.CoffSectionHeader(data[curoff:])
+		yield '[%s].[%d] %s\n'%(v,i,sections)
+		curoff += sections.get_size()
+	return
+
+def symbol_lines(cffmt):
+	# one item for every view of a section , the value view is the order of symtables ,
+	# the name view sorts the same strings , every symbol is formatted once
+	for seckey in cffmt.symtables.keys():
+		section = '%s'%(cffmt.sections[seckey])
+		syms = cffmt.symtables[seckey].format_symbols()
+		yield '[%s] %s value\n'%(seckey,section) + ''.join(['    [%d] %s\n'%(idx,symstr) for idx, (name, symstr) in enumerate(syms)])
+		syms.sort(key=operator.itemgetter(0))
+		yield '[%s] %s name\n'%(seckey,section) + ''.join(['    [%d] %s\n'%(idx,symstr) for idx, (name, symstr) in enumerate(syms)])
+	return
+
+def reloc_lines(v,cffmt):
+	for seckey in cffmt.relocs.keys():
+		section = cffmt.sections[seckey]
+		relocs = cffmt.relocs[seckey]
+		logging.info('relocs [%s]'%(len(relocs)))
+		relocs = sorted(relocs, key=operator.attrgetter('vaddr'))
+		yield '[%s].[%s]%s relocs\n'%(v,seckey,section) + ''.join(['    [%d] %s\n'%(idx,rel) for idx, rel in enumerate(relocs)])
+	return
 
 
 def header_handler(args,parser):
 	set_logging_level(args)
 	for v in args.subnargs:
-		data = read_binary(v)
-		hdr = coff.CoffHeader(data)
+		data = memoryview(read_binary(v))
+		hdr = coff.coff_header(data)
 		sys.stdout.write('%s header %s\n'%(v,hdr))
 	sys.exit(0)
 	return
@@ -47,8 +99,8 @@ def header_handler(args,parser):
 def optheader_handler(args,parser):
 	set_logging_level(args)
 	for v in args.subnargs:
-		data = read_binary(v)
-		hdr = coff.CoffHeader(data)
+		data = memoryview(read_binary(v))
+		hdr = coff.coff_header(data)
 		if hdr.optsize == 0:
 			sys.stdout.write('[%s] no opt header\n'%(v))
 		else:
@@ -60,17 +112,8 @@ def optheader_handler(args,parser):
 def sections_handler(args,parser):
 	set_logging_level(args)
 	for v in args.subnargs:
-		data = read_binary(v)
-		hdr = coff.CoffHeader(data)
-		size = hdr.get_size()
-		if hdr.optsize != 0:
-			size += hdr.optsize
-		curoff = size
-		sys.stdout.write('[%s] %s\n'%(v,hdr))
-		for i in range(hdr.numsects):
-			sections = coff.CoffSectionHeader(data[curoff:])
-			sys.stdout.write('[%s].[%d] %s\n'%(v,i,sections))
-			curoff += sections.get_size()
+		data = memoryview(read_binary(v))
+		write_lines(section_lines(v,data))
 	sys.exit(0)
 	return
 
@@ -78,35 +121,17 @@ def symbols_handler(args,parser):
 	set_logging_level(args)
 	for v in args.subnargs:
 		cffmt = coff.Coff(v)
-		for seckey in cffmt.symtables.keys():
-			idx = 0
-			section = cffmt.sections[seckey]
-			sys.stdout.write('[%s] %s value\n'%(seckey,section))
-			for sym in cffmt.symtables[seckey]:
-				sys.stdout.write('    [%d] %s\n'%(idx,sym))
-				idx += 1
-			idx = 0
-			sys.stdout.write('[%s] %s name\n'%(seckey, section))
-			nametbl = sorted(cffmt.symtables[seckey], key = lambda sym: sym.name)
-			for sym in nametbl:
-				sys.stdout.write('    [%d] %s\n'%(idx,sym))
-				idx += 1
+		write_lines(symbol_lines(cffmt))
+		cffmt.close()
 	sys.exit(0)
 	return
 
 def relocs_handler(args,parser):
 	set_logging_level(args)
 	for v in args.subnargs:
-		cffmt = coff.Coff(v)
-		idx = 0
-		for seckey in cffmt.relocs.keys():
-			section = cffmt.sections[seckey]
-			relocs = sorted(cffmt.relocs[seckey], key = lambda rel: rel.value)
-			idx = 0
-			sys.stdout.write('[%s].[%s]%s relocs\n'%(v,seckey,section))
-			for rel in relocs:
-				sys.stdout.write('    [%d] %s\n'%(idx,rel))
-				idx += 1
+		cffmt = coff.Coff(v,allrelocs=args.relocs_full)
+		write_lines(reloc_lines(v,cffmt))
+		cffmt.close()
 	sys.exit(0)
 	return
 
@@ -114,30 +139,37 @@ def all_handler(args,parser):
 	set_logging_level(args)
 	for v in args.subnargs:
 		cffmt = coff.Coff(v)
-		idx = 0
-		for seckey in cffmt.relocs.keys():
-			section = cffmt.sections[seckey]
-			relocs = cffmt.relocs[seckey]
-			idx = 0
-			sys.stdout.write('[%s].[%s]%s relocs\n'%(v,seckey,section))
-			logging.info('relocs [%s]'%(len(relocs)))
-			relocs = sorted(relocs, key=lambda rel: rel.vaddr)
-			for rel in relocs:
-				sys.stdout.write('    [%d] %s\n'%(idx,rel))
-				idx += 1
-		for seckey in cffmt.symtables.keys():
-			idx = 0
-			section = cffmt.sections[seckey]
-			sys.stdout.write('[%s] %s value\n'%(seckey,section))
-			for sym in cffmt.symtables[seckey]:
-				sys.stdout.write('    [%d] %s\n'%(idx,sym))
-				idx += 1
-			idx = 0
-			sys.stdout.write('[%s] %s name\n'%(seckey, section))
-			nametbl = sorted(cffmt.symtables[seckey], key =lambda sym: sym.name)
-			for sym in nametbl:
-				sys.stdout.write('    [%d] %s\n'%(idx,sym))
-				idx += 1
+		write_lines(itertools.chain(reloc_lines(v,cffmt),symbol_lines(cffmt)))
+		cffmt.close()
+	sys.exit(0)
+	return
+
+def export_handler(args,parser):
+	set_logging_level(args)
+	for v in args.subnargs:
+		if args.export_what not in coff.export.EXPORT_PARTS.keys():
+			raise Exception('unknown export [%s]'%(args.export_what))
+		cffmt = coff.Coff(v,mmap=True,parts=coff.export.EXPORT_PARTS[args.export_what],allrelocs=args.export_allrelocs)
+		coff.export.export(cffmt,sys.stdout,args.export_what,args.export_format,args.export_all)
+		cffmt.close()
+	sys.exit(0)
+	return
+
+def strip_handler(args,parser):
+	set_logging_level(args)
+	# strip input [output] , the debug sections when no --strip-sections given
+	fname = args.subnargs[0]
+	outname = fname
+	if len(args.subnargs) > 1:
+		outname = args.subnargs[1]
+	writer = coff.writer.CoffWriter(fname)
+	if len(args.strip_sections) > 0:
+		cnt = writer.remove_sections(args.strip_sections.split(','))
+	else:
+		cnt = writer.strip_debug()
+	size = writer.write(outname)
+	writer.close()
+	sys.stdout.write('[%s] removed [%d] sections , [%s] %d bytes\n'%(fname,cnt,outname,size))
 	sys.exit(0)
 	return
 
@@ -159,10 +191,22 @@ def main():
 			"$" : "+"
 		},
 		"relocs<relocs_handler>" : {
-			"$" : "+"
+			"$" : "+",
+			"full" : false
 		},
 		"all<all_handler>" : {
 			"$" : "+"
+		},
+		"export<export_handler>" : {
+			"$" : "+",
+			"format" : "jsonl",
+			"what" : "symbols",
+			"all" : false,
+			"allrelocs" : false
+		},
+		"strip<strip_handler>" : {
+			"$" : "+",
+			"sections" : ""
 		}
 	}
 	'''
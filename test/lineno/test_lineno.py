@@ -0,0 +1,116 @@
+#! /usr/bin/env python
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..'))
+import coffobj
+import coff
+
+# (name,file,start,size,baseline,[(offset,line)]) , the lines are relative to the .bf base line ,
+# 0 baseline is a function without .bf whose lines are taken as they are
+FUNCTIONS = [
+	('first',   'src/a.c',0x00,0x10,10, [(0x4,2),(0x8,5)]),
+	('second',  'src/b.c',0x20,0x10,100,[(0x24,3),(0x2c,4)]),
+	('nobf_function_long_name','src/b.c',0x40,0x10,0,[(0x40,7),(0x48,9)]),
+	]
+
+
+def make_object(bigobj=False):
+	# .text with the functions in FUNCTIONS , their line records given in the reverse order so that
+	# the table is sorted , a .file before the functions of every source , .data without lines
+	builder = coffobj.ObjectBuilder(bigobj=bigobj)
+	text = builder.add_section('.text',b'\x90' * 0x50)
+	data = builder.add_section('.data',b'\0' * 0x10,coffobj.DATA_FLAGS)
+	builder.add_section_symbol(text)
+	builder.add_section_symbol(data)
+	blocks = []
+	fname = None
+	for name, source, start, size, baseline, lines in FUNCTIONS:
+		if source != fname:
+			builder.add_file(source)
+			fname = source
+		symidx = builder.add_function(name,start,text,size,baseline)
+		blocks.append([(symidx,0)] + lines)
+	builder.sections[text - 1]['linenos'] = sum(blocks[::-1],[])
+	return builder
+
+def expected_line(offset):
+	# CoffLine the linear walk of FUNCTIONS gives , None outside of the lines of the functions
+	for name, source, start, size, baseline, lines in FUNCTIONS:
+		if offset < start or offset >= (start + size):
+			continue
+		entries = lines
+		if baseline > 0:
+			entries = [(start,baseline)] + [(off,line + baseline - 1) for off, line in lines]
+		found = None
+		for off, line in entries:
+			if off <= offset:
+				found = coff.CoffLine(source,line,off,name)
+		return found
+	return None
+
+
+class LineTableTest(unittest.TestCase):
+	def setUp(self):
+		self.tmpdir = tempfile.mkdtemp()
+		return
+
+	def tearDown(self):
+		shutil.rmtree(self.tmpdir)
+		return
+
+	def __open(self,bigobj=False):
+		fname = make_object(bigobj).write(os.path.join(self.tmpdir,'lines%d.obj'%(bigobj)))
+		return coff.Coff(fname)
+
+	def test_baseline(self):
+		# the line 0 record gives the function symbol , its .bf the base line of the start of the function
+		cffmt = self.__open()
+		self.assertEqual(cffmt.lineno_for(0,0x0),coff.CoffLine('src/a.c',10,0x0,'first'))
+		self.assertEqual(cffmt.lineno_for(0,0x4),coff.CoffLine('src/a.c',11,0x4,'first'))
+		self.assertEqual(cffmt.lineno_for(0,0xf),coff.CoffLine('src/a.c',14,0x8,'first'))
+		self.assertEqual(cffmt.lineno_for(0,0x20),coff.CoffLine('src/b.c',100,0x20,'second'))
+		self.assertEqual(cffmt.lineno_for(0,0x2d),coff.CoffLine('src/b.c',103,0x2c,'second'))
+		cffmt.close()
+		return
+
+	def test_no_bf(self):
+		# without .bf the lines are the ones of the records and the function has no line of its own
+		cffmt = self.__open()
+		self.assertEqual(cffmt.lineno_for(0,0x40),coff.CoffLine('src/b.c',7,0x40,'nobf_function_long_name'))
+		self.assertEqual(cffmt.lineno_for(0,0x4f),coff.CoffLine('src/b.c',9,0x48,'nobf_function_long_name'))
+		cffmt.close()
+		return
+
+	def test_outside(self):
+		# between the functions , after the last one and in a section without lines
+		cffmt = self.__open()
+		self.assertIsNone(cffmt.lineno_for(0,0x10))
+		self.assertIsNone(cffmt.lineno_for(0,0x3f))
+		self.assertIsNone(cffmt.lineno_for(0,0x50))
+		self.assertIsNone(cffmt.get_linetable(1))
+		self.assertIsNone(cffmt.lineno_for(1,0x0))
+		cffmt.close()
+		return
+
+	def test_table(self):
+		# the records given out of order are sorted , and bisection agrees with the linear walk everywhere
+		for bigobj in (False,True):
+			cffmt = self.__open(bigobj)
+			table = cffmt.get_linetable(0)
+			self.assertEqual(list(table.offsets),sorted(table.offsets))
+			self.assertEqual(len(table),8)
+			self.assertEqual([symidx for symidx, start, size, baseline in table.functions][::-1],\
+				sorted([symidx for symidx, start, size, baseline in table.functions]))
+			for offset in range(0x58):
+				self.assertEqual(cffmt.lineno_for(0,offset),expected_line(offset),'offset 0x%x bigobj %s'%(offset,bigobj))
+			cffmt.close()
+		return
+
+
+if __name__ == '__main__':
+	unittest.main()
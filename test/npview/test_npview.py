@@ -0,0 +1,85 @@
+#! /usr/bin/env python
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..'))
+import coffobj
+import coff
+
+
+def make_object(bigobj=False):
+	# short names with nul and space ends , the same short name twice , long names , aux records between
+	builder = coffobj.ObjectBuilder(bigobj=bigobj)
+	text = builder.add_section('.text',b'\x90' * 0x20)
+	data = builder.add_section('.data',b'\0' * 0x10,coffobj.DATA_FLAGS)
+	builder.add_file('src/npview.c')
+	builder.add_section_symbol(text)
+	builder.add_section_symbol(data)
+	builder.add_function('main',0,text,0x10,baseline=3)
+	builder.add_function('long_function_name',0x10,text,0x10)
+	builder.add_symbol('eightchr',0,data)
+	builder.add_symbol('ab cd',0x4,data,0,coff.IMAGE_SYM_CLASS_STATIC)
+	builder.add_symbol('main',0x8,data,0,coff.IMAGE_SYM_CLASS_STATIC)
+	builder.add_symbol('global_table_long_name',0xc,data)
+	builder.add_symbol('external_long_name')
+	builder.add_symbol('ext')
+	return builder
+
+
+class CoffArraysTest(unittest.TestCase):
+	def setUp(self):
+		self.tmpdir = tempfile.mkdtemp()
+		return
+
+	def tearDown(self):
+		shutil.rmtree(self.tmpdir)
+		return
+
+	def __expected(self,cffmt,arrays):
+		# the names SymbolTable gives , '' for the aux records
+		symtab = cffmt.symboltable
+		isaux = arrays.get_auxmask()
+		return [('' if isaux[i] else symtab.get_name(i)) for i in range(symtab.symnums)]
+
+	def test_names(self):
+		for bigobj in (False,True):
+			fname = make_object(bigobj).write(os.path.join(self.tmpdir,'names%d.obj'%(bigobj)))
+			cffmt = coff.Coff(fname)
+			arrays = cffmt.as_numpy()
+			expected = self.__expected(cffmt,arrays)
+			self.assertIn('ab',expected)
+			self.assertIn('eightchr',expected)
+			self.assertIn('global_table_long_name',expected)
+			self.assertEqual(expected.count('main'),2)
+			self.assertEqual(arrays.get_names().tolist(),expected)
+			primary = arrays.get_primary()
+			self.assertEqual(arrays.get_names(primary).tolist(),[expected[i] for i in primary])
+			cffmt.close()
+		return
+
+	def test_rows(self):
+		# rows in any order and repeated keep their order , aux rows give ''
+		fname = make_object().write(os.path.join(self.tmpdir,'rows.obj'))
+		cffmt = coff.Coff(fname)
+		arrays = cffmt.as_numpy()
+		expected = self.__expected(cffmt,arrays)
+		rows = list(range(len(expected)))[::-1] + [0,len(expected) - 1,0]
+		self.assertEqual(arrays.get_names(numpy.array(rows)).tolist(),[expected[i] for i in rows])
+		aux = numpy.flatnonzero(arrays.get_auxmask())
+		self.assertTrue(len(aux) > 0)
+		self.assertEqual(arrays.get_names(aux).tolist(),[''] * len(aux))
+		self.assertEqual(arrays.get_names(numpy.array([],dtype=numpy.int64)).tolist(),[])
+		cffmt.close()
+		return
+
+
+if __name__ == '__main__':
+	unittest.main()
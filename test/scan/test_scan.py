@@ -0,0 +1,100 @@
+#! /usr/bin/env python
+
+import sys
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..'))
+import coffobj
+import coff
+
+NUMOBJS = 7
+# the index in the paths of the file which is not an object
+BADIDX = 3
+
+
+def make_member(idx):
+	# object idx has idx + 1 functions , so every summary is told apart from the others
+	builder = coffobj.ObjectBuilder()
+	text = builder.add_section('.text',b'\x90' * (0x10 * (idx + 1)))
+	data = builder.add_section('.data',b'\0' * 0x8,coffobj.DATA_FLAGS)
+	builder.add_section_symbol(text)
+	builder.add_section_symbol(data)
+	for i in range(idx + 1):
+		builder.add_symbol('function_%d_of_object_%d'%(i,idx),0x10 * i,text,0x20)
+	table = builder.add_symbol('table_%d'%(idx),0,data)
+	builder.sections[text - 1]['relocs'] = [(0x1,table,coff.IMAGE_REL_AMD64_REL32)]
+	return builder
+
+def key(summary):
+	# what a summary holds without the stats , which differ from run to run
+	return (summary.fname,summary.error,summary.header,summary.sections,summary.symbols,summary.relocs)
+
+
+class ScanTest(unittest.TestCase):
+	def setUp(self):
+		self.tmpdir = tempfile.mkdtemp()
+		self.paths = []
+		for idx in range(NUMOBJS):
+			fname = os.path.join(self.tmpdir,'obj%d.obj'%(idx))
+			if idx == BADIDX:
+				# amd64 header of 50 sections with none of them in the file
+				with open(fname,'wb') as fout:
+					fout.write(struct.pack('<HHLLLHH',0x8664,50,0,0,0,0,0) + b'\0' * 8)
+			else:
+				make_member(idx).write(fname)
+			self.paths.append(fname)
+		return
+
+	def tearDown(self):
+		shutil.rmtree(self.tmpdir)
+		return
+
+	def test_serial(self):
+		summaries = list(coff.scan(self.paths,workers=1))
+		self.assertEqual([summary.fname for summary in summaries],self.paths)
+		for idx, summary in enumerate(summaries):
+			if idx == BADIDX:
+				self.assertIsNotNone(summary.error)
+				self.assertIsNone(summary.sections)
+				continue
+			self.assertIsNone(summary.error)
+			self.assertEqual(len(summary.sections),2)
+			names = [sym[0] for sym in summary.symbols]
+			self.assertIn('table_%d'%(idx),names)
+			self.assertEqual(len([name for name in names if name.startswith('function_')]),idx + 1)
+			self.assertEqual([rel[2] for rel in summary.relocs[0]],['table_%d'%(idx)])
+		return
+
+	def test_ordered(self):
+		# the results of the workers come in the order of the paths , the same as the serial ones
+		serial = [key(summary) for summary in coff.scan(self.paths,workers=1)]
+		for chunksize in (1,2,16):
+			parallel = [key(summary) for summary in coff.scan(self.paths,workers=2,chunksize=chunksize)]
+			self.assertEqual(parallel,serial)
+		return
+
+	def test_unordered(self):
+		serial = [key(summary) for summary in coff.scan(self.paths,workers=1)]
+		parallel = [key(summary) for summary in coff.scan(iter(self.paths),workers=3,ordered=False,chunksize=1)]
+		self.assertEqual(len(parallel),len(serial))
+		self.assertEqual(sorted(parallel,key=lambda k: k[0]),serial)
+		return
+
+	def test_parts(self):
+		# only the parts asked are parsed , the header of the corrupt file is read without its sections
+		summaries = list(coff.scan(self.paths,workers=2,parts=('header',),chunksize=2))
+		self.assertEqual([summary.fname for summary in summaries],self.paths)
+		for idx, summary in enumerate(summaries):
+			self.assertIsNone(summary.sections)
+			self.assertIsNone(summary.symbols)
+			self.assertIsNone(summary.error)
+			self.assertEqual(summary.header[1],50 if idx == BADIDX else 2)
+		return
+
+
+if __name__ == '__main__':
+	unittest.main()
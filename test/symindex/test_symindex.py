@@ -0,0 +1,147 @@
+#! /usr/bin/env python
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..'))
+import coffobj
+import coff
+import coff.symindex
+
+
+def make_object(defs=(),comdats=(),commons=(),refs=()):
+	# defs are names in .text , comdats (name,selection,size,checksum) one COMDAT section each ,
+	# commons (name,size) and refs undefined externals
+	builder = coffobj.ObjectBuilder()
+	text = builder.add_section('.text',b'\xc3' * 0x10)
+	builder.add_section_symbol(text)
+	for name in defs:
+		builder.add_symbol(name,0,text,0x20)
+	for name, selection, size, checksum in comdats:
+		sectnum = builder.add_section('.text$mn',b'\xc3' * size,coffobj.COMDAT_FLAGS)
+		builder.add_section_symbol(sectnum,selection=selection,checksum=checksum)
+		builder.add_symbol(name,0,sectnum,0x20)
+	for name, size in commons:
+		builder.add_symbol(name,size,0)
+	for name in refs:
+		builder.add_symbol(name)
+	return builder.build()
+
+
+class SymbolIndexTest(unittest.TestCase):
+	def setUp(self):
+		self.tmpdir = tempfile.mkdtemp()
+		return
+
+	def tearDown(self):
+		shutil.rmtree(self.tmpdir)
+		return
+
+	def __write(self,fname,data):
+		fname = os.path.join(self.tmpdir,fname)
+		with open(fname,'wb') as fout:
+			fout.write(data)
+		return fname
+
+	def __index(self,*datas):
+		index = coff.symindex.SymbolIndex()
+		for i, data in enumerate(datas):
+			with coff.Coff(data=memoryview(data)) as cffmt:
+				index.add_coff(cffmt,'o%d.obj'%(i))
+		return index
+
+	def __duplicates(self,index):
+		return dict(index.duplicates())
+
+	def test_plain(self):
+		index = self.__index(make_object(defs=['f']),make_object(defs=['f','g']))
+		self.assertEqual(self.__duplicates(index),{'f':['o0.obj','o1.obj']})
+		return
+
+	def test_noduplicates(self):
+		comdat = ('f',coff.IMAGE_COMDAT_SELECT_NODUPLICATES,0x10,0x1)
+		index = self.__index(make_object(comdats=[comdat]),make_object(comdats=[comdat]))
+		self.assertEqual(self.__duplicates(index),{'f':['o0.obj','o1.obj']})
+		return
+
+	def test_same_size(self):
+		sel = coff.IMAGE_COMDAT_SELECT_SAME_SIZE
+		index = self.__index(make_object(comdats=[('f',sel,0x10,0x1),('g',sel,0x10,0x1)]),\
+			make_object(comdats=[('f',sel,0x10,0x2),('g',sel,0x20,0x1)]))
+		self.assertEqual(self.__duplicates(index),{'g':['o0.obj','o1.obj']})
+		return
+
+	def test_exact_match(self):
+		sel = coff.IMAGE_COMDAT_SELECT_EXACT_MATCH
+		index = self.__index(make_object(comdats=[('f',sel,0x10,0x1),('g',sel,0x10,0x1),('h',sel,0x10,0x1)]),\
+			make_object(comdats=[('f',sel,0x10,0x1),('g',sel,0x10,0x2),('h',sel,0x20,0x1)]))
+		self.assertEqual(self.__duplicates(index),{'g':['o0.obj','o1.obj'],'h':['o0.obj','o1.obj']})
+		return
+
+	def test_any(self):
+		sel = coff.IMAGE_COMDAT_SELECT_ANY
+		index = self.__index(make_object(comdats=[('f',sel,0x10,0x1)]),make_object(comdats=[('f',sel,0x20,0x2)]))
+		self.assertEqual(self.__duplicates(index),{})
+		self.assertEqual([d[2] for d in index.get_definitions('f')],[sel,sel])
+		return
+
+	def test_common(self):
+		index = self.__index(make_object(commons=[('c',8),('d',4)]),make_object(commons=[('c',16)],defs=['d']))
+		self.assertEqual(self.__duplicates(index),{})
+		self.assertEqual([d[2:4] for d in index.get_definitions('c')],[(coff.symindex.SYMINDEX_SELECT_COMMON,8),(coff.symindex.SYMINDEX_SELECT_COMMON,16)])
+		return
+
+	def test_archive_members(self):
+		obj = self.__write('a.obj',make_object(defs=['f']))
+		lib = self.__write('b.lib',coffobj.make_archive([('m1.obj',make_object(defs=['f'])),('m2.obj',make_object(defs=['f']))],[('f',0)]))
+		index = coff.symindex.build([obj,lib],workers=1)
+		self.assertEqual(self.__duplicates(index),{})
+		self.assertEqual([(d[0],d[1]) for d in index.get_definitions('f')],[(obj,coff.symindex.SYMINDEX_KIND_OBJECT),\
+			('%s(m1.obj)'%(lib),coff.symindex.SYMINDEX_KIND_MEMBER),('%s(m2.obj)'%(lib),coff.symindex.SYMINDEX_KIND_MEMBER)])
+		return
+
+	def test_unresolved(self):
+		index = self.__index(make_object(defs=['f'],refs=['g','h']),make_object(defs=['g'],refs=['h','f']))
+		self.assertEqual(dict(index.unresolved()),{'h':['o0.obj','o1.obj']})
+		self.assertEqual(index.get_references('f'),['o1.obj'])
+		return
+
+	def test_merge(self):
+		datas = [make_object(defs=['f'],refs=['x']),make_object(defs=['f','g'],refs=['x']),make_object(defs=['f'],refs=['x','y'])]
+		whole = self.__index(*datas)
+		# the same objects added to two indexes and merged , the chains of f and x join in the order added
+		first = self.__index(*datas[:1])
+		second = self.__index(*datas[1:])
+		second.objects = ['o1.obj','o2.obj']
+		first.merge(second)
+		for name in ('f','g'):
+			self.assertEqual(first.get_definitions(name),whole.get_definitions(name))
+		for name in ('x','y'):
+			self.assertEqual(first.get_references(name),whole.get_references(name))
+		self.assertEqual(self.__duplicates(first),self.__duplicates(whole))
+		self.assertEqual(str(first),str(whole))
+		return
+
+	def test_build_parallel(self):
+		paths = []
+		for i in range(7):
+			paths.append(self.__write('o%d.obj'%(i),make_object(defs=['f%d'%(i),'dup'],refs=['f%d'%(i + 1),'missing'])))
+		paths.append(self.__write('bad.obj',b'not an object'))
+		serial = coff.symindex.build(paths,workers=1)
+		parallel = coff.symindex.build(paths,workers=3,chunksize=2)
+		for index in (serial,parallel):
+			self.assertEqual(list(index.errors.keys()),[paths[-1]])
+		self.assertEqual(serial.objects,parallel.objects)
+		self.assertEqual(self.__duplicates(serial),self.__duplicates(parallel))
+		self.assertEqual(dict(serial.unresolved()),dict(parallel.unresolved()))
+		self.assertEqual(dict(serial.unresolved()),{'f7':[paths[6]],'missing':paths[:7]})
+		for name in serial.defined.keys():
+			self.assertEqual(serial.get_definitions(name),parallel.get_definitions(name))
+		return
+
+
+if __name__ == '__main__':
+	unittest.main()
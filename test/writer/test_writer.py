@@ -0,0 +1,169 @@
+#! /usr/bin/env python
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..'))
+import coffobj
+import coff
+import coff.writer
+
+
+def make_object(bigobj=False):
+	# .text calls into the COMDAT function , .debug$S of .text and of the COMDAT , .xdata associative
+	# to the COMDAT , long names in the removed sections and in the kept ones
+	builder = coffobj.ObjectBuilder(bigobj=bigobj)
+	text = builder.add_section('.text',b'\x90' * 0x20)
+	debug = builder.add_section('.debug$S',b'\x04\0\0\0' + b'\0' * 12,coffobj.DEBUG_FLAGS)
+	data = builder.add_section('.data',b'\0' * 0x10,coffobj.DATA_FLAGS)
+	comdat = builder.add_section('.text$mn',b'\xc3' * 0x10,coffobj.COMDAT_FLAGS)
+	xdata = builder.add_section('.xdata',b'\x01' * 0x8,coffobj.DATA_FLAGS | coff.IMAGE_SCN_LNK_COMDAT)
+	comdatdebug = builder.add_section('.debug$S',b'\x04\0\0\0',coffobj.DEBUG_FLAGS | coff.IMAGE_SCN_LNK_COMDAT)
+	builder.add_section_symbol(text)
+	builder.add_section_symbol(debug)
+	builder.add_symbol('debug_only_long_symbol_name',0x4,debug,0,coff.IMAGE_SYM_CLASS_STATIC)
+	builder.add_section_symbol(data)
+	builder.add_section_symbol(comdat,selection=coff.IMAGE_COMDAT_SELECT_ANY)
+	builder.add_section_symbol(xdata,number=comdat,selection=coff.IMAGE_COMDAT_SELECT_ASSOCIATIVE)
+	builder.add_section_symbol(comdatdebug,number=comdat,selection=coff.IMAGE_COMDAT_SELECT_ASSOCIATIVE)
+	main = builder.add_symbol('main',0,text,0x20)
+	func = builder.add_symbol('comdat_function_long_name',0,comdat,0x20)
+	table = builder.add_symbol('global_table_long_name',0,data)
+	callee = builder.add_symbol('callee')
+	builder.sections[text - 1]['relocs'] = [(0x1,func,coff.IMAGE_REL_AMD64_REL32),(0x6,callee,coff.IMAGE_REL_AMD64_REL32),\
+		(0xb,table,coff.IMAGE_REL_AMD64_REL32)]
+	builder.sections[debug - 1]['relocs'] = [(0x4,main,coff.IMAGE_REL_AMD64_SECREL),(0x8,main,coff.IMAGE_REL_AMD64_SECTION)]
+	builder.sections[comdatdebug - 1]['relocs'] = [(0x0,func,coff.IMAGE_REL_AMD64_SECREL)]
+	builder.sections[xdata - 1]['relocs'] = [(0x0,func,coff.IMAGE_REL_AMD64_ADDR32NB)]
+	return builder
+
+
+def describe(fname):
+	# what must survive the rewrite : sections , symbols with their section names , relocations with
+	# the names of their symbols and the COMDAT associations by name
+	with coff.Coff(fname,allrelocs=True) as cffmt:
+		sections = cffmt.sections
+		symtab = cffmt.symboltable
+		names = [section.name for section in sections]
+		symbols = []
+		i = 0
+		while i < symtab.symnums:
+			sectnum = symtab.sectnums[i]
+			symbols.append((symtab.get_name(i),names[sectnum - 1] if sectnum > 0 else sectnum))
+			i += 1 + symtab.numauxs[i]
+		relocs = dict([(names[seckey],[(rel.vaddr,rel.name,rel.type) for rel in rels]) for seckey, rels in cffmt.relocs.items() if len(rels) > 0])
+		assocs = dict([(names[seckey],names[sectdef.number - 1]) for seckey, sectdef in cffmt.get_section_defs().items() \
+			if sectdef.selection == coff.IMAGE_COMDAT_SELECT_ASSOCIATIVE])
+		return type(cffmt.header).__name__, names, symbols, relocs, assocs
+
+
+class CoffWriterTest(unittest.TestCase):
+	def setUp(self):
+		self.tmpdir = tempfile.mkdtemp()
+		return
+
+	def tearDown(self):
+		shutil.rmtree(self.tmpdir)
+		return
+
+	def __path(self,name):
+		return os.path.join(self.tmpdir,name)
+
+	def __read(self,fname):
+		with open(fname,'rb') as fin:
+			return fin.read()
+
+	def test_identity(self):
+		for bigobj in (False,True):
+			fname = make_object(bigobj).write(self.__path('in.obj'))
+			with coff.writer.CoffWriter(fname) as writer:
+				size = writer.write(self.__path('out.obj'))
+			self.assertEqual(self.__read(self.__path('out.obj')),self.__read(fname))
+			self.assertEqual(size,os.path.getsize(fname))
+		return
+
+	def test_strip_debug(self):
+		fname = make_object().write(self.__path('in.obj'))
+		with coff.writer.CoffWriter(fname) as writer:
+			self.assertEqual(writer.strip_debug(),2)
+			writer.write(self.__path('out.obj'))
+		kind, names, symbols, relocs, assocs = describe(self.__path('out.obj'))
+		self.assertEqual(names,['.text','.data','.text$mn','.xdata'])
+		self.assertEqual(symbols,[('.text','.text'),('.data','.data'),('.text$mn','.text$mn'),('.xdata','.xdata'),\
+			('main','.text'),('comdat_function_long_name','.text$mn'),('global_table_long_name','.data'),('callee',0)])
+		self.assertEqual(relocs,{'.text':[(0x1,'comdat_function_long_name',coff.IMAGE_REL_AMD64_REL32),\
+			(0x6,'callee',coff.IMAGE_REL_AMD64_REL32),(0xb,'global_table_long_name',coff.IMAGE_REL_AMD64_REL32)],\
+			'.xdata':[(0x0,'comdat_function_long_name',coff.IMAGE_REL_AMD64_ADDR32NB)]})
+		self.assertEqual(assocs,{'.xdata':'.text$mn'})
+		# the string table only keeps the names still used
+		self.assertNotIn(b'debug_only_long_symbol_name',self.__read(self.__path('out.obj')))
+		return
+
+	def test_associative(self):
+		# the sections associated with a removed COMDAT go with it , the call into it is refused
+		fname = make_object().write(self.__path('in.obj'))
+		with coff.writer.CoffWriter(fname) as writer:
+			writer.remove_sections(['.text$mn'])
+			with self.assertRaises(Exception) as ctx:
+				writer.write(self.__path('out.obj'))
+		self.assertIn('relocation in [.text] to symbol',str(ctx.exception))
+		self.assertFalse(os.path.exists(self.__path('out.obj')))
+		self.assertEqual([name for name in os.listdir(self.tmpdir)],['in.obj'])
+		with coff.writer.CoffWriter(fname) as writer:
+			writer.remove_sections(['.text$mn','.text','.debug$S'])
+			writer.write(self.__path('out.obj'))
+		kind, names, symbols, relocs, assocs = describe(self.__path('out.obj'))
+		self.assertEqual(names,['.data'])
+		self.assertEqual(symbols,[('.data','.data'),('global_table_long_name','.data'),('callee',0)])
+		return
+
+	def test_removed_reloc(self):
+		fname = make_object().write(self.__path('in.obj'))
+		with coff.writer.CoffWriter(fname) as writer:
+			writer.remove_sections(['.data'])
+			self.assertRaises(Exception,writer.write,self.__path('out.obj'))
+		return
+
+	def test_bigobj(self):
+		make_object().write(self.__path('small.obj'))
+		make_object(bigobj=True).write(self.__path('big.obj'))
+		for name in ('small','big'):
+			coff.writer.strip(self.__path('%s.obj'%(name)),self.__path('%s.out.obj'%(name)))
+		small = describe(self.__path('small.out.obj'))
+		big = describe(self.__path('big.out.obj'))
+		self.assertEqual(big[0],'CoffBigHeader')
+		self.assertEqual(big[1:],small[1:])
+		return
+
+	def test_in_place(self):
+		fname = make_object().write(self.__path('in.obj'))
+		make_object().write(self.__path('copy.obj'))
+		coff.writer.strip(self.__path('copy.obj'),self.__path('out.obj'))
+		writer = coff.writer.CoffWriter(fname)
+		writer.strip_debug()
+		writer.write(fname)
+		# closed before the file is replaced
+		self.assertIsNone(writer.cffmt)
+		self.assertRaises(Exception,writer.write,fname)
+		writer.close()
+		self.assertEqual(self.__read(fname),self.__read(self.__path('out.obj')))
+		self.assertEqual(sorted(os.listdir(self.tmpdir)),['copy.obj','in.obj','out.obj'])
+		return
+
+	def test_bad_sectnum(self):
+		builder = make_object()
+		builder.add_symbol('lost',0,99)
+		fname = builder.write(self.__path('in.obj'))
+		with coff.writer.CoffWriter(fname) as writer:
+			writer.strip_debug()
+			with self.assertRaises(Exception) as ctx:
+				writer.write(self.__path('out.obj'))
+		self.assertIn('sectnum [99] > [6] sections',str(ctx.exception))
+		return
+
+
+if __name__ == '__main__':
+	unittest.main()